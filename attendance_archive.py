@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+考勤归档 - 把每份签到表整理后的记录和考勤计算结果存入本地 SQLite
+
+历史查询（某人全年工时等）和重新出报表都直接读归档，不必重新解析原始工作簿。
+"""
+
+import hashlib
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+# 默认归档文件名
+DEFAULT_ARCHIVE_FILENAME = 'attendance_archive.sqlite3'
+
+# 表结构版本（PRAGMA user_version）；2 起增加按月汇总表 rollups，3 起汇总表增加出勤日掩码 day_mask
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imports (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,          -- 签到表的绝对路径
+    imported_at TEXT NOT NULL,
+    record_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    import_id INTEGER NOT NULL REFERENCES imports(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    company TEXT NOT NULL,
+    employee TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    description TEXT,
+    PRIMARY KEY (import_id, seq)
+);
+CREATE TABLE IF NOT EXISTS results (
+    import_id INTEGER NOT NULL REFERENCES imports(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    company TEXT NOT NULL,
+    employee TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time_formatted TEXT,
+    end_time_formatted TEXT,
+    shift_type TEXT,
+    total_hours REAL,
+    effective_hours REAL,
+    night_allowance REAL,
+    is_night_shift INTEGER,
+    PRIMARY KEY (import_id, seq)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    import_id INTEGER NOT NULL REFERENCES imports(id) ON DELETE CASCADE,
+    company TEXT NOT NULL,
+    employee TEXT NOT NULL,
+    month TEXT NOT NULL,
+    first_seq INTEGER NOT NULL,
+    attendance_days INTEGER NOT NULL,
+    day_mask INTEGER NOT NULL,     -- 出勤日：第 d 日对应第 d-1 位，跨导入按位或后去重计数
+    total_hours REAL NOT NULL,
+    night_allowance_count INTEGER NOT NULL,
+    night_allowance REAL NOT NULL,
+    PRIMARY KEY (import_id, company, employee, month)
+);
+CREATE INDEX IF NOT EXISTS idx_rollups_month ON rollups (month, company);
+CREATE INDEX IF NOT EXISTS idx_records_company_employee_date ON records (company, employee, date);
+CREATE INDEX IF NOT EXISTS idx_results_company_employee_date ON results (company, employee, date);
+CREATE INDEX IF NOT EXISTS idx_results_employee_date ON results (employee, date);
+"""
+
+# 按导入、公司、员工、月份汇总（口径与考勤统计报表的汇总列一致：出勤次数按天计）
+ROLLUP_SQL = """
+INSERT INTO rollups
+SELECT r.import_id, r.company, r.employee, substr(r.date, 1, 7), MIN(r.seq), COUNT(DISTINCT r.date),
+       SUM(DISTINCT 1 << (CAST(substr(r.date, 9, 2) AS INTEGER) - 1)),
+       SUM(r.effective_hours), SUM(r.night_allowance > 0), SUM(r.night_allowance)
+FROM results r
+WHERE r.import_id = ?
+GROUP BY r.company, r.employee, substr(r.date, 1, 7)
+"""
+
+# 只取某份签到表（imports.source）的导入
+_SOURCE_FILTER = ' AND {}import_id IN (SELECT id FROM imports WHERE source = ?)'
+
+# 读取文件摘要时每次读取的字节数
+_HASH_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """文件内容的 SHA-256（改名或移动后的同一文件视为同一份）"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def month_bounds(year: int, month: int) -> Tuple[str, str]:
+    """某月的日期范围 [首日, 次月首日)，ISO 字符串"""
+    first = date(year, month, 1)
+    following = date(year + month // 12, month % 12 + 1, 1)
+    return first.isoformat(), following.isoformat()
+
+
+class AttendanceArchive:
+    """
+    SQLite 考勤归档
+
+    每次导入对应一份签到表（按文件内容摘要识别），记录和计算结果按导入编号和
+    原始顺序号存放，按 (公司, 员工, 日期) 建索引。
+
+    用法：
+        with AttendanceArchive('attendance_archive.sqlite3') as archive:
+            archive.import_month(input_file, records, statistics)
+            records = archive.load_records('公司A', 2025, 6)
+    """
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_FILENAME):
+        """
+        Args:
+            path: 归档文件路径（不存在时创建）
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"归档 {path} 的版本 ({version}) 高于本程序支持的版本 ({SCHEMA_VERSION})")
+        if version < SCHEMA_VERSION:
+            # 旧版汇总表缺少的列无法补算，升级时删除后按明细重建
+            self._conn.execute('DROP TABLE IF EXISTS rollups')
+        self._conn.executescript(SCHEMA)
+        if version < SCHEMA_VERSION:
+            with self._conn:
+                # 旧版归档补建汇总（只在升级时做一次）
+                for (import_id,) in self._conn.execute(
+                        'SELECT id FROM imports WHERE id NOT IN (SELECT import_id FROM rollups)').fetchall():
+                    self._conn.execute(ROLLUP_SQL, (import_id,))
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def find_import(self, file_hash: str) -> Optional[int]:
+        row = self._conn.execute('SELECT id FROM imports WHERE file_hash = ?', (file_hash,)).fetchone()
+        return row[0] if row else None
+
+    def import_month(self, source_path: str, records: List[Dict], statistics: List[Dict],
+                     replace_source: bool = True) -> Tuple[int, bool]:
+        """
+        导入一份签到表的记录和计算结果（同一文件重复导入不产生重复数据）
+
+        Args:
+            source_path: 原始签到表路径（用于计算内容摘要）
+            records: 标准记录列表（date、name、company、start_time、end_time、description）
+            statistics: 与 records 一一对应的考勤计算结果
+            replace_source: 同一路径的文件内容变化（如修正后重新导出）时替换旧的导入；
+                            只替换同一路径且月份相同的导入，其他目录（如其他现场）的同名文件不受影响
+
+        Returns:
+            tuple: (导入编号, 是否新写入)；内容相同的文件已导入过时返回已有编号和 False
+        """
+        if len(records) != len(statistics):
+            raise ValueError(f"记录数 ({len(records)}) 与计算结果数 ({len(statistics)}) 不一致")
+
+        file_hash = file_digest(source_path)
+        existing = self.find_import(file_hash)
+        if existing is not None:
+            return existing, False
+
+        source = os.path.abspath(source_path)
+        months = sorted({rec['date'].strftime('%Y-%m') for rec in records})
+        with self._conn:
+            if replace_source and months:
+                self._conn.execute(
+                    'DELETE FROM imports WHERE source = ? AND id IN '
+                    f'(SELECT import_id FROM rollups WHERE month IN ({", ".join("?" * len(months))}))',
+                    [source] + months
+                )
+            cursor = self._conn.execute(
+                'INSERT INTO imports (file_hash, source, imported_at, record_count) VALUES (?, ?, ?, ?)',
+                (file_hash, source, datetime.now().isoformat(timespec='seconds'), len(records))
+            )
+            import_id = cursor.lastrowid
+            self._conn.executemany(
+                'INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((import_id, seq, rec['company'], rec['name'], rec['date'].date().isoformat(),
+                  rec['start_time'], rec['end_time'], rec['description'])
+                 for seq, rec in enumerate(records))
+            )
+            self._conn.executemany(
+                'INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((import_id, seq, rec['company'], rec['name'], rec['date'].date().isoformat(),
+                  stat['start_time_formatted'], stat['end_time_formatted'], stat['shift_type'],
+                  stat['total_hours'], stat['effective_hours'], stat['night_allowance'],
+                  int(bool(stat['is_night_shift'])))
+                 for seq, (rec, stat) in enumerate(zip(records, statistics)))
+            )
+            # 只汇总本次导入的数据；被替换的旧导入的汇总随之级联删除
+            self._conn.execute(ROLLUP_SQL, (import_id,))
+        return import_id, True
+
+    def months(self) -> List[Tuple[int, int]]:
+        """归档中有数据的月份 [(年, 月), ...]"""
+        rows = self._conn.execute('SELECT DISTINCT substr(date, 1, 7) FROM records ORDER BY 1')
+        return [(int(value[:4]), int(value[5:7])) for (value,) in rows]
+
+    def sources(self, year: int, month: int) -> List[str]:
+        """某月有记录的签到表路径（各现场分别导入时有多份）"""
+        first, following = month_bounds(year, month)
+        rows = self._conn.execute(
+            'SELECT source FROM imports WHERE id IN '
+            '(SELECT import_id FROM records WHERE date >= ? AND date < ?) ORDER BY source',
+            (first, following)
+        )
+        return [source for (source,) in rows]
+
+    def companies(self, year: int, month: int, source: Optional[str] = None) -> List[str]:
+        """某月有记录的公司（给出 source 时只看该签到表的导入）"""
+        first, following = month_bounds(year, month)
+        sql = 'SELECT DISTINCT company FROM records WHERE date >= ? AND date < ?'
+        params = [first, following]
+        if source is not None:
+            sql += _SOURCE_FILTER.format('')
+            params.append(source)
+        rows = self._conn.execute(sql + ' ORDER BY company', params)
+        return [company for (company,) in rows]
+
+    def load_records(self, company: str, year: int, month: int, source: Optional[str] = None) -> List[Dict]:
+        """
+        某公司某月的标准记录，顺序与原始签到表一致（可直接作为 ExcelReportGenerator.raw_data）
+
+        给出 source（签到表绝对路径）时只取该签到表的导入，否则为全部现场的合计
+        """
+        first, following = month_bounds(year, month)
+        sql = ('SELECT date, employee, company, start_time, end_time, description FROM records '
+               'WHERE company = ? AND date >= ? AND date < ?')
+        params = [company, first, following]
+        if source is not None:
+            sql += _SOURCE_FILTER.format('')
+            params.append(source)
+        rows = self._conn.execute(sql + ' ORDER BY import_id, seq', params)
+        return [
+            {
+                'date': datetime.strptime(day, '%Y-%m-%d'),
+                'name': employee,
+                'company': company_name,
+                'start_time': start_time,
+                'end_time': end_time,
+                'description': description,
+            }
+            for day, employee, company_name, start_time, end_time, description in rows
+        ]
+
+    def load_statistics(self, company: str, year: int, month: int, source: Optional[str] = None) -> List[Dict]:
+        """
+        某公司某月的考勤计算结果，字段与流水线输出一致（可直接交给考勤统计报表）；source 同 load_records
+        """
+        first, following = month_bounds(year, month)
+        return self.load_statistics_between(company, first, following, source)
+
+    def load_statistics_between(self, company: str, first: str, following: str,
+                                source: Optional[str] = None) -> List[Dict]:
+        """某公司在日期范围 [first, following)（ISO 字符串）内的考勤计算结果"""
+        sql = ('SELECT r.employee, r.company, r.date, c.start_time, c.end_time, '
+               'r.start_time_formatted, r.end_time_formatted, r.shift_type, r.total_hours, '
+               'r.effective_hours, r.night_allowance, r.is_night_shift '
+               'FROM results r JOIN records c ON c.import_id = r.import_id AND c.seq = r.seq '
+               'WHERE r.company = ? AND r.date >= ? AND r.date < ?')
+        params = [company, first, following]
+        if source is not None:
+            sql += _SOURCE_FILTER.format('r.')
+            params.append(source)
+        rows = self._conn.execute(sql + ' ORDER BY r.import_id, r.seq', params)
+        statistics = []
+        for (employee, company_name, day, start_time, end_time, start_formatted, end_formatted,
+             shift_type, total_hours, effective_hours, night_allowance, is_night_shift) in rows:
+            statistics.append({
+                'name': employee,
+                'company': company_name,
+                'date': '',
+                'start_time': start_time,
+                'end_time': end_time,
+                'start_time_formatted': start_formatted,
+                'end_time_formatted': end_formatted,
+                'shift_type': shift_type,
+                'total_hours': total_hours,
+                'effective_hours': effective_hours,
+                'night_allowance': night_allowance,
+                'is_night_shift': bool(is_night_shift),
+                'year': int(day[:4]),
+                'month': int(day[5:7]),
+                'day': int(day[8:10]),
+            })
+        return statistics
+
+    def monthly_rollups(self, start_month: str, end_month: str, companies: Optional[List[str]] = None) -> List[Dict]:
+        """
+        按员工的月度汇总（只读汇总表，不扫描明细）
+
+        Args:
+            start_month / end_month: 月份范围（含两端，'YYYY-MM'）
+            companies: 只取这些公司（为空表示全部）
+
+        Returns:
+            list: [{company, employee, month, attendance_days, total_hours, night_allowance_count,
+                    night_allowance}, ...]，同一公司内员工按首次出现顺序排列
+        """
+        sql = ('SELECT company, employee, month, import_id, first_seq, day_mask, '
+               'total_hours, night_allowance_count, night_allowance '
+               'FROM rollups WHERE month >= ? AND month <= ?')
+        params = [start_month, end_month]
+        if companies:
+            sql += f" AND company IN ({', '.join('?' * len(companies))})"
+            params.extend(companies)
+
+        # 同一员工同一月可能来自多份导入（多个现场）：工时、补贴相加，出勤日按位或后计数，同一天只算一次
+        first_seen = {}
+        totals = {}
+        for (company, employee, month, import_id, first_seq, day_mask, total_hours,
+             night_allowance_count, night_allowance) in self._conn.execute(sql, params):
+            key = (company, employee)
+            order = (month, import_id, first_seq)
+            first_seen[key] = min(first_seen.get(key, order), order)
+            total = totals.setdefault((company, employee, month), [0, 0.0, 0, 0.0])
+            total[0] |= day_mask
+            total[1] += total_hours
+            total[2] += night_allowance_count
+            total[3] += night_allowance
+
+        rows = [
+            {
+                'company': company,
+                'employee': employee,
+                'month': month,
+                'attendance_days': bin(day_mask).count('1'),
+                'total_hours': total_hours,
+                'night_allowance_count': night_allowance_count,
+                'night_allowance': night_allowance,
+            }
+            for (company, employee, month), (day_mask, total_hours, night_allowance_count, night_allowance)
+            in totals.items()
+        ]
+        rows.sort(key=lambda row: (row['company'], first_seen[(row['company'], row['employee'])], row['month']))
+        return rows
+
+    def employee_totals(self, employee: str, start_date: Optional[date] = None,
+                        end_date: Optional[date] = None) -> List[Dict]:
+        """
+        某员工在日期范围内（含两端）按公司、月份汇总的工时
+
+        Returns:
+            list: [{company, month ('YYYY-MM'), shifts, effective_hours, night_allowance}, ...]
+        """
+        sql = ('SELECT company, substr(date, 1, 7), COUNT(*), SUM(effective_hours), SUM(night_allowance) '
+               'FROM results WHERE employee = ?')
+        params = [employee]
+        if start_date is not None:
+            sql += ' AND date >= ?'
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            sql += ' AND date <= ?'
+            params.append(end_date.isoformat())
+        sql += " AND shift_type != '无效' GROUP BY company, substr(date, 1, 7) ORDER BY 2, 1"
+        return [
+            {
+                'company': company,
+                'month': month,
+                'shifts': shifts,
+                'effective_hours': round(effective_hours or 0, 2),
+                'night_allowance': night_allowance or 0,
+            }
+            for company, month, shifts, effective_hours, night_allowance in self._conn.execute(sql, params)
+        ]
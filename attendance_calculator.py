@@ -6,16 +6,37 @@
 
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 import pandas as pd
+from attendance_rules import CompiledRules, ShiftOutcomeTable
 
 class AttendanceCalculator:
     """考勤统计计算器"""
     
-    def __init__(self):
-        # 夜班补贴标准（元/人/日）
-        self.night_allowance_rate = 10.0
-        # 夜班补贴最低工时要求（小时）
-        self.night_allowance_min_hours = 11.5
+    def __init__(self, rules: Optional[CompiledRules] = None, use_lookup_table: bool = False,
+                 table_cache_dir: Optional[str] = None):
+        """
+        Args:
+            rules: 编译后的考勤规则，默认使用内置规则
+            use_lookup_table: 是否使用按分钟预计算的结果表（适合大批量历史数据）
+            table_cache_dir: 结果表磁盘缓存目录（仅在 use_lookup_table 时生效）
+        """
+        # 编译后的考勤规则（夜班判定、扣减、补贴标准）
+        self.rules = rules if rules is not None else CompiledRules()
+        # 预计算结果表（整分钟时间直接查表）
+        self.lookup_table = (
+            ShiftOutcomeTable.load_or_build(self.rules, table_cache_dir) if use_lookup_table else None
+        )
+    
+    @property
+    def night_allowance_rate(self) -> float:
+        """夜班补贴标准（元/人/日）"""
+        return self.rules.night_allowance_rate
+    
+    @property
+    def night_allowance_min_hours(self) -> float:
+        """夜班补贴最低工时要求（小时）"""
+        return self.rules.night_allowance_min_hours
         
     def parse_time_string(self, time_str: str) -> Optional[float]:
         """
@@ -60,13 +81,9 @@ class AttendanceCalculator:
         """
         判断是否为夜班
         
-        夜班判定标准：
+        夜班判定标准（默认规则，分界时刻可按公司配置）：
         - 上工时间在 20:00 或之后 (start_time >= 20.0)
-        - 或者跨天且上工时间在凌晨 (end_time < start_time and start_time < 20.0)
-        
-        简化规则：
-        - 20:00 及以后上工 → 夜班
-        - 其他 → 白班
+        - 或者跨天且上工时间在凌晨 (end_time < start_time and start_time < 8.0)
         
         Args:
             start_time: 上工时间（小时）
@@ -78,15 +95,7 @@ class AttendanceCalculator:
         if start_time is None or end_time is None:
             return False
         
-        # 上工时间 >= 20:00 即为夜班
-        if start_time >= 20.0:
-            return True
-        
-        # 跨天且上工在夜间时段（如凌晨上工）
-        if end_time < start_time and start_time < 8.0:
-            return True
-        
-        return False
+        return self.rules.is_night(start_time, end_time)
     
     def calculate_total_hours(self, start_time: float, end_time: float) -> float:
         """
@@ -113,7 +122,7 @@ class AttendanceCalculator:
         """
         计算白班有效工时
         
-        扣减逻辑（按优先级顺序判断）：
+        扣减逻辑（默认规则，按优先级顺序判断；已编译为区间查找表）：
         1. 上工 > 17:00 → 不扣
         2. 下工 ≤ 11:00 → 不扣
         3. 上工 > 11:00 且 ≤ 17:00 → 扣0.5h
@@ -132,32 +141,16 @@ class AttendanceCalculator:
             return 0.0
         
         total_hours = self.calculate_total_hours(start_time, end_time)
-        
-        # 按优先级顺序判断扣减规则
-        if start_time > 17.0:
-            # 上工 > 17:00 → 不扣
-            return total_hours
-        elif end_time <= 11.0:
-            # 下工 ≤ 11:00 → 不扣
-            return total_hours
-        elif 11.0 < start_time <= 17.0:
-            # 上工 > 11:00 且 ≤ 17:00 → 扣0.5h
-            return max(0.0, total_hours - 0.5)
-        elif end_time <= 17.0 and start_time <= 11.0:
-            # 下工 ≤ 17:00 且 上工 ≤ 11:00 → 扣0.5h
-            return max(0.0, total_hours - 0.5)
-        elif start_time <= 11.0 and end_time >= 17.0:
-            # 上工 ≤ 11:00 且 下工 ≥ 17:00 → 扣1h（默认情况）
-            return max(0.0, total_hours - 1.0)
-        else:
-            # 其他情况按总时长计算（无扣减）
+        deduction = self.rules.day_deduction(start_time, end_time)
+        if deduction == 0.0:
             return total_hours
+        return max(0.0, total_hours - deduction)
     
     def calculate_night_shift_hours(self, start_time: float, end_time: float) -> float:
         """
         计算夜班有效工时
         
-        所有夜班统一扣除 0.5 小时休息时间
+        所有夜班统一扣除休息时间（默认 0.5 小时）
         
         Args:
             start_time: 上工时间（小时）
@@ -170,7 +163,7 @@ class AttendanceCalculator:
             return 0.0
         
         total_hours = self.calculate_total_hours(start_time, end_time)
-        return max(0.0, total_hours - 0.5)
+        return max(0.0, total_hours - self.rules.night_deduction)
     
     def calculate_working_hours(self, start_time_str: str, end_time_str: str) -> Dict:
         """
@@ -183,6 +176,20 @@ class AttendanceCalculator:
         Returns:
             dict: 包含班次类型、总时长、有效工时等信息
         """
+        if self.lookup_table is not None:
+            start_minute = self.lookup_table.minute_of(start_time_str)
+            end_minute = self.lookup_table.minute_of(end_time_str)
+            if start_minute is not None and end_minute is not None:
+                total_hours, effective_hours, is_night, _ = self.lookup_table.lookup(start_minute, end_minute)
+                return {
+                    'shift_type': '夜班' if is_night else '白班',
+                    'total_hours': total_hours,
+                    'effective_hours': effective_hours,
+                    'is_night_shift': is_night,
+                    'start_time': self.lookup_table.minute_hours[start_minute],
+                    'end_time': self.lookup_table.minute_hours[end_minute]
+                }
+        
         start_time = self.parse_time_string(start_time_str)
         end_time = self.parse_time_string(end_time_str)
         
@@ -288,6 +295,121 @@ class AttendanceCalculator:
             'night_allowance': night_allowance,
             'is_night_shift': work_info['is_night_shift']
         }
+    
+    def process_attendance_records(self, records: List[Dict]) -> List[Dict]:
+        """
+        批量处理考勤记录
+        
+        时间解析逐条进行，班次判定、扣减和补贴计算按数组一次完成，
+        结果与逐条调用 process_attendance_record 一致
+        
+        Args:
+            records: 考勤记录列表（字段同 process_attendance_record）
+            
+        Returns:
+            list: 处理后的考勤统计信息列表
+        """
+        start_strs = [record.get('上工时间', '') for record in records]
+        end_strs = [record.get('下工时间', '') for record in records]
+        
+        if self.lookup_table is not None:
+            return self._process_records_with_table(records, start_strs, end_strs)
+        
+        parse_cache = {}
+        
+        def parse(value):
+            if value is None or value == '':
+                return None
+            if isinstance(value, str):
+                if value not in parse_cache:
+                    parse_cache[value] = self.parse_time_string(value)
+                return parse_cache[value]
+            return self.parse_time_string(value)
+        
+        start_times = [parse(value) for value in start_strs]
+        end_times = [parse(value) for value in end_strs]
+        
+        results = self.rules.evaluate_arrays(
+            np.array([np.nan if t is None else t for t in start_times], dtype=float),
+            np.array([np.nan if t is None else t for t in end_times], dtype=float)
+        )
+        
+        total_hours = results['total_hours'].tolist()
+        effective_hours = results['effective_hours'].tolist()
+        night_flags = results['is_night_shift'].tolist()
+        allowances = results['night_allowance'].tolist()
+        valid_flags = results['valid'].tolist()
+        
+        processed = []
+        for i, record in enumerate(records):
+            if valid_flags[i]:
+                shift_type = '夜班' if night_flags[i] else '白班'
+                start_time, end_time = start_times[i], end_times[i]
+            else:
+                shift_type = '无效'
+                start_time = end_time = None
+            
+            processed.append({
+                'name': record.get('姓名', ''),
+                'company': record.get('劳务公司', ''),
+                'date': record.get('日期', ''),
+                'start_time': start_strs[i],
+                'end_time': end_strs[i],
+                'start_time_formatted': self.format_time(start_time),
+                'end_time_formatted': self.format_time(end_time),
+                'shift_type': shift_type,
+                'total_hours': round(total_hours[i], 2),
+                'effective_hours': round(effective_hours[i], 2),
+                'night_allowance': allowances[i],
+                'is_night_shift': night_flags[i]
+            })
+        
+        return processed
+    
+    def _process_records_with_table(self, records: List[Dict], start_strs: List, end_strs: List) -> List[Dict]:
+        """使用预计算结果表批量处理（非整分钟时间回退到逐条计算）"""
+        table = self.lookup_table
+        start_minutes = [table.minute_of(value) for value in start_strs]
+        end_minutes = [table.minute_of(value) for value in end_strs]
+        
+        hits = [i for i in range(len(records))
+                if start_minutes[i] is not None and end_minutes[i] is not None]
+        results = table.lookup_arrays(
+            [start_minutes[i] for i in hits],
+            [end_minutes[i] for i in hits]
+        )
+        
+        # 每分钟的格式化时间只计算一次
+        formatted = {}
+        
+        def format_minute(minute):
+            if minute not in formatted:
+                formatted[minute] = self.format_time(table.minute_hours[minute])
+            return formatted[minute]
+        
+        processed = [None] * len(records)
+        for k, i in enumerate(hits):
+            is_night = results['is_night_shift'][k]
+            processed[i] = {
+                'name': records[i].get('姓名', ''),
+                'company': records[i].get('劳务公司', ''),
+                'date': records[i].get('日期', ''),
+                'start_time': start_strs[i],
+                'end_time': end_strs[i],
+                'start_time_formatted': format_minute(start_minutes[i]),
+                'end_time_formatted': format_minute(end_minutes[i]),
+                'shift_type': '夜班' if is_night else '白班',
+                'total_hours': results['total_hours'][k],
+                'effective_hours': results['effective_hours'][k],
+                'night_allowance': results['night_allowance'][k],
+                'is_night_shift': is_night
+            }
+        
+        for i, record in enumerate(records):
+            if processed[i] is None:
+                processed[i] = self.process_attendance_record(record)
+        
+        return processed
 
 # 测试代码
 if __name__ == "__main__":
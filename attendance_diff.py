@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+签到差异 - 比较同一个月的两份签到表（或签到表与归档中的数据），列出新增、删除、修改的签到和每人工时、补贴的变化
+
+每条签到按 (日期, 姓名, 公司, 上工, 下工) 计算摘要（record_digest），两边按摘要配对，
+未配对的签到再按 (日期, 姓名, 公司) 配成"修改"，整体与记录数成线性。
+
+    python attendance_diff.py 6月劳务签到表-修订.xls 6月劳务签到表.xls -o output
+    python attendance_diff.py 6月劳务签到表-修订.xls --archive attendance_archive.sqlite3 -o output
+
+与归档比较时只取同一份签到表的导入（其他现场同月份的签到不计入），见 archived_source。
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from attendance_archive import AttendanceArchive
+from attendance_pipeline import AttendancePipeline
+from attendance_rules import DEFAULT_RULES_FILENAME, load_rule_book
+from excel_report_generator_fixed import ExcelReportGenerator, record_digest
+from report_templates import (
+    CENTER_ALIGN, THIN_BORDER, STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT,
+    STATS_NIGHT_FILL
+)
+from run_attendance_stats import paired_results
+
+# 变更类型
+ADDED = 'added'
+REMOVED = 'removed'
+MODIFIED = 'modified'
+
+CHANGE_NAMES = {
+    ADDED: '新增',
+    REMOVED: '删除',
+    MODIFIED: '修改',
+}
+
+CHANGE_HEADERS = ['类型', '姓名', '劳务公司', '日期', '原上工', '原下工', '新上工', '新下工',
+                  '原工时', '新工时', '工时变化', '原补贴', '新补贴', '补贴变化']
+EMPLOYEE_HEADERS = ['姓名', '劳务公司', '新增', '删除', '修改',
+                    '原工时', '新工时', '工时变化', '原补贴', '新补贴', '补贴变化']
+
+
+class SignInChange:
+    """一条签到变更（old / new 为 (标准记录, 计算结果)，新增时 old 为 None，删除时 new 为 None）"""
+
+    __slots__ = ('kind', 'old', 'new')
+
+    def __init__(self, kind: str, old: Optional[tuple], new: Optional[tuple]):
+        self.kind = kind
+        self.old = old
+        self.new = new
+
+    @property
+    def record(self) -> Dict:
+        return (self.new or self.old)[0]
+
+    def row(self) -> list:
+        record = self.record
+        old_record, old_stat = self.old or (None, None)
+        new_record, new_stat = self.new or (None, None)
+        old_hours = old_stat['effective_hours'] if old_stat else 0.0
+        new_hours = new_stat['effective_hours'] if new_stat else 0.0
+        old_allowance = old_stat['night_allowance'] if old_stat else 0.0
+        new_allowance = new_stat['night_allowance'] if new_stat else 0.0
+        return [
+            CHANGE_NAMES[self.kind], record['name'], record['company'], record['date'].strftime('%Y-%m-%d'),
+            (old_record['start_time'] or '') if old_record else '', (old_record['end_time'] or '') if old_record else '',
+            (new_record['start_time'] or '') if new_record else '', (new_record['end_time'] or '') if new_record else '',
+            round(old_hours, 1), round(new_hours, 1), round(new_hours - old_hours, 1),
+            round(old_allowance, 1), round(new_allowance, 1), round(new_allowance - old_allowance, 1),
+        ]
+
+
+class AttendanceDiff:
+    """
+    两份数据的差异
+
+    - changes: SignInChange 列表，按公司、日期排列
+    - employees: 有变更的员工 [(姓名, 公司, 新增, 删除, 修改, 原工时, 新工时, 工时变化, 原补贴, 新补贴, 补贴变化), ...]
+    - unchanged: 两边相同的签到数
+    """
+
+    def __init__(self, changes: List[SignInChange], employees: List[tuple], unchanged: int):
+        self.changes = changes
+        self.employees = employees
+        self.unchanged = unchanged
+
+    def count(self, kind: str) -> int:
+        return sum(1 for change in self.changes if change.kind == kind)
+
+
+def _slot(record: Dict) -> tuple:
+    """同一员工同一天的签到位置（上工、下工不同的签到在此配成"修改"）"""
+    return record['date'], record['name'], record['company']
+
+
+def diff_results(old_records: List[Dict], old_statistics: List[Dict],
+                 new_records: List[Dict], new_statistics: List[Dict]) -> AttendanceDiff:
+    """
+    比较两份记录及其计算结果
+
+    相同摘要的签到两边各出现几次就配对几次（重复签到不会互相抵消）；
+    未配对的签到按 (日期, 姓名, 公司) 依次配成修改，余下的为新增或删除。
+
+    Args:
+        old_records / old_statistics: 原数据的标准记录和一一对应的计算结果
+        new_records / new_statistics: 新数据的标准记录和计算结果
+
+    Returns:
+        AttendanceDiff
+    """
+    pool = {}
+    for index, record in enumerate(old_records):
+        pool.setdefault(record_digest(record), deque()).append(index)
+
+    matched = [False] * len(old_records)
+    unmatched_new = []
+    for index, record in enumerate(new_records):
+        candidates = pool.get(record_digest(record))
+        if candidates:
+            matched[candidates.popleft()] = True
+        else:
+            unmatched_new.append(index)
+
+    removed_by_slot = {}
+    for index, record in enumerate(old_records):
+        if not matched[index]:
+            removed_by_slot.setdefault(_slot(record), deque()).append(index)
+
+    changes = []
+    for index in unmatched_new:
+        new = (new_records[index], new_statistics[index])
+        candidates = removed_by_slot.get(_slot(new_records[index]))
+        if candidates:
+            old_index = candidates.popleft()
+            changes.append(SignInChange(MODIFIED, (old_records[old_index], old_statistics[old_index]), new))
+        else:
+            changes.append(SignInChange(ADDED, None, new))
+    for candidates in removed_by_slot.values():
+        for old_index in candidates:
+            changes.append(SignInChange(REMOVED, (old_records[old_index], old_statistics[old_index]), None))
+    changes.sort(key=lambda change: (change.record['company'], change.record['date']))
+
+    # 有变更的员工：变更计数 + 两边的工时、补贴合计
+    counts = {}
+    for change in changes:
+        key = (change.record['name'], change.record['company'])
+        counts.setdefault(key, {ADDED: 0, REMOVED: 0, MODIFIED: 0})[change.kind] += 1
+    totals = {key: [0.0, 0.0, 0.0, 0.0] for key in counts}
+    for offset, statistics in ((0, old_statistics), (1, new_statistics)):
+        for stat in statistics:
+            total = totals.get((stat['name'], stat['company']))
+            if total is not None:
+                total[offset] += stat['effective_hours']
+                total[offset + 2] += stat['night_allowance']
+
+    employees = []
+    for (name, company), kinds in counts.items():
+        old_hours, new_hours, old_allowance, new_allowance = totals[(name, company)]
+        employees.append((
+            name, company, kinds[ADDED], kinds[REMOVED], kinds[MODIFIED],
+            round(old_hours, 1), round(new_hours, 1), round(new_hours - old_hours, 1),
+            round(old_allowance, 1), round(new_allowance, 1), round(new_allowance - old_allowance, 1),
+        ))
+    employees.sort(key=lambda row: row[1])
+
+    return AttendanceDiff(changes, employees, sum(matched))
+
+
+def load_workbook_results(input_file: str, rules_file: Optional[str] = None) -> Tuple[List[Dict], List[Dict], ExcelReportGenerator]:
+    """
+    解析并计算一份签到表
+
+    Returns:
+        tuple: (标准记录, 一一对应的计算结果, 生成器)；出错信息见 generator.errors
+    """
+    if rules_file is None:
+        rules_file = os.path.join(os.path.dirname(os.path.abspath(input_file)), DEFAULT_RULES_FILENAME)
+    generator = ExcelReportGenerator()
+    company_statistics = AttendancePipeline(generator, load_rule_book(rules_file)).run(input_file)
+    records, statistics = paired_results(generator, company_statistics)
+    return records, statistics, generator
+
+
+def archived_source(archive_path: str, months: List[Tuple[int, int]], new_file: str,
+                    source: Optional[str] = None) -> str:
+    """
+    确定要与新签到表比较的归档导入（签到表路径）
+
+    依次为：给出的 source；与新签到表同路径的导入（原地修正后重新导出）；
+    这些月份只有一份签到表时的该签到表。
+
+    Raises:
+        ValueError: 找不到或无法唯一确定时
+    """
+    with AttendanceArchive(archive_path) as archive:
+        sources = sorted({path for year, month in months for path in archive.sources(year, month)})
+    if source is not None:
+        source = os.path.abspath(source)
+        if source not in sources:
+            raise ValueError(f"归档中没有 {source} 在这些月份的导入")
+        return source
+    new_source = os.path.abspath(new_file)
+    if new_source in sources:
+        return new_source
+    if len(sources) == 1:
+        return sources[0]
+    if not sources:
+        raise ValueError("归档中没有这些月份的数据")
+    raise ValueError("归档中这些月份有多份签到表，请用 --source 指定要比较的一份:\n"
+                     + '\n'.join(f"  {path}" for path in sources))
+
+
+def load_archive_results(archive_path: str, months: List[Tuple[int, int]],
+                         source: str) -> Tuple[List[Dict], List[Dict]]:
+    """归档中某份签到表（source）这些月份的标准记录和计算结果（即原签到表解析、计算后的结果）"""
+    records, statistics = [], []
+    with AttendanceArchive(archive_path) as archive:
+        for year, month in months:
+            for company in archive.companies(year, month, source):
+                records.extend(archive.load_records(company, year, month, source))
+                statistics.extend(archive.load_statistics(company, year, month, source))
+    return records, statistics
+
+
+def _write_sheet(ws, title: str, headers: List[str], rows: List[list], delta_columns: Tuple[int, ...]):
+    """标题 + 表头 + 数据行；变化不为 0 的列用夜班底色标出"""
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
+    cell = ws.cell(row=1, column=1, value=title)
+    cell.font = STATS_TITLE_FONT
+    cell.alignment = CENTER_ALIGN
+
+    for col, text in enumerate(headers, 1):
+        cell = ws.cell(row=2, column=col, value=text)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+        ws.column_dimensions[get_column_letter(col)].width = 12 if col in (2, 3, 4) else 9
+
+    for row_idx, values in enumerate(rows, 3):
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+            if col in delta_columns and value:
+                cell.fill = STATS_NIGHT_FILL
+
+    ws.freeze_panes = 'A3'
+    if rows:
+        ws.auto_filter.ref = f"A2:{get_column_letter(len(headers))}{len(rows) + 2}"
+
+
+def write_diff_report(diff: AttendanceDiff, title: str, output_file: str) -> str:
+    """写出差异工作簿：员工差异、变更明细两个工作表"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '员工差异'
+    _write_sheet(ws, f"{title} 员工差异", EMPLOYEE_HEADERS, [list(row) for row in diff.employees], (8, 11))
+    _write_sheet(wb.create_sheet('变更明细'), f"{title} 变更明细", CHANGE_HEADERS,
+                 [change.row() for change in diff.changes], (11, 14))
+    wb.save(output_file)
+    return output_file
+
+
+def generate_diff_report(new_file: str, output_dir: str, old_file: Optional[str] = None,
+                         archive: Optional[str] = None, rules_file: Optional[str] = None,
+                         archive_source: Optional[str] = None) -> Optional[str]:
+    """
+    比较新签到表与原签到表（old_file）或归档（archive，取新签到表涉及的月份），写出差异工作簿
+
+    Args:
+        archive_source: 与归档比较时要比较的签到表路径（默认见 archived_source）
+
+    Returns:
+        str: 差异工作簿路径；新签到表没有数据或无法确定归档中的原签到表时为 None
+    """
+    print(f"📄 新签到表: {os.path.basename(new_file)}")
+    new_records, new_statistics, generator = load_workbook_results(new_file, rules_file)
+    if not new_records:
+        print("❌ 新签到表没有读取到有效数据")
+        return None
+    months = sorted({(record['date'].year, record['date'].month) for record in new_records})
+
+    if old_file is not None:
+        print(f"📄 原签到表: {os.path.basename(old_file)}")
+        old_records, old_statistics, old_generator = load_workbook_results(old_file, rules_file)
+        errors = [generator.errors, old_generator.errors]
+    else:
+        try:
+            source = archived_source(archive, months, new_file, archive_source)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return None
+        print(f"🗄 归档: {archive}（{', '.join(f'{year}-{month:02d}' for year, month in months)}，{source}）")
+        old_records, old_statistics = load_archive_results(archive, months, source)
+        errors = [generator.errors]
+
+    diff = diff_results(old_records, old_statistics, new_records, new_statistics)
+
+    year, month = months[0]
+    output_file = os.path.join(output_dir, f"attendance_diff-{month:02d}.xlsx")
+    write_diff_report(diff, f"{year}年{month:02d}月", output_file)
+
+    print(f"\n相同 {diff.unchanged}，新增 {diff.count(ADDED)}，删除 {diff.count(REMOVED)}，"
+          f"修改 {diff.count(MODIFIED)}，涉及 {len(diff.employees)} 人")
+    if diff.employees:
+        print(f"工时变化 {sum(row[7] for row in diff.employees):+.1f}，"
+              f"补贴变化 {sum(row[10] for row in diff.employees):+.1f}")
+    print(f"差异报表: {output_file}")
+    for report in errors:
+        if report:
+            print('\n'.join(report.summary_lines()))
+    return output_file
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='比较两份签到表（或签到表与归档），列出签到和工时、补贴的变化')
+    parser.add_argument('new_file', help='新（修订后）的签到表')
+    parser.add_argument('old_file', nargs='?', default=None, help='原签到表（与 --archive 二选一）')
+    parser.add_argument('--archive', default=None, help='与归档中同月份的数据比较')
+    parser.add_argument('--source', default=None,
+                        help='与归档比较时的原签到表路径（默认为与新签到表同路径的导入，或该月唯一的一份）')
+    parser.add_argument('--rules', default=None, help='考勤规则配置文件')
+    parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    args = parser.parse_args()
+
+    if (args.old_file is None) == (args.archive is None):
+        parser.error('需要给出原签到表或 --archive 之一')
+    for path in (args.new_file, args.old_file or args.archive):
+        if not os.path.exists(path):
+            print(f"错误: 文件不存在: {path}")
+            sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+
+    if generate_diff_report(args.new_file, args.output, old_file=args.old_file, archive=args.archive,
+                            rules_file=args.rules, archive_source=args.source) is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
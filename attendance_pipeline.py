@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+考勤流水线 - 工作表读取、记录整理、工时计算、按公司汇总四个阶段并发执行
+
+各阶段之间用有界队列连接：读取下一个工作表的同时整理、计算前面的工作表。
+队列长度只限制在各阶段之间等待处理的工作表数据（DataFrame、整理后的记录）；
+汇总阶段仍把全部记录和计算结果留在内存中（报表需要各公司完整的数据），
+峰值内存随输入的记录数增长。
+"""
+
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, List
+
+from attendance_calculator import AttendanceCalculator
+from error_report import STAGE_COMPANY, STAGE_SHEET
+from excel_report_generator_fixed import record_digest
+
+# 队列结束标记
+_DONE = object()
+
+
+def calculate_company_statistics(calculator: AttendanceCalculator, company_data: List[Dict]) -> List[Dict]:
+    """
+    批量计算一组记录的考勤统计，并附上年月日
+
+    Args:
+        calculator: 该公司的工时计算器
+        company_data: 标准记录列表（read_input_excel / normalize_sheet 的输出）
+
+    Returns:
+        list: 与记录一一对应的统计结果
+    """
+    mapped_recs = [
+        {
+            '姓名': rec.get('name'),
+            '劳务公司': rec.get('company'),
+            '上工时间': rec.get('start_time'),
+            '下工时间': rec.get('end_time')
+        }
+        for rec in company_data
+    ]
+
+    statistics = []
+    for rec, stat in zip(company_data, calculator.process_attendance_records(mapped_recs)):
+        # 添加年月日信息
+        date_obj = rec.get('date')
+        if isinstance(date_obj, datetime):
+            stat.update({
+                'year': date_obj.year,
+                'month': date_obj.month,
+                'day': date_obj.day
+            })
+        else:
+            # 如果不是datetime对象，尝试从字符串解析
+            stat.update({
+                'year': rec.get('year'),
+                'month': rec.get('month'),
+                'day': rec.get('day')
+            })
+
+        statistics.append(stat)
+
+    return statistics
+
+
+class AttendancePipeline:
+    """
+    读取 → 整理 → 计算 → 汇总 的流水线
+
+    每个阶段一个线程，按先进先出处理，记录顺序与顺序读取完全一致。
+    整理后的记录同时写入 generator.raw_data / companies，工时报表可直接复用。
+    单个工作表或工作表中某个公司出错时记录到 generator.errors，跳过该部分继续处理。
+
+    多份签到表（如各现场分别提交的同月签到表）可依次流过同一条流水线，
+    deduplicate 时在整理阶段按摘要去掉其他签到表中已出现过的相同签到。
+
+    用法：
+        pipeline = AttendancePipeline(generator, rule_book)
+        company_statistics = pipeline.run(input_file)
+        company_statistics = AttendancePipeline(generator, rule_book, deduplicate=True).run_many(input_files)
+    """
+
+    def __init__(self, generator, rule_book, use_lookup_table: bool = False, queue_size: int = 4,
+                 record_filter=None, deduplicate: bool = False):
+        """
+        Args:
+            generator: ExcelReportGenerator，提供日期/时间解析并接收整理后的记录
+            rule_book: 按公司的考勤规则（RuleBook）
+            use_lookup_table: 使用按分钟预计算的结果表计算工时
+            queue_size: 各阶段之间队列的长度（以工作表为单位），限制同时在途的工作表数
+            record_filter: 只处理符合条件的记录（RecordFilter），在读取和整理时应用
+            deduplicate: 多份签到表时去掉重复提交的签到（同一签到表内的重复签到保留，
+                         由签到异常检查报告）；去掉的条数见 self.duplicates
+        
+        各签到表中最早的签到日期（决定该签到表的报表月份）见 self.first_dates
+        """
+        self.generator = generator
+        self.record_filter = record_filter
+        self.rule_book = rule_book
+        self.use_lookup_table = use_lookup_table
+        self.queue_size = max(1, queue_size)
+        self.deduplicate = deduplicate
+        self.duplicates = {}        # {签到表路径: 去掉的重复签到数}
+        self.first_dates = {}       # {签到表路径: 最早的签到日期}
+        self._kept = {}             # {摘要: 已保留的条数}
+        self._file_counts = {}      # {摘要: 当前签到表中出现的条数}
+        self._current_file = None
+        self._calculators = {}
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def calculator_for(self, company: str) -> AttendanceCalculator:
+        """每个公司一个计算器（按公司规则）"""
+        calculator = self._calculators.get(company)
+        if calculator is None:
+            calculator = self._calculators[company] = AttendanceCalculator(
+                self.rule_book.for_company(company), use_lookup_table=self.use_lookup_table
+            )
+        return calculator
+
+    def run(self, file_path: str) -> Dict[str, List[Dict]]:
+        """
+        运行流水线
+
+        Args:
+            file_path: 原始签到表路径
+
+        Returns:
+            dict: {公司: 考勤统计列表}，列表顺序与记录读取顺序一致
+        """
+        return self.run_many([file_path])
+
+    def run_many(self, file_paths: List[str]) -> Dict[str, List[Dict]]:
+        """
+        依次读取多份签到表，结果合并（记录顺序为签到表顺序、表内顺序，员工首次出现顺序因此确定）
+
+        Returns:
+            dict: {公司: 考勤统计列表}
+        """
+        sheets = queue.Queue(self.queue_size)
+        records = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        company_statistics = {}
+
+        stages = [
+            threading.Thread(target=self._stage, args=(self._read, None, sheets, file_paths), name='pipeline-read'),
+            threading.Thread(target=self._stage, args=(self._normalize, sheets, records), name='pipeline-normalize'),
+            threading.Thread(target=self._stage, args=(self._calculate, records, results), name='pipeline-calculate'),
+            threading.Thread(target=self._stage, args=(self._aggregate, results, None, company_statistics),
+                             name='pipeline-aggregate'),
+        ]
+        for stage in stages:
+            stage.daemon = True
+            stage.start()
+        for stage in stages:
+            stage.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return company_statistics
+
+    def _stage(self, work, inbox, outbox, *args):
+        """
+        运行一个阶段：从 inbox 逐项取出交给 work 处理，结果放入 outbox
+
+        work 返回 None 表示该项已跳过。出错后记录异常，继续取空 inbox（避免上游阻塞），
+        最后向下游发送结束标记
+        """
+        try:
+            if inbox is None:
+                for item in work(*args):
+                    if self._errors:
+                        break
+                    outbox.put(item)
+            else:
+                while True:
+                    item = inbox.get()
+                    if item is _DONE:
+                        break
+                    if self._errors:
+                        continue
+                    result = work(item, *args)
+                    if result is not None and outbox is not None:
+                        outbox.put(result)
+        except Exception as e:
+            with self._lock:
+                self._errors.append(e)
+            if inbox is not None:
+                while inbox.get() is not _DONE:
+                    pass
+        finally:
+            if outbox is not None:
+                outbox.put(_DONE)
+
+    def _read(self, file_paths):
+        """读取阶段：逐个解析工作表（日期范围外的工作表不读取）；多份签到表时工作表名前加文件名"""
+        for position, file_path in enumerate(file_paths):
+            print(f"正在读取文件: {file_path}")
+            excel_file = self.generator.open_workbook(file_path)
+            if excel_file is None:
+                continue
+
+            for sheet_name in excel_file.sheet_names:
+                work_date = self.generator.sheet_work_date(sheet_name, self.record_filter)
+                if work_date is None:
+                    continue
+
+                label = f"{os.path.basename(file_path)}/{sheet_name}" if len(file_paths) > 1 else sheet_name
+                try:
+                    df, schema = self.generator.read_sheet(excel_file, sheet_name)
+                except Exception as e:
+                    self.generator.errors.add(STAGE_SHEET, label, e, source=file_path)
+                    continue
+                yield (position, file_path), label, work_date, df, schema
+
+    def _normalize(self, item):
+        """
+        整理阶段：数据行 → 标准记录（需要时去掉重复提交的签到）
+
+        读取线程此时可能已打开下一份签到表，错误按随数据传递的签到表路径记录
+        """
+        source, sheet_name, work_date, df, schema = item
+        with self.generator.errors.capture(STAGE_SHEET, sheet_name, source=source[1]):
+            records = self.generator.normalize_sheet(df, work_date, schema, self.record_filter)
+            first_date = self.first_dates.get(source[1])
+            if records and (first_date is None or work_date < first_date):
+                self.first_dates[source[1]] = work_date
+            if self.deduplicate:
+                records = self._drop_duplicates(source, records)
+            return source[1], sheet_name, records
+        return None
+
+    def _drop_duplicates(self, source, records):
+        """
+        去掉此前签到表中已出现过的相同签到
+
+        按摘要计数：某签到在当前签到表中第 k 次出现时，只有已保留的条数少于 k 才保留，
+        因此同一签到表内的重复签到不受影响，多份签到表合并后的条数为各表中的最多条数。
+        只在整理线程中调用，不需要加锁。
+
+        Args:
+            source: (签到表序号, 路径)
+        """
+        if source != self._current_file:
+            self._current_file = source
+            self._file_counts = {}
+        file_path = source[1]
+        kept = []
+        for record in records:
+            digest = record_digest(record)
+            count = self._file_counts[digest] = self._file_counts.get(digest, 0) + 1
+            if count > self._kept.get(digest, 0):
+                self._kept[digest] = count
+                kept.append(record)
+            else:
+                self.duplicates[file_path] = self.duplicates.get(file_path, 0) + 1
+        return kept
+
+    def _calculate(self, item):
+        """计算阶段：按公司规则批量计算一个工作表的记录；出错的公司在该工作表中的记录被跳过"""
+        file_path, sheet_name, sheet_records = item
+        by_company = {}
+        for position, record in enumerate(sheet_records):
+            by_company.setdefault(record['company'], []).append(position)
+
+        statistics = [None] * len(sheet_records)
+        for company, positions in by_company.items():
+            company_data = [sheet_records[position] for position in positions]
+            with self.generator.errors.capture(STAGE_COMPANY, f"{company}（工作表 {sheet_name}）",
+                                               source=file_path):
+                calculated = calculate_company_statistics(self.calculator_for(company), company_data)
+                for position, stat in zip(positions, calculated):
+                    statistics[position] = stat
+
+        if any(stat is None for stat in statistics):
+            kept = [position for position, stat in enumerate(statistics) if stat is not None]
+            sheet_records = [sheet_records[position] for position in kept]
+            statistics = [statistics[position] for position in kept]
+        return sheet_records, statistics
+
+    def _aggregate(self, item, company_statistics):
+        """汇总阶段：记录写入生成器，统计按公司归集"""
+        sheet_records, statistics = item
+        self.generator.raw_data.extend(sheet_records)
+        for record, stat in zip(sheet_records, statistics):
+            self.generator.companies.add(record['company'])
+            company_statistics.setdefault(record['company'], []).append(stat)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+考勤规则配置 - 按劳务公司加载班次判定和扣减规则，并编译为查找表
+"""
+
+import hashlib
+import json
+import os
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# 默认规则配置文件名（放在签到表同目录下即可自动加载）
+DEFAULT_RULES_FILENAME = 'attendance_rules.json'
+
+# 默认规则（与原硬编码规则一致）
+DEFAULT_RULES = {
+    'night_start': 20.0,                # 上工时间 ≥ 该时刻 → 夜班
+    'early_morning_end': 8.0,           # 跨天且上工时间 < 该时刻 → 夜班
+    'lunch_break': 11.0,                # 午餐扣减分界点
+    'lunch_deduction': 0.5,             # 午餐扣减时长（小时）
+    'dinner_break': 17.0,               # 晚餐扣减分界点
+    'dinner_deduction': 0.5,            # 晚餐扣减时长（小时）
+    'night_deduction': 0.5,             # 夜班休息扣减时长（小时）
+    'night_allowance_rate': 10.0,       # 夜班补贴标准（元/人/日）
+    'night_allowance_min_hours': 11.5,  # 夜班补贴最低有效工时（小时）
+    'weekly_hours_limit': 44.0,         # 每周工时上限（小时，按劳动合同），超出部分计为周超时
+}
+
+# 不影响单个班次计算结果的规则项（不计入班次结果表的签名）
+PERIOD_RULE_KEYS = ('weekly_hours_limit',)
+
+
+def parse_minute(value) -> Optional[int]:
+    """
+    将 "HH:MM" 时间字符串转换为当天分钟数
+
+    Returns:
+        int: 0 ~ 1439；不是整分钟的 "HH:MM" 格式时返回 None
+    """
+    if not isinstance(value, str):
+        return None
+    parts = value.strip().split(':')
+    if len(parts) == 2:
+        try:
+            hours, minutes = int(parts[0]), int(parts[1])
+            if 0 <= hours < 24 and 0 <= minutes < 60:
+                return hours * 60 + minutes
+        except ValueError:
+            pass
+    return None
+
+
+def shift_interval(work_date, start_time, end_time) -> Optional[Tuple[int, int]]:
+    """
+    班次的绝对时间区间（自公元元年起的分钟数），下工早于上工时按跨天处理（同 calculate_total_hours）
+
+    Args:
+        work_date: 签到日期（date / datetime）
+        start_time / end_time: "HH:MM" 时间字符串
+
+    Returns:
+        tuple: (上工分钟, 下工分钟)；任一时间缺失或无法解析时返回 None
+    """
+    start_minute = parse_minute(start_time)
+    end_minute = parse_minute(end_time)
+    if start_minute is None or end_minute is None:
+        return None
+    day_start = work_date.toordinal() * 1440
+    if end_minute < start_minute:
+        end_minute += 1440
+    return day_start + start_minute, day_start + end_minute
+
+
+class CompiledRules:
+    """
+    编译后的考勤规则
+
+    白班扣减按上工、下工时间所在区间查表：
+    - 区间分界点为 (午餐分界, 晚餐分界]，采用左开右闭区间
+    - day_deductions[上工区间][下工区间] 即为扣减时长
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        rules = dict(DEFAULT_RULES)
+        if config:
+            unknown = set(config) - set(DEFAULT_RULES)
+            if unknown:
+                raise ValueError(f"未知的规则项: {', '.join(sorted(unknown))}")
+            rules.update(config)
+
+        self.config = {key: float(value) for key, value in rules.items()}
+
+        lunch = self.config['lunch_break']
+        dinner = self.config['dinner_break']
+        if not lunch < dinner:
+            raise ValueError(f"午餐分界点 ({lunch}) 必须早于晚餐分界点 ({dinner})")
+
+        lunch_deduction = self.config['lunch_deduction']
+        dinner_deduction = self.config['dinner_deduction']
+
+        self.night_start = self.config['night_start']
+        self.early_morning_end = self.config['early_morning_end']
+        self.night_deduction = self.config['night_deduction']
+        self.night_allowance_rate = self.config['night_allowance_rate']
+        self.night_allowance_min_hours = self.config['night_allowance_min_hours']
+        self.weekly_hours_limit = self.config['weekly_hours_limit']
+
+        # 区间分界点：[0] ≤ 午餐 < [1] ≤ 晚餐 < [2]
+        self.bounds = (lunch, dinner)
+        # 行：上工区间；列：下工区间
+        self.day_deductions = (
+            (0.0, lunch_deduction, lunch_deduction + dinner_deduction),
+            (0.0, dinner_deduction, dinner_deduction),
+            (0.0, 0.0, 0.0),
+        )
+        self._bounds_array = np.array(self.bounds)
+        self._deduction_array = np.array(self.day_deductions)
+
+    @property
+    def signature(self) -> tuple:
+        """规则签名，用于缓存区分不同规则集（只含影响班次计算结果的规则项）"""
+        return tuple(sorted((key, value) for key, value in self.config.items() if key not in PERIOD_RULE_KEYS))
+
+    def is_night(self, start_time: float, end_time: float) -> bool:
+        """判断是否为夜班"""
+        if start_time >= self.night_start:
+            return True
+        return end_time < start_time and start_time < self.early_morning_end
+
+    def day_deduction(self, start_time: float, end_time: float) -> float:
+        """查表获取白班扣减时长"""
+        return self.day_deductions[bisect_left(self.bounds, start_time)][bisect_left(self.bounds, end_time)]
+
+    def evaluate_arrays(self, start_times, end_times) -> Dict[str, np.ndarray]:
+        """
+        批量计算工时（向量化）
+
+        Args:
+            start_times: 上工时间数组（小时），无效值为 NaN
+            end_times: 下工时间数组（小时），无效值为 NaN
+
+        Returns:
+            dict: total_hours, effective_hours, is_night_shift, night_allowance, valid 数组
+        """
+        start = np.asarray(start_times, dtype=float)
+        end = np.asarray(end_times, dtype=float)
+        valid = ~(np.isnan(start) | np.isnan(end))
+
+        crosses_day = end < start
+        total = np.where(crosses_day, (24.0 - start) + end, end - start)
+
+        night = valid & ((start >= self.night_start) | (crosses_day & (start < self.early_morning_end)))
+
+        start_idx = np.searchsorted(self._bounds_array, np.where(valid, start, 0.0), side='left')
+        end_idx = np.searchsorted(self._bounds_array, np.where(valid, end, 0.0), side='left')
+        deduction = np.where(night, self.night_deduction, self._deduction_array[start_idx, end_idx])
+
+        total = np.where(valid, total, 0.0)
+        effective = np.where(valid, np.maximum(0.0, total - deduction), 0.0)
+
+        allowance = np.where(
+            night & (np.round(effective, 2) >= self.night_allowance_min_hours),
+            self.night_allowance_rate,
+            0.0
+        )
+
+        return {
+            'total_hours': total,
+            'effective_hours': effective,
+            'is_night_shift': night,
+            'night_allowance': allowance,
+            'valid': valid,
+        }
+
+
+class ShiftOutcomeTable:
+    """
+    按分钟预计算的班次结果表
+
+    签到时间精确到分钟，(上工, 下工) 只有 1440 × 1440 种组合。
+    每种规则集只构建一次，之后每条记录只需一次数组下标读取。
+
+    表内容（下标为 [上工分钟, 下工分钟]）：
+    - total: 总工时（0.01 小时为单位，int16）
+    - effective: 有效工时（0.01 小时为单位，int16）
+    - flags: 第0位=夜班，第1位=发放夜班补贴（uint8）
+    """
+
+    MINUTES_PER_DAY = 24 * 60
+    FLAG_NIGHT = 1
+    FLAG_ALLOWANCE = 2
+
+    # 进程内缓存：规则签名 → 结果表
+    _instances = {}
+
+    def __init__(self, rules: CompiledRules, total: np.ndarray, effective: np.ndarray, flags: np.ndarray):
+        self.rules = rules
+        self.total = total
+        self.effective = effective
+        self.flags = flags
+        # 每分钟对应的小时数（与 parse_time_string 解析 "HH:MM" 的结果一致）
+        self.minute_hours = [h + m / 60.0 for h in range(24) for m in range(60)]
+        self._minute_cache = {}
+
+    @classmethod
+    def build(cls, rules: CompiledRules) -> 'ShiftOutcomeTable':
+        """按规则计算全部分钟组合"""
+        n = cls.MINUTES_PER_DAY
+        minute_hours = np.array([h + m / 60.0 for h in range(24) for m in range(60)])
+
+        total = np.empty((n, n), dtype=np.int16)
+        effective = np.empty((n, n), dtype=np.int16)
+        flags = np.empty((n, n), dtype=np.uint8)
+
+        # 分块计算，控制临时数组内存
+        chunk = 240
+        for row in range(0, n, chunk):
+            start = np.repeat(minute_hours[row:row + chunk], n)
+            end = np.tile(minute_hours, min(chunk, n - row))
+            results = rules.evaluate_arrays(start, end)
+            shape = (-1, n)
+            total[row:row + chunk] = np.rint(np.round(results['total_hours'], 2) * 100).reshape(shape)
+            effective[row:row + chunk] = np.rint(np.round(results['effective_hours'], 2) * 100).reshape(shape)
+            flags[row:row + chunk] = (
+                results['is_night_shift'] * cls.FLAG_NIGHT
+                + (results['night_allowance'] > 0) * cls.FLAG_ALLOWANCE
+            ).reshape(shape)
+
+        return cls(rules, total, effective, flags)
+
+    @classmethod
+    def load_or_build(cls, rules: CompiledRules, cache_dir: Optional[str] = None) -> 'ShiftOutcomeTable':
+        """
+        获取规则集对应的结果表（进程内复用，可选磁盘缓存）
+
+        Args:
+            rules: 编译后的规则
+            cache_dir: 磁盘缓存目录；为空时只在进程内缓存
+
+        Returns:
+            ShiftOutcomeTable: 结果表
+        """
+        signature = rules.signature
+        if signature in cls._instances:
+            return cls._instances[signature]
+
+        table = None
+        cache_path = None
+        if cache_dir:
+            digest = hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
+            cache_path = os.path.join(cache_dir, f"shift_table-{digest}.npz")
+            if os.path.exists(cache_path):
+                try:
+                    with np.load(cache_path) as cached:
+                        table = cls(rules, cached['total'], cached['effective'], cached['flags'])
+                except (OSError, KeyError, ValueError):
+                    table = None
+
+        if table is None:
+            table = cls.build(rules)
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez_compressed(cache_path, total=table.total, effective=table.effective, flags=table.flags)
+
+        cls._instances[signature] = table
+        return table
+
+    def minute_of(self, value) -> Optional[int]:
+        """
+        将 "HH:MM" 时间字符串转换为当天分钟数
+
+        Returns:
+            int: 0 ~ 1439；非整分钟的 "HH:MM" 格式返回 None
+        """
+        if not isinstance(value, str):
+            return None
+        minute = self._minute_cache.get(value, -1)
+        if minute != -1:
+            return minute
+
+        minute = parse_minute(value)
+        self._minute_cache[value] = minute
+        return minute
+
+    def lookup(self, start_minute: int, end_minute: int) -> Tuple[float, float, bool, float]:
+        """
+        查询单个分钟组合
+
+        Returns:
+            tuple: (总工时, 有效工时, 是否夜班, 夜班补贴)
+        """
+        flags = int(self.flags[start_minute, end_minute])
+        return (
+            int(self.total[start_minute, end_minute]) / 100,
+            int(self.effective[start_minute, end_minute]) / 100,
+            bool(flags & self.FLAG_NIGHT),
+            self.rules.night_allowance_rate if flags & self.FLAG_ALLOWANCE else 0.0,
+        )
+
+    def lookup_arrays(self, start_minutes, end_minutes) -> Dict[str, list]:
+        """批量查询分钟组合，返回与 lookup 对应的列表"""
+        start_idx = np.asarray(start_minutes, dtype=np.intp)
+        end_idx = np.asarray(end_minutes, dtype=np.intp)
+        flags = self.flags[start_idx, end_idx]
+        rate = self.rules.night_allowance_rate
+        return {
+            'total_hours': (self.total[start_idx, end_idx] / 100).tolist(),
+            'effective_hours': (self.effective[start_idx, end_idx] / 100).tolist(),
+            'is_night_shift': (flags & self.FLAG_NIGHT).astype(bool).tolist(),
+            'night_allowance': np.where(flags & self.FLAG_ALLOWANCE, rate, 0.0).tolist(),
+        }
+
+
+class RuleBook:
+    """按劳务公司组织的规则集合，每个公司的规则只编译一次"""
+
+    def __init__(self, default: Optional[Dict] = None, companies: Optional[Dict[str, Dict]] = None):
+        self.default_config = dict(default or {})
+        self.company_configs = {name: dict(cfg or {}) for name, cfg in (companies or {}).items()}
+        self._compiled = {}
+
+    def for_company(self, company: Optional[str] = None) -> CompiledRules:
+        """获取指定公司的编译规则（未单独配置的公司使用默认规则）"""
+        key = company if company in self.company_configs else None
+        if key not in self._compiled:
+            config = dict(self.default_config)
+            if key is not None:
+                config.update(self.company_configs[key])
+            self._compiled[key] = CompiledRules(config)
+        return self._compiled[key]
+
+
+def load_rule_book(path: Optional[str] = None) -> RuleBook:
+    """
+    从 JSON 配置文件加载规则
+
+    配置格式：
+        {
+            "default": {"night_allowance_rate": 10},
+            "companies": {"公司A": {"night_start": 19, "night_allowance_rate": 15}}
+        }
+
+    Args:
+        path: 配置文件路径；为空或文件不存在时使用默认规则
+
+    Returns:
+        RuleBook: 规则集合
+    """
+    if not path or not os.path.exists(path):
+        return RuleBook()
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    return RuleBook(config.get('default'), config.get('companies'))
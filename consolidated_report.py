@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全部公司汇总 - 把各公司的考勤计算结果合在一起，一次分组汇总得到各公司合计和每天的现场合计
+"""
+
+from typing import Dict, List
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from report_templates import (
+    CENTER_ALIGN, THIN_BORDER, STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT,
+    STATS_ZEBRA_FILL_1, STATS_ZEBRA_FILL_2, WEEKDAY_NAMES
+)
+
+# 汇总工作簿文件名（{} 为两位月份）
+CONSOLIDATED_REPORT_NAME = 'attendance_summary-{}.xlsx'
+
+COMPANY_HEADERS = ['劳务公司', '人数', '出勤次数', '有效工时', '夜班次数', '夜班补贴']
+DAY_TOTAL_HEADERS = ['合计人数', '有效工时', '夜班次数', '夜班补贴']
+
+
+class ConsolidatedSummary:
+    """
+    全部公司汇总
+
+    - companies: [(公司, 人数, 出勤次数, 有效工时, 夜班次数, 夜班补贴), ...] 及 totals 合计行
+    - days: [(日期, {公司: 人数}, 合计人数, 有效工时, 夜班次数, 夜班补贴), ...]
+    """
+
+    def __init__(self, year: int, month: int, company_names: List[str], companies: List[tuple],
+                 totals: tuple, days: List[tuple]):
+        self.year = year
+        self.month = month
+        self.company_names = company_names
+        self.companies = companies
+        self.totals = totals
+        self.days = days
+
+
+def consolidate(company_statistics: Dict[str, List[Dict]]) -> ConsolidatedSummary:
+    """
+    汇总全部公司的考勤计算结果
+
+    所有公司的结果合成一张表后按 (公司, 员工, 日) 做一次分组汇总，
+    公司合计与每日合计都由这张员工-日汇总表得出，不再逐个公司循环明细。
+    出勤次数口径与考勤统计报表一致：同一员工一天内多次签到算一次。
+
+    Args:
+        company_statistics: {公司: 考勤计算结果列表}（流水线输出）
+
+    Returns:
+        ConsolidatedSummary
+    """
+    statistics = [stat for company in sorted(company_statistics) for stat in company_statistics[company]]
+    frame = pd.DataFrame({
+        'company': [stat['company'] for stat in statistics],
+        'name': [stat['name'] for stat in statistics],
+        'year': [stat['year'] for stat in statistics],
+        'month': [stat['month'] for stat in statistics],
+        'day': [stat['day'] for stat in statistics],
+        'hours': [stat['effective_hours'] for stat in statistics],
+        'night': [bool(stat['is_night_shift']) for stat in statistics],
+        'allowance': [stat['night_allowance'] for stat in statistics],
+    })
+    frame['date'] = pd.to_datetime(frame[['year', 'month', 'day']])
+    first_day = frame['date'].min()
+    year, month = first_day.year, first_day.month
+
+    # 唯一一次明细分组：员工-日
+    employee_days = frame.groupby(['company', 'name', 'date'], sort=False).agg(
+        hours=('hours', 'sum'), night=('night', 'sum'), allowance=('allowance', 'sum')
+    ).reset_index()
+
+    by_company = employee_days.groupby('company').agg(
+        headcount=('name', 'nunique'), attendance=('date', 'size'),
+        hours=('hours', 'sum'), night=('night', 'sum'), allowance=('allowance', 'sum')
+    )
+    companies = [
+        (company, int(row.headcount), int(row.attendance), round(float(row.hours), 1),
+         int(row.night), round(float(row.allowance), 1))
+        for company, row in by_company.iterrows()
+    ]
+    totals = (
+        '合计',
+        int(employee_days[['company', 'name']].drop_duplicates().shape[0]),
+        int(len(employee_days)),
+        round(float(employee_days['hours'].sum()), 1),
+        int(employee_days['night'].sum()),
+        round(float(employee_days['allowance'].sum()), 1),
+    )
+
+    per_company_day = employee_days.groupby(['date', 'company']).size().unstack(fill_value=0)
+    by_day = employee_days.groupby('date').agg(
+        headcount=('name', 'size'), hours=('hours', 'sum'), night=('night', 'sum'), allowance=('allowance', 'sum')
+    )
+    company_names = [company for company, *_ in companies]
+    days = []
+    for day, row in by_day.iterrows():
+        counts = per_company_day.loc[day]
+        days.append((
+            day.date(),
+            {company: int(counts.get(company, 0)) for company in company_names},
+            int(row.headcount), round(float(row.hours), 1), int(row.night), round(float(row.allowance), 1),
+        ))
+
+    return ConsolidatedSummary(year, month, company_names, companies, totals, days)
+
+
+def _write_table(ws, title: str, headers: List[str], rows: List[list], total_row=None):
+    """标题 + 表头 + 斑马纹数据行（+ 合计行）"""
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
+    cell = ws.cell(row=1, column=1, value=title)
+    cell.font = STATS_TITLE_FONT
+    cell.alignment = CENTER_ALIGN
+
+    for col, text in enumerate(headers, 1):
+        cell = ws.cell(row=2, column=col, value=text)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+        ws.column_dimensions[get_column_letter(col)].width = max(10, len(str(text)) * 2 + 2)
+
+    for index, values in enumerate(rows, 1):
+        fill = STATS_ZEBRA_FILL_1 if index % 2 else STATS_ZEBRA_FILL_2
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=index + 2, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.fill = fill
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+
+    if total_row is not None:
+        row = len(rows) + 3
+        for col, value in enumerate(total_row, 1):
+            cell = ws.cell(row=row, column=col, value=value)
+            cell.font = STATS_HEADER_FONT
+            cell.fill = STATS_HEADER_FILL
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+    ws.freeze_panes = 'B3'
+
+
+def write_consolidated_report(summary: ConsolidatedSummary, output_file: str) -> str:
+    """写出汇总工作簿：公司汇总、每日合计两个工作表"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '公司汇总'
+    _write_table(ws, f"{summary.year}年{summary.month:02d}月 全部公司考勤汇总", COMPANY_HEADERS,
+                 [list(row) for row in summary.companies], summary.totals)
+
+    day_ws = wb.create_sheet('每日合计')
+    headers = ['日期', '星期'] + [f"{company}人数" for company in summary.company_names] + DAY_TOTAL_HEADERS
+    rows = [
+        [day.strftime('%m-%d'), WEEKDAY_NAMES[day.weekday()]]
+        + [counts[company] for company in summary.company_names] + list(totals)
+        for day, counts, *totals in summary.days
+    ]
+    _write_table(day_ws, f"{summary.year}年{summary.month:02d}月 每日现场合计", headers, rows)
+
+    wb.save(output_file)
+    return output_file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+员工索引 - 生成报表时按月写出 "姓名 → 记录位置" 索引，按员工查询签到和工时时不必重新解析工作簿
+
+每份签到表每个月两份文件（3f2a9c1e 由签到表的完整路径得出，不同现场的同名签到表互不覆盖）：
+    2025-06--6月劳务签到表--3f2a9c1e.jsonl      记录按员工分块连续存放，每行一条 JSON 数组
+    2025-06--6月劳务签到表--3f2a9c1e.idx.json   {姓名: [字节偏移, 字节长度, 条数]}
+查询时只读索引和该员工所在的数据块。
+
+    python employee_index.py 张三 --start-date 2025-05-01 --end-date 2025-06-30 --index-dir output/.employee_index
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from excel_report_generator_fixed import parse_cli_date
+
+# 默认索引目录（位于报表输出目录下）
+EMPLOYEE_INDEX_DIRNAME = '.employee_index'
+
+DATA_SUFFIX = '.jsonl'
+INDEX_SUFFIX = '.idx.json'
+
+# 数据行字段（姓名由所在数据块确定，不重复存放）
+ROW_FIELDS = ('date', 'company', 'start_time', 'end_time', 'shift_type', 'effective_hours',
+              'night_allowance', 'is_night_shift', 'description')
+
+
+def _replace_atomically(path: str, content: bytes):
+    """先写临时文件再改名，查询不会读到写了一半的文件"""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        handle.write(content)
+    os.replace(temp_path, path)
+
+
+def write_employee_index(index_dir: str, source_path: str, records: List[Dict], statistics: List[Dict]) -> List[str]:
+    """
+    写出一份签到表的员工索引（按月分文件；同一路径的签到表重新生成时覆盖）
+
+    Args:
+        index_dir: 索引目录（不存在时创建）
+        source_path: 原始签到表路径（文件名和完整路径用于区分不同签到表）
+        records: 标准记录列表
+        statistics: 与 records 一一对应的考勤计算结果
+
+    Returns:
+        list: 写出的索引文件路径
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    source = os.path.basename(source_path)
+    stem = os.path.splitext(source)[0]
+    path_tag = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()[:8]
+
+    # 按月、按员工分组，员工内保持原始顺序
+    months = {}
+    for rec, stat in zip(records, statistics):
+        day = rec['date']
+        row = [day.strftime('%Y-%m-%d'), rec['company'], rec['start_time'], rec['end_time'],
+               stat['shift_type'], stat['effective_hours'], stat['night_allowance'],
+               bool(stat['is_night_shift']), rec['description']]
+        months.setdefault(f"{day.year}-{day.month:02d}", {}).setdefault(rec['name'], []).append(row)
+
+    written = []
+    for month, employees in sorted(months.items()):
+        chunks, offsets, position = [], {}, 0
+        for name, rows in employees.items():
+            chunk = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode('utf-8')
+            offsets[name] = [position, len(chunk), len(rows)]
+            chunks.append(chunk)
+            position += len(chunk)
+
+        base = os.path.join(index_dir, f"{month}--{stem}--{path_tag}")
+        _replace_atomically(base + DATA_SUFFIX, b''.join(chunks))
+        _replace_atomically(base + INDEX_SUFFIX, json.dumps({
+            'source': source,
+            'month': month,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'record_count': sum(count for _, _, count in offsets.values()),
+            'employees': offsets,
+        }, ensure_ascii=False).encode('utf-8'))
+        written.append(base + INDEX_SUFFIX)
+    return written
+
+
+class EmployeeIndex:
+    """
+    员工索引查询
+
+    用法：
+        rows = EmployeeIndex('output/.employee_index').lookup('张三', date(2025, 5, 1), date(2025, 6, 30))
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+
+    def index_files(self, start_month: Optional[str] = None, end_month: Optional[str] = None) -> List[str]:
+        """月份范围内（'YYYY-MM'，含两端）的索引文件，按文件名排序"""
+        if not os.path.isdir(self.index_dir):
+            return []
+        paths = []
+        for filename in sorted(os.listdir(self.index_dir)):
+            if not filename.endswith(INDEX_SUFFIX):
+                continue
+            month = filename[:7]
+            if (start_month is None or month >= start_month) and (end_month is None or month <= end_month):
+                paths.append(os.path.join(self.index_dir, filename))
+        return paths
+
+    def lookup(self, employee: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict]:
+        """
+        查询员工在日期范围内（含两端）的签到记录
+
+        Returns:
+            list: 按日期排序的记录，字段见 ROW_FIELDS，另加 name、source
+        """
+        start = start_date.isoformat() if start_date is not None else None
+        end = end_date.isoformat() if end_date is not None else None
+
+        rows = []
+        for index_path in self.index_files(start and start[:7], end and end[:7]):
+            with open(index_path, encoding='utf-8') as handle:
+                meta = json.load(handle)
+            entry = meta['employees'].get(employee)
+            if entry is None:
+                continue
+
+            offset, length, _ = entry
+            with open(index_path[:-len(INDEX_SUFFIX)] + DATA_SUFFIX, 'rb') as handle:
+                handle.seek(offset)
+                block = handle.read(length).decode('utf-8')
+            for line in block.splitlines():
+                row = dict(zip(ROW_FIELDS, json.loads(line)))
+                if (start is None or row['date'] >= start) and (end is None or row['date'] <= end):
+                    row['name'] = employee
+                    row['source'] = meta['source']
+                    rows.append(row)
+
+        rows.sort(key=lambda row: row['date'])
+        return rows
+
+
+def main():
+    """主函数：按员工查询签到、有效工时和夜班补贴"""
+    parser = argparse.ArgumentParser(description='按员工查询签到和工时（读取报表生成时写出的索引）')
+    parser.add_argument('employee', help='员工姓名')
+    parser.add_argument('--start-date', type=parse_cli_date, default=None, help='起始日期 (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=parse_cli_date, default=None, help='结束日期 (YYYY-MM-DD)')
+    parser.add_argument('--index-dir', default=EMPLOYEE_INDEX_DIRNAME,
+                        help=f'索引目录 (默认: {EMPLOYEE_INDEX_DIRNAME}，即报表输出目录下的索引)')
+    args = parser.parse_args()
+
+    index = EmployeeIndex(args.index_dir)
+    if not index.index_files():
+        print(f"错误: 索引目录中没有索引: {args.index_dir}（生成考勤统计时会自动写出）")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    rows = index.lookup(args.employee, args.start_date, args.end_date)
+    elapsed = time.perf_counter() - started
+
+    if not rows:
+        print(f"没有 {args.employee} 的记录")
+        return
+
+    print(f"{'日期':<10} {'公司':<10} {'上工':>6} {'下工':>6} {'班次':<4} {'有效工时':>8} {'夜班补贴':>8}  备注")
+    for row in rows:
+        print(f"{row['date']:<10} {row['company']:<10} {row['start_time'] or '':>6} {row['end_time'] or '':>6} "
+              f"{row['shift_type']:<4} {row['effective_hours']:>8.1f} {row['night_allowance']:>8.1f}  "
+              f"{row['description']}")
+    days = len({row['date'] for row in rows})
+    print(f"合计: {len(rows)} 次签到，{days} 天，有效工时 {sum(row['effective_hours'] for row in rows):.1f}，"
+          f"夜班补贴 {sum(row['night_allowance'] for row in rows):.1f}（查询用时 {elapsed * 1000:.1f} 毫秒）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+错误报告 - 按工作表、按公司隔离处理错误并汇总
+
+单个工作表或单个公司出错时记录下来继续处理其余部分，最后统一输出。
+"""
+
+import json
+import os
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 出错环节
+STAGE_FILE = 'file'          # 打开/读取整个文件
+STAGE_SHEET = 'sheet'        # 解析单个工作表
+STAGE_COMPANY = 'company'    # 计算或生成单个公司的报表
+STAGE_SAVE = 'save'          # 保存报表文件
+
+STAGE_NAMES = {
+    STAGE_FILE: '文件',
+    STAGE_SHEET: '工作表',
+    STAGE_COMPANY: '公司',
+    STAGE_SAVE: '保存',
+}
+
+# 错误报告文件名：error_report-<报表类型>.json
+ERROR_REPORT_NAME = 'error_report-{}.json'
+
+
+def error_report_path(output_dir: str, report_kind: str) -> str:
+    """错误报告在输出目录中的路径（report_kind 如 employee_hours、attendance_stats）"""
+    return os.path.join(output_dir, ERROR_REPORT_NAME.format(report_kind))
+
+
+class ProcessingError:
+    """一条处理错误"""
+
+    def __init__(self, stage: str, target: str, error: BaseException, source: Optional[str] = None):
+        self.stage = stage
+        self.target = target
+        self.source = source
+        self.error_type = type(error).__name__
+        self.message = str(error)
+        self.detail = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        self.time = datetime.now()
+
+    def describe(self) -> str:
+        return f"[{STAGE_NAMES.get(self.stage, self.stage)}] {self.target}: {self.error_type}: {self.message}"
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.stage,
+            'target': self.target,
+            'source': self.source,
+            'error_type': self.error_type,
+            'message': self.message,
+            'time': self.time.isoformat(timespec='seconds'),
+            'traceback': self.detail,
+        }
+
+
+class ErrorReport:
+    """
+    错误汇总（线程安全）
+
+    用法：
+        errors = ErrorReport()
+        for sheet_name in sheets:
+            with errors.capture(STAGE_SHEET, sheet_name):
+                ...   # 出错时记录后继续下一个工作表
+    """
+
+    def __init__(self, source: Optional[str] = None):
+        """
+        Args:
+            source: 输入文件路径（写入每条错误，便于批量处理多个文件时定位）
+        """
+        self.source = source
+        self.errors: List[ProcessingError] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.errors)
+
+    def __bool__(self):
+        return bool(self.errors)
+
+    def add(self, stage: str, target: str, error: BaseException, echo: bool = True,
+            source: Optional[str] = None) -> ProcessingError:
+        """记录一条错误，echo 为真时打印提示；source 为空时使用 self.source"""
+        entry = ProcessingError(stage, str(target), error, source or self.source)
+        with self._lock:
+            self.errors.append(entry)
+        if echo:
+            print(f"  ✗ {entry.describe()}")
+        return entry
+
+    def add_save_errors(self, saver):
+        """并入后台保存失败的报表（BackgroundSaver 已打印过提示）"""
+        for label, error in saver.errors:
+            self.add(STAGE_SAVE, label, error, echo=False)
+
+    @contextmanager
+    def capture(self, stage: str, target: str, source: Optional[str] = None):
+        """
+        捕获代码块中的异常并记录（不再向外抛出）
+
+        多个线程处理不同输入文件时由调用方给出 source，不依赖共享的 self.source
+        """
+        try:
+            yield
+        except Exception as e:
+            self.add(stage, target, e, source=source)
+
+    def summary_lines(self) -> List[str]:
+        if not self.errors:
+            return []
+        lines = [f"共 {len(self.errors)} 处错误（其余部分已正常处理）:"]
+        lines.extend(f"  - {entry.describe()}" for entry in self.errors)
+        return lines
+
+    def save(self, path: str) -> str:
+        """写出 JSON 格式的错误报告"""
+        with open(path, 'w', encoding='utf-8') as handle:
+            json.dump({
+                'source': self.source,
+                'error_count': len(self.errors),
+                'errors': [entry.to_dict() for entry in self.errors],
+            }, handle, ensure_ascii=False, indent=2)
+        return path
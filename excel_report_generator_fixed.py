@@ -5,20 +5,190 @@
 支持多次签到动态扩展列、斑马纹、正确的人员顺序
 """
 
+import functools
+import hashlib
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import os
 import sys
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 import argparse
-import calendar
+from concurrent.futures import ProcessPoolExecutor
+from attendance_rules import parse_minute
+from report_layout import MonthLayout
+from report_templates import (
+    hours_header_block, CENTER_ALIGN, THIN_BORDER, HOURS_DATA_FONT, HOURS_ZEBRA_FILL
+)
+from report_saver import BackgroundSaver
+from report_sharding import ShardOptions, Shard, plan_shards, sharded_report_path, write_sharded_report
+from shared_month import SharedMonth
+from error_report import ErrorReport, STAGE_COMPANY, STAGE_FILE, STAGE_SHEET, error_report_path
+from preflight import preflight_scan
+from sheet_schema import DEFAULT_SCHEMA_RESOLVER, SheetSchema
+from xlsx_stream_writer import write_hours_report, write_hours_sheet
+
+# 列式结果中的记录字段（日期按工作表统一给出）
+RECORD_COLUMNS = ('name', 'company', 'start_time', 'end_time', 'description')
+
+# 判断两条签到是否相同的字段（备注不参与比较）
+RECORD_KEY_FIELDS = ('date', 'name', 'company', 'start_time', 'end_time')
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalized_time(value):
+    """时间统一为 HH:MM（"7:30" 与 "07:30" 视为相同），无法解析的原样保留；取值很少，按值缓存"""
+    minute = parse_minute(value)
+    if minute is not None:
+        return f"{minute // 60:02d}:{minute % 60:02d}"
+    return '' if value is None else str(value).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalized_date(value):
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+# 摘要字段的规范化方式（未列出的字段按原文本）
+_KEY_NORMALIZERS = {
+    'date': _normalized_date,
+    'start_time': _normalized_time,
+    'end_time': _normalized_time,
+}
+
+
+def record_digest(record):
+    """
+    标准记录的摘要（由 RECORD_KEY_FIELDS 计算），用于比较和去重签到
+    
+    Returns:
+        bytes: 16 字节摘要；内容相同的签到摘要相同，与来自哪份签到表、归档无关
+    """
+    key = '\x1f'.join(_KEY_NORMALIZERS.get(field, str)(record[field]) for field in RECORD_KEY_FIELDS)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class RecordFilter:
+    """
+    记录筛选条件（公司、日期范围），在解析时提前应用：
+    日期范围外的工作表不读取，其他公司的数据行不解析时间
+    """
+    
+    def __init__(self, companies=None, start_date=None, end_date=None):
+        """
+        Args:
+            companies: 只保留这些公司（为空表示全部）
+            start_date / end_date: 日期范围（含两端，date 或 datetime，可只给一端）
+        """
+        self.companies = frozenset(companies) if companies else None
+        self.start_date = self._as_date(start_date)
+        self.end_date = self._as_date(end_date)
+    
+    @staticmethod
+    def _as_date(value):
+        return value.date() if isinstance(value, datetime) else value
+    
+    @property
+    def is_empty(self):
+        return self.companies is None and self.start_date is None and self.end_date is None
+    
+    def accepts_date(self, work_date):
+        day = self._as_date(work_date)
+        if self.start_date is not None and day < self.start_date:
+            return False
+        return self.end_date is None or day <= self.end_date
+    
+    def accepts_company(self, company):
+        return self.companies is None or company in self.companies
+
+
+def parse_sheets_in_process(file_path, sheets, record_filter=None):
+    """
+    子进程任务：打开工作簿一次，解析分配到的一组工作表
+    
+    Args:
+        file_path: 签到表路径
+        sheets: [(工作表序号, 工作表名, 日期), ...]
+        record_filter: 公司筛选（RecordFilter），日期已在主进程筛过
+    
+    Returns:
+        list: [(工作表序号, 列式数据, 异常), ...]，列式数据为 {字段: 值列表}；
+              工作表出错时列式数据为 None，异常为出错原因
+    """
+    generator = ExcelReportGenerator()
+    excel_file = pd.ExcelFile(file_path)
+    results = []
+    for index, sheet_name, work_date in sheets:
+        try:
+            df, schema = generator.read_sheet(excel_file, sheet_name)
+            records = generator.normalize_sheet(df, work_date, schema, record_filter)
+        except Exception as e:
+            results.append((index, None, e))
+            continue
+        columns = {column: [record[column] for record in records] for column in RECORD_COLUMNS}
+        results.append((index, columns, None))
+    return results
+
+
+# 子进程中挂载的共享月度数据
+_shared_month = None
+
+
+def _attach_shared_month(handle):
+    """子进程初始化：挂载主进程创建的共享内存（每个进程一次）"""
+    global _shared_month
+    _shared_month = SharedMonth.attach(handle)
+
+
+def save_company_report_in_process(company_index, output_dir, engine, flat, sharding):
+    """子进程任务：从共享内存切出一个公司的记录，生成并保存其报表"""
+    company = _shared_month.companies[company_index]
+    generator = ExcelReportGenerator()
+    generator.raw_data = _shared_month.company_records(company_index)
+    generator.companies = {company}
+    report_info = generator.generate_company_report(company)
+    return generator.save_company_report(report_info, output_dir, engine=engine, flat=flat, sharding=sharding)
+
+
+def save_reports_in_processes(generator, output_dir, workers, engine='openpyxl', flat=False, sharding=None):
+    """
+    多进程生成各公司报表
+    
+    解析后的记录以整数列存入共享内存，子进程零拷贝挂载后按公司区间切片，
+    任务只传公司序号，分发开销与数据量无关
+    
+    Args:
+        generator: 已读取数据的 ExcelReportGenerator
+        output_dir: 输出目录
+        workers: 进程数
+        engine / flat / sharding: 同 save_company_report
+    
+    Returns:
+        list: 生成的报表路径（按公司名称排序）；出错的公司记录在 generator.errors 中
+    """
+    generated_files = []
+    with SharedMonth.from_records(generator.raw_data) as month:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_month,
+                                 initargs=(month.handle,)) as pool:
+            futures = [
+                pool.submit(save_company_report_in_process, index, output_dir, engine, flat, sharding)
+                for index in range(len(month.companies))
+            ]
+            for company, future in zip(month.companies, futures):
+                with generator.errors.capture(STAGE_COMPANY, company):
+                    generated_files.append(future.result())
+    return generated_files
+
 
 class ExcelReportGenerator:
     def __init__(self):
         self.raw_data = []
         self.companies = set()
+        self._company_index = None
+        self._indexed_count = 0
+        self.schema_resolver = DEFAULT_SCHEMA_RESOLVER
+        # 按工作表/公司隔离的处理错误
+        self.errors = ErrorReport()
         
     def parse_sheet_date(self, sheet_name, upload_date=None):
         """解析工作表名称为日期，处理跨年问题"""
@@ -86,375 +256,464 @@ class ExcelReportGenerator:
                 
         return None
     
-    def read_input_excel(self, file_path):
-        """读取输入的Excel文件，解析所有工作表"""
+    def read_input_excel(self, file_path, workers=None, record_filter=None):
+        """
+        读取输入的Excel文件，解析所有工作表，结果存入 raw_data / companies
+        
+        单个工作表出错只跳过该工作表；文件无法打开时不再退出程序，
+        错误都记录在 self.errors 中，由调用方决定如何处理
+        
+        Args:
+            file_path: 签到表路径
+            workers: 并行解析的进程数；为空或1时在当前进程逐个解析
+            record_filter: 只读取符合条件的记录（RecordFilter）
+        """
         print(f"正在读取文件: {file_path}")
         
+        if workers and workers > 1:
+            excel_file = self.open_workbook(file_path)
+            if excel_file is not None:
+                self._read_sheets_parallel(file_path, excel_file.sheet_names, workers, record_filter)
+        else:
+            for record in self.iter_records(file_path, record_filter):
+                self.raw_data.append(record)
+                self.companies.add(record['company'])
+        
+        print(f"共读取 {len(self.raw_data)} 条记录")
+        print(f"发现公司: {', '.join(sorted(self.companies))}")
+    
+    def iter_records(self, file_path, record_filter=None):
+        """
+        按工作表顺序逐条产出标准记录，不写入 raw_data，内存中只保留当前工作表
+        
+        筛选条件在解析时应用：日期范围外的工作表不读取，其他公司的行不解析时间。
+        出错的工作表记录到 self.errors 后跳过。
+        
+        Args:
+            file_path: 签到表路径
+            record_filter: 筛选条件（RecordFilter），为空时产出全部记录
+        
+        Yields:
+            dict: 标准记录（date、name、company、start_time、end_time、description）
+        """
+        excel_file = self.open_workbook(file_path)
+        if excel_file is None:
+            return
+        
+        for sheet_name in excel_file.sheet_names:
+            work_date = self.sheet_work_date(sheet_name, record_filter)
+            if work_date is None:
+                continue
+            
+            records = None
+            with self.errors.capture(STAGE_SHEET, sheet_name):
+                df, schema = self.read_sheet(excel_file, sheet_name)
+                records = self.normalize_sheet(df, work_date, schema, record_filter)
+            if records:
+                yield from records
+    
+    def sheet_work_date(self, sheet_name, record_filter=None):
+        """
+        工作表对应的日期；非日期工作表或不在筛选范围内时返回 None（并打印说明）
+        """
+        print(f"处理工作表: {sheet_name}")
+        work_date = self.parse_sheet_date(sheet_name)
+        if work_date is None:
+            print(f"跳过工作表 {sheet_name}: 无法解析日期")
+            return None
+        if record_filter is not None and not record_filter.accepts_date(work_date):
+            print(f"跳过工作表 {sheet_name}: 不在日期范围内")
+            return None
+        return work_date
+    
+    def open_workbook(self, file_path):
+        """打开签到表；失败时记录文件错误并返回 None"""
+        self.errors.source = file_path
         try:
-            excel_file = pd.ExcelFile(file_path)
+            return pd.ExcelFile(file_path)
+        except Exception as e:
+            print(f"读取文件失败: {e}")
+            self.errors.add(STAGE_FILE, file_path, e)
+            return None
+    
+    def _read_sheets_parallel(self, file_path, sheet_names, workers, record_filter=None):
+        """
+        多进程解析工作表
+        
+        工作表交错分给各进程（每个进程只打开一次工作簿），返回的列式结果按工作表顺序合并，
+        记录顺序（员工首次出现顺序）与逐个解析完全一致
+        """
+        sheets = []
+        for index, sheet_name in enumerate(sheet_names):
+            work_date = self.sheet_work_date(sheet_name, record_filter)
+            if work_date is not None:
+                sheets.append((index, sheet_name, work_date))
+        
+        if not sheets:
+            return
+        
+        workers = min(workers, len(sheets))
+        dates = {index: work_date for index, _, work_date in sheets}
+        names = {index: sheet_name for index, sheet_name, _ in sheets}
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            subsets = [sheets[k::workers] for k in range(workers)]
+            futures = [pool.submit(parse_sheets_in_process, file_path, subset, record_filter) for subset in subsets]
+            for subset, future in zip(subsets, futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    # 整个子进程失败：分给它的工作表都记为出错
+                    results.extend((index, None, e) for index, _, _ in subset)
+        
+        for index, columns, error in sorted(results, key=lambda item: item[0]):
+            if columns is None:
+                self.errors.add(STAGE_SHEET, names[index], error)
+                continue
+            work_date = dates[index]
+            for values in zip(*(columns[column] for column in RECORD_COLUMNS)):
+                record = {'date': work_date}
+                record.update(zip(RECORD_COLUMNS, values))
+                self.raw_data.append(record)
+            self.companies.update(columns['company'])
+    
+    def read_sheet(self, excel_file, sheet_name):
+        """
+        读取工作表：自动定位表头行并识别列名（按表头签名缓存）
+        
+        Returns:
+            tuple: (数据, SheetSchema)
+        """
+        return self.schema_resolver.read_sheet(excel_file, sheet_name)
+    
+    def normalize_sheet(self, df, work_date, schema=None, record_filter=None):
+        """
+        将单个工作表的数据行整理为标准记录（不写入 raw_data）
+        
+        Args:
+            df: 工作表数据
+            work_date: 工作表对应的日期
+            schema: 工作表结构（SheetSchema）；为空时按 df 的列名识别
+            record_filter: 公司筛选（RecordFilter），不符合的行在解析时间之前跳过
+        
+        Returns:
+            list: 记录字典列表，保持表内顺序
+        """
+        if schema is None:
+            schema = SheetSchema.from_columns(df.columns)
+        
+        # 列映射每张表只做一次，按列整体取值
+        def column(field, default):
+            label = schema.columns[field]
+            return df[label].tolist() if label is not None else [default] * len(df)
+        
+        records = []
+        for name_value, company_value, start_value, end_value, description in zip(
+                column('name', None), column('company', ''), column('start_time', None),
+                column('end_time', None), column('description', '')):
+            if pd.isna(name_value) or str(name_value).strip() in ['姓名', '白班安排', '夜班安排', '']:
+                continue
             
-            for sheet_name in excel_file.sheet_names:
-                print(f"处理工作表: {sheet_name}")
-                
-                work_date = self.parse_sheet_date(sheet_name)
-                if work_date is None:
-                    print(f"跳过工作表 {sheet_name}: 无法解析日期")
-                    continue
-                
-                df = pd.read_excel(file_path, sheet_name=sheet_name, header=1)
-                
-                for idx, row in df.iterrows():
-                    name_value = row.get('姓名')
-                    if pd.isna(name_value) or str(name_value).strip() in ['姓名', '白班安排', '夜班安排', '']:
-                        continue
-                    
-                    name = str(name_value).strip()
-                    company = str(row.get('劳务公司', '')).strip()
-                    
-                    if not name or not company or company == 'nan':
-                        continue
-                    
-                    # 解析时间
-                    start_time = None
-                    end_time = None
-                    
-                    for start_col in ['上工', '上工时间', '开始时间']:
-                        if start_col in row:
-                            start_time = self.parse_time(row.get(start_col))
-                            break
-                    
-                    for end_col in ['下工', '下工时间', '结束时间']:
-                        if end_col in row:
-                            end_time = self.parse_time(row.get(end_col))
-                            break
-                    
-                    self.raw_data.append({
-                        'date': work_date,
-                        'name': name,
-                        'company': company,
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'description': str(row.get('白班工时11H（如有延长下班的，备注原因）', '')).strip()
-                    })
-                    
-                    self.companies.add(company)
+            name = str(name_value).strip()
+            company = str(company_value).strip()
             
-            print(f"共读取 {len(self.raw_data)} 条记录")
-            print(f"发现公司: {', '.join(sorted(self.companies))}")
+            if not name or not company or company == 'nan':
+                continue
+            if record_filter is not None and not record_filter.accepts_company(company):
+                continue
             
-        except Exception as e:
-            print(f"读取文件失败: {e}")
-            sys.exit(1)
+            records.append({
+                'date': work_date,
+                'name': name,
+                'company': company,
+                'start_time': self.parse_time(start_value) if schema.columns['start_time'] is not None else None,
+                'end_time': self.parse_time(end_value) if schema.columns['end_time'] is not None else None,
+                'description': str(description).strip()
+            })
+        return records
+    
+    def get_company_records(self, company):
+        """
+        获取指定公司的记录（保持原始顺序）
+        
+        首次调用时一次遍历 raw_data 建立按公司的索引，之后直接复用
+        """
+        if self._company_index is None or self._indexed_count != len(self.raw_data):
+            index = {}
+            for record in self.raw_data:
+                index.setdefault(record['company'], []).append(record)
+            self._company_index = index
+            self._indexed_count = len(self.raw_data)
+        return self._company_index.get(company, [])
+    
+    def plan_company_layout(self, company_data):
+        """一次遍历公司记录，计算月度列布局"""
+        min_date = min(record['date'] for record in company_data)
+        return MonthLayout.from_pairs(
+            min_date.year,
+            min_date.month,
+            ((record['name'], record['date'].day) for record in company_data)
+        )
     
     def generate_company_report(self, company):
-        """为指定公司生成月度考勤报表"""
-        company_data = [record for record in self.raw_data if record['company'] == company]
+        """
+        为指定公司生成月度考勤报表
+        
+        报表数据为稠密矩阵 time_codes[员工, 上工/下工, 日期列]，
+        值为 time_labels 中的下标（0 为空白），员工姓名按首次出现顺序存于 employees。
+        报表月份由最早的记录确定，日期超出该月天数的记录（如 6 月报表中的 31 日）不写入报表
+        """
+        company_data = self.get_company_records(company)
         
         if not company_data:
             return None
         
-        dates = [record['date'] for record in company_data]
-        min_date = min(dates)
+        layout = self.plan_company_layout(company_data)
+        year = layout.year
+        month = layout.month
+        days_in_month = layout.days_in_month
+        max_daily_records = layout.max_daily_records
+        columns = layout.columns(first_col=5, min_span=1)
         
-        year = min_date.year
-        month = min_date.month
-        days_in_month = calendar.monthrange(year, month)[1]
+        # 按首次出现顺序编号员工；时间文本编码为整数（0 表示空白）
+        employee_codes = {}
+        time_labels = ['']
+        label_codes = {'': 0}
+        
+        rows = []
+        slots = []
+        start_values = []
+        end_values = []
+        daily_counts = {}
+        skipped = 0
         
-        # 按首次出现顺序获取员工列表
-        employees = []
-        seen = set()
         for record in company_data:
-            if record['name'] not in seen:
-                employees.append(record['name'])
-                seen.add(record['name'])
-        
-        # 分析每天的最大签到次数
-        max_daily_records = {}
-        for day in range(1, days_in_month + 1):
-            max_daily_records[day] = 1  # 默认每天1次签到
-        
-        # 统计每天每个员工的实际签到次数
-        for employee in employees:
-            employee_data = [record for record in company_data if record['name'] == employee]
-            daily_counts = {}
-            for record in employee_data:
-                day = record['date'].day
-                daily_counts[day] = daily_counts.get(day, 0) + 1
+            day = record['date'].day
+            if day not in columns.offsets:
+                skipped += 1
+                continue
+            employee_idx = employee_codes.setdefault(record['name'], len(employee_codes))
+            key = (employee_idx, day)
+            occurrence = daily_counts.get(key, 0)
+            daily_counts[key] = occurrence + 1
+            
+            for value, values in ((record['start_time'] or '', start_values),
+                                  (record['end_time'] or '', end_values)):
+                code = label_codes.get(value)
+                if code is None:
+                    code = label_codes[value] = len(time_labels)
+                    time_labels.append(value)
+                values.append(code)
             
-            for day, count in daily_counts.items():
-                max_daily_records[day] = max(max_daily_records.get(day, 1), count)
+            rows.append(employee_idx)
+            slots.append(columns.offsets[day] - columns.first_col + occurrence)
         
-        # 创建报表数据
-        report_data = []
+        if skipped:
+            print(f"    ⚠ {company}: {skipped} 条记录的日期超出 {year}-{month:02d} 的天数，未写入工时报表")
         
-        for employee in employees:
-            employee_data = [record for record in company_data if record['name'] == employee]
-            
-            # 按日期分组
-            daily_records = {}
-            for record in employee_data:
-                day = record['date'].day
-                if day not in daily_records:
-                    daily_records[day] = []
-                daily_records[day].append(record)
-            
-            # 创建员工的上工和下工行
-            start_row = {'员工姓名': employee, '类型': '上工'}
-            end_row = {'员工姓名': '', '类型': '下工'}
-            
-            for day in range(1, days_in_month + 1):
-                max_records_for_day = max_daily_records.get(day, 1)
-                
-                if day in daily_records:
-                    records = daily_records[day]
-                    for i in range(max_records_for_day):
-                        col_key = f"{day}_{i+1}" if max_records_for_day > 1 else str(day)
-                        if i < len(records):
-                            start_row[col_key] = records[i]['start_time'] or ''
-                            end_row[col_key] = records[i]['end_time'] or ''
-                        else:
-                            start_row[col_key] = ''
-                            end_row[col_key] = ''
-                else:
-                    for i in range(max_records_for_day):
-                        col_key = f"{day}_{i+1}" if max_records_for_day > 1 else str(day)
-                        start_row[col_key] = ''
-                        end_row[col_key] = ''
-            
-            report_data.append(start_row)
-            report_data.append(end_row)
+        # 员工 × (上工/下工) × 日期列 的稠密矩阵
+        time_codes = np.zeros((len(employee_codes), 2, columns.slot_count), dtype=np.int32)
+        time_codes[rows, 0, slots] = start_values
+        time_codes[rows, 1, slots] = end_values
         
         return {
-            'data': report_data,
+            'employees': list(employee_codes),
+            'time_labels': time_labels,
+            'time_codes': time_codes,
             'year': year,
             'month': month,
             'days_in_month': days_in_month,
             'company': company,
-            'max_daily_records': max_daily_records
+            'max_daily_records': max_daily_records,
+            'layout': layout
         }
 
-    def save_company_report(self, report_info, output_dir):
-        """保存公司报表到Excel文件"""
+    def save_company_report(self, report_info, output_dir, engine='openpyxl', flat=False, sharding=None,
+                            saver=None):
+        """
+        保存公司报表到Excel文件
+        
+        Args:
+            report_info: generate_company_report 的返回值
+            output_dir: 输出目录
+            engine: 写出方式，'openpyxl' 或 'stream'（直接流式生成 xlsx，适合大报表）
+            flat: 平铺模式，不合并单元格（上工/下工两行都写序号、姓名、公司），适合程序读取或超大报表
+            sharding: 分片设置（ShardOptions），人数超过单片上限时拆分为多个文件或工作表并附索引
+            saver: 后台保存线程池（BackgroundSaver）；为空时在当前线程保存
+        
+        Returns:
+            str: 报表文件路径（分片输出为多个文件时返回索引文件路径）；
+                 使用 saver 时文件可能尚未写完，需等 saver 关闭
+        """
         if not report_info:
             return
 
         company = report_info['company']
-        year = report_info['year']
         month = report_info['month']
-        days_in_month = report_info['days_in_month']
-        data = report_info['data']
-        max_daily_records = report_info['max_daily_records']
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'sheet1'
-
-        # 计算总列数
-        total_cols = 4  # A,B,C,D 基础列
-        for day in range(1, days_in_month + 1):
-            total_cols += max_daily_records.get(day, 1)
-
-        # 设置标题
-        title = f"{year}年{month:02d}月"
-        title_cell = ws['A1']
-        title_cell.value = title
-        title_cell.font = Font(name='SimSun', bold=True, size=12)
-
-        end_col = get_column_letter(total_cols)
-        ws.merge_cells(f'A1:{end_col}1')
-
-        # 设置字体
-        header_font = Font(name='SimSun', size=12)
-        data_font = Font(name='SimSun', size=10)
-
-        # 设置表头
-        ws['A2'] = '序号'
-        ws['A2'].alignment = Alignment(horizontal='center', vertical='center')
-        ws['A2'].font = header_font
-
-        ws['B2'] = '姓名/日期'
-        ws['B2'].alignment = Alignment(horizontal='center', vertical='center')
-        ws['B2'].font = header_font
-
-        ws['C2'] = '劳务\n公司'
-        ws['C2'].alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        ws['C2'].font = header_font
-
-        ws['D2'] = '上工\n时间'
-        ws['D2'].alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        ws['D2'].font = header_font
-
-        ws['A3'] = ''
-        ws['B3'] = ''
-        ws['C3'] = ''
-        ws['D3'] = '下工\n时间'
-        ws['D3'].alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        ws['D3'].font = header_font
-
-        # 合并基础列
-        ws.merge_cells('A2:A3')
-        ws.merge_cells('B2:B3')
-        ws.merge_cells('C2:C3')
-
-        # 生成动态日期表头
-        weekdays = ['一', '二', '三', '四', '五', '六', '日']
-        current_col = 5  # E列开始
-
-        for day in range(1, days_in_month + 1):
-            max_records_for_day = max_daily_records.get(day, 1)
-
-            # 计算星期几
-            date_obj = datetime(year, month, day)
-            weekday_idx = date_obj.weekday()
-            weekday_name = weekdays[weekday_idx]
-
-            if max_records_for_day == 1:
-                # 单次签到：正常列
-                col_letter = get_column_letter(current_col)
-                ws[f'{col_letter}2'] = weekday_name
-                ws[f'{col_letter}2'].alignment = Alignment(horizontal='center', vertical='center')
-                ws[f'{col_letter}2'].font = header_font
-
-                ws[f'{col_letter}3'] = day
-                ws[f'{col_letter}3'].alignment = Alignment(horizontal='center', vertical='center')
-                ws[f'{col_letter}3'].font = header_font
-
-                current_col += 1
-            else:
-                # 多次签到：扩展列
-                start_col = current_col
-                end_col = current_col + max_records_for_day - 1
-
-                # 合并星期行
-                start_letter = get_column_letter(start_col)
-                end_letter = get_column_letter(end_col)
-                ws.merge_cells(f'{start_letter}2:{end_letter}2')
-                ws[f'{start_letter}2'] = weekday_name
-                ws[f'{start_letter}2'].alignment = Alignment(horizontal='center', vertical='center')
-                ws[f'{start_letter}2'].font = header_font
-
-                # 合并日期行
-                ws.merge_cells(f'{start_letter}3:{end_letter}3')
-                ws[f'{start_letter}3'] = day
-                ws[f'{start_letter}3'].alignment = Alignment(horizontal='center', vertical='center')
-                ws[f'{start_letter}3'].font = header_font
-
-                current_col += max_records_for_day
-
-        # 填充数据
-        row_idx = 4
-        seq_num = 1
-
-        # 斑马纹颜色
-        light_fill = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+        filename = f"employee_hours-{month:02d}-{company}.xlsx"
+        filepath = os.path.join(output_dir, filename)
+        result_path = filepath
+
+        ranges = []
+        if sharding is not None:
+            employees = report_info['employees']
+            total_cols = report_info['layout'].columns(first_col=5, min_span=1).last_col
+            ranges = plan_shards(len(employees), sharding.employees_per_shard(2 * total_cols))
+
+        if len(ranges) > 1:
+            shards = [
+                Shard(number, start, end, employees[start:end], dict(
+                    report_info,
+                    employees=employees[start:end],
+                    time_codes=report_info['time_codes'][start:end],
+                    first_seq=start + 1,
+                ))
+                for number, (start, end) in enumerate(ranges, 1)
+            ]
+            result_path = sharded_report_path(filepath, sharding)
+
+            def save():
+                paths = write_sharded_report(
+                    filepath, 'sheet1', shards, sharding, engine,
+                    fill_openpyxl=lambda ws, payload: self.fill_company_sheet(ws, payload, flat=flat),
+                    fill_stream=lambda wb, title, payload: write_hours_sheet(wb, title, payload, flat=flat),
+                )
+                for path in paths:
+                    print(f"已生成报表: {path}")
+        elif engine == 'stream':
+            # 流式写出边生成边压缩，整体交给保存线程
+            def save():
+                write_hours_report(report_info, filepath, flat=flat)
+                print(f"已生成报表: {filepath}")
+        else:
+            wb = Workbook()
+            ws = wb.active
+            ws.title = 'sheet1'
+            self.fill_company_sheet(ws, report_info, flat=flat)
+
+            def save():
+                # 保存文件（添加月份信息）
+                wb.save(filepath)
+                print(f"已生成报表: {filepath}")
+
+        if saver is not None:
+            saver.submit(save, result_path)
+        else:
+            save()
+
+        return result_path
+
+    def fill_company_sheet(self, ws, report_info, flat=False):
+        """
+        向 openpyxl 工作表写入公司工时报表（表头及员工行）
+        
+        Args:
+            ws: 工作表
+            report_info: generate_company_report 的返回值（可含 first_seq 起始序号，用于分片）
+            flat: 平铺模式，不合并单元格
+        """
+        company = report_info['company']
+        employees = report_info['employees']
+        time_labels = report_info['time_labels']
+        time_codes = report_info['time_codes']
+        layout = report_info['layout']
+        columns = layout.columns(first_col=5, min_span=1)
 
-        for i in range(0, len(data), 2):
-            if i + 1 >= len(data):
-                break
+        # 计算总列数（A,B,C,D 基础列 + 日期列）
+        total_cols = columns.last_col
 
-            start_record = data[i]
-            end_record = data[i + 1]
+        # 表头（标题、基础列、星期行、日期行）按月度布局缓存，直接套用
+        hours_header_block(layout, flat=flat).apply(ws)
 
-            employee_name = start_record.get('员工姓名', '')
+        # 填充数据
+        row_idx = 4
+        seq_num = report_info.get('first_seq', 1)
+        first_col = columns.first_col
 
+        for employee_name, (start_codes, end_codes) in zip(employees, time_codes.tolist()):
             # 斑马纹：每个员工（两行）使用相同的背景色
             use_fill = (seq_num % 2 == 0)
 
-            # 序号
-            ws[f'A{row_idx}'] = seq_num
-            ws.merge_cells(f'A{row_idx}:A{row_idx + 1}')
-            ws[f'A{row_idx}'].alignment = Alignment(horizontal='center', vertical='center')
-            ws[f'A{row_idx}'].font = data_font
-            if use_fill:
-                ws[f'A{row_idx}'].fill = light_fill
-
-            # 姓名
-            ws[f'B{row_idx}'] = employee_name
-            ws.merge_cells(f'B{row_idx}:B{row_idx + 1}')
-            ws[f'B{row_idx}'].alignment = Alignment(horizontal='center', vertical='center')
-            ws[f'B{row_idx}'].font = data_font
-            if use_fill:
-                ws[f'B{row_idx}'].fill = light_fill
-
-            # 劳务公司
-            ws[f'C{row_idx}'] = company
-            ws.merge_cells(f'C{row_idx}:C{row_idx + 1}')
-            ws[f'C{row_idx}'].alignment = Alignment(horizontal='center', vertical='center')
-            ws[f'C{row_idx}'].font = data_font
-            if use_fill:
-                ws[f'C{row_idx}'].fill = light_fill
-
-            # 上工/下工标识
-            ws[f'D{row_idx}'] = '上工'
-            ws[f'D{row_idx}'].alignment = Alignment(horizontal='center', vertical='center')
-            ws[f'D{row_idx}'].font = data_font
-            if use_fill:
-                ws[f'D{row_idx}'].fill = light_fill
-
-            ws[f'D{row_idx + 1}'] = '下工'
-            ws[f'D{row_idx + 1}'].alignment = Alignment(horizontal='center', vertical='center')
-            ws[f'D{row_idx + 1}'].font = data_font
-            if use_fill:
-                ws[f'D{row_idx + 1}'].fill = light_fill
-
-            # 填充时间数据
-            current_col = 5
-            for day in range(1, days_in_month + 1):
-                max_records_for_day = max_daily_records.get(day, 1)
-
-                for record_idx in range(max_records_for_day):
-                    col_letter = get_column_letter(current_col)
-                    col_key = f"{day}_{record_idx+1}" if max_records_for_day > 1 else str(day)
-
-                    # 上工时间
-                    start_time = start_record.get(col_key, '')
-                    ws[f'{col_letter}{row_idx}'] = start_time
-                    ws[f'{col_letter}{row_idx}'].alignment = Alignment(horizontal='center', vertical='center')
-                    ws[f'{col_letter}{row_idx}'].font = data_font
+            # 序号、姓名、劳务公司（上工/下工两行合并；平铺模式两行重复）
+            for col, value in ((1, seq_num), (2, employee_name), (3, company)):
+                if flat:
+                    rows = (row_idx, row_idx + 1)
+                else:
+                    ws.merge_cells(start_row=row_idx, start_column=col, end_row=row_idx + 1, end_column=col)
+                    rows = (row_idx,)
+                for row in rows:
+                    cell = ws.cell(row=row, column=col, value=value)
+                    cell.alignment = CENTER_ALIGN
+                    cell.font = HOURS_DATA_FONT
                     if use_fill:
-                        ws[f'{col_letter}{row_idx}'].fill = light_fill
+                        cell.fill = HOURS_ZEBRA_FILL
 
-                    # 下工时间
-                    end_time = end_record.get(col_key, '')
-                    ws[f'{col_letter}{row_idx + 1}'] = end_time
-                    ws[f'{col_letter}{row_idx + 1}'].alignment = Alignment(horizontal='center', vertical='center')
-                    ws[f'{col_letter}{row_idx + 1}'].font = data_font
+            # 上工/下工标识
+            for row, label in ((row_idx, '上工'), (row_idx + 1, '下工')):
+                cell = ws.cell(row=row, column=4, value=label)
+                cell.alignment = CENTER_ALIGN
+                cell.font = HOURS_DATA_FONT
+                if use_fill:
+                    cell.fill = HOURS_ZEBRA_FILL
+
+            # 填充时间数据（按矩阵行逐列写入）
+            for row, codes in ((row_idx, start_codes), (row_idx + 1, end_codes)):
+                for offset, code in enumerate(codes):
+                    cell = ws.cell(row=row, column=first_col + offset, value=time_labels[code])
+                    cell.alignment = CENTER_ALIGN
+                    cell.font = HOURS_DATA_FONT
                     if use_fill:
-                        ws[f'{col_letter}{row_idx + 1}'].fill = light_fill
-
-                    current_col += 1
+                        cell.fill = HOURS_ZEBRA_FILL
 
             row_idx += 2
             seq_num += 1
 
-        # 添加边框
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        for row in range(1, row_idx):
+        # 添加边框（表头已由模板加框）
+        for row in range(4, row_idx):
             for col in range(1, total_cols + 1):
-                ws.cell(row=row, column=col).border = thin_border
+                ws.cell(row=row, column=col).border = THIN_BORDER
 
         # 冻结表头（前3行）
         ws.freeze_panes = 'A4'  # 冻结A1:A3行，从第4行开始可滚动
 
-        # 保存文件（添加月份信息）
-        filename = f"employee_hours-{month:02d}-{company}.xlsx"
-        filepath = os.path.join(output_dir, filename)
-        wb.save(filepath)
-        print(f"已生成报表: {filepath}")
-
-        return filepath
+def parse_cli_date(value):
+    """命令行日期参数 (YYYY-MM-DD)"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"日期格式应为 YYYY-MM-DD: {value}")
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='员工工时报表生成工具')
     parser.add_argument('input_file', help='输入的Excel文件路径')
     parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    parser.add_argument('--engine', choices=['openpyxl', 'stream'], default='openpyxl',
+                        help='写出方式: openpyxl (默认) 或 stream (流式生成，适合大报表)')
+    parser.add_argument('--flat', action='store_true',
+                        help='平铺模式: 不合并单元格，适合程序读取或超大报表')
+    parser.add_argument('--shard-size', type=int, default=None,
+                        help='分片: 每个分片的最大员工数，超过时拆分输出')
+    parser.add_argument('--shard-mb', type=float, default=None,
+                        help='分片: 每个分片的目标文件大小 (MB，按单元格数估算)')
+    parser.add_argument('--shard-mode', choices=ShardOptions.MODES, default='files',
+                        help='分片方式: files (多个编号文件，默认) 或 sheets (同一文件多个工作表)')
+    parser.add_argument('--shard-workers', type=int, default=4,
+                        help='并行写出分片的线程数 (默认: 4)')
+    parser.add_argument('--company', action='append', default=None,
+                        help='只处理指定公司（可重复给出）')
+    parser.add_argument('--start-date', type=parse_cli_date, default=None,
+                        help='只处理该日期及之后的工作表 (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=parse_cli_date, default=None,
+                        help='只处理该日期及之前的工作表 (YYYY-MM-DD)')
+    parser.add_argument('--preflight', action='store_true',
+                        help='只做预检（工作表、列、估计记录数和耗时），不生成报表')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='并行解析工作表的进程数 (默认: 逐个解析)')
+    parser.add_argument('--report-workers', type=int, default=None,
+                        help='多进程生成各公司报表的进程数 (默认: 在当前进程逐个生成)')
+    parser.add_argument('--save-workers', type=int, default=2,
+                        help='后台保存线程数，与下一个公司的报表生成重叠进行；0 表示逐个同步保存 (默认: 2)')
 
     args = parser.parse_args()
 
@@ -462,29 +721,73 @@ def main():
         print(f"错误: 输入文件不存在: {args.input_file}")
         sys.exit(1)
 
+    # 预检：只读工作表名和前几行，尽早发现选错文件或表头不对
+    try:
+        report = preflight_scan(args.input_file, ExcelReportGenerator())
+        print('\n'.join(report.summary_lines()))
+    except Exception as e:
+        print(f"预检失败: {e}")
+    if args.preflight:
+        return
+
     output_dir = args.output
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
+    sharding = None
+    if args.shard_size or args.shard_mb:
+        sharding = ShardOptions(
+            max_employees=args.shard_size,
+            target_bytes=int(args.shard_mb * 1024 * 1024) if args.shard_mb else None,
+            mode=args.shard_mode,
+            workers=args.shard_workers,
+        )
+
+    record_filter = RecordFilter(args.company, args.start_date, args.end_date)
     generator = ExcelReportGenerator()
-    generator.read_input_excel(args.input_file)
+    generator.read_input_excel(args.input_file, workers=args.parse_workers,
+                               record_filter=None if record_filter.is_empty else record_filter)
+    errors = generator.errors
 
     if not generator.raw_data:
         print("错误: 没有读取到有效数据")
+        if errors:
+            print(f"错误报告: {errors.save(error_report_path(output_dir, 'employee_hours'))}")
         sys.exit(1)
 
-    generated_files = []
-    for company in sorted(generator.companies):
-        print(f"\n正在生成 {company} 的报表...")
-        report_info = generator.generate_company_report(company)
-        if report_info:
-            filepath = generator.save_company_report(report_info, output_dir)
-            generated_files.append(filepath)
+    if args.report_workers and args.report_workers > 1:
+        generated_files = save_reports_in_processes(generator, output_dir, args.report_workers,
+                                                    engine=args.engine, flat=args.flat, sharding=sharding)
+    else:
+        generated_files = []
+        saver = BackgroundSaver(max_workers=args.save_workers) if args.save_workers > 0 else None
+        try:
+            for company in sorted(generator.companies):
+                print(f"\n正在生成 {company} 的报表...")
+                with errors.capture(STAGE_COMPANY, company):
+                    report_info = generator.generate_company_report(company)
+                    if report_info:
+                        filepath = generator.save_company_report(report_info, output_dir, engine=args.engine,
+                                                                 flat=args.flat, sharding=sharding, saver=saver)
+                        generated_files.append(filepath)
+        finally:
+            if saver is not None:
+                saver.close()
+        if saver is not None:
+            errors.add_save_errors(saver)
+            failed = {label for label, _ in saver.errors}
+            generated_files = [path for path in generated_files if path not in failed]
 
     print(f"\n✅ 报表生成完成!")
     print(f"共生成 {len(generated_files)} 个文件:")
     for filepath in generated_files:
         print(f"  - {filepath}")
 
+    # 出错的工作表/公司不影响其余报表，最后统一列出并以非零状态退出
+    if errors:
+        print("\n❌ " + "\n".join(errors.summary_lines()))
+        print(f"错误报告: {errors.save(error_report_path(output_dir, 'employee_hours'))}")
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -12,6 +12,9 @@ import threading
 from datetime import datetime
 from excel_report_generator_fixed import ExcelReportGenerator
 from run_attendance_stats import generate_attendance_stats
+from report_saver import BackgroundSaver
+from error_report import STAGE_COMPANY, error_report_path
+from preflight import preflight_scan
 
 class ModernButton(tk.Button):
     """现代化按钮样式 - 兼容macOS"""
@@ -127,6 +130,7 @@ class ExcelReportApp:
         self.selected_file = None
         self.output_dir = os.getcwd()
         self.generated_work_hours_files = []  # 保存生成的工时报表文件路径
+        self.weekly_limit = None  # 每周工时上限（None 表示按规则配置）
         
         self.setup_ui()
         
@@ -274,6 +278,30 @@ class ExcelReportApp:
         )
         output_btn.pack(side='right')
         
+        # 周工时上限（留空时按规则配置，各公司可在 attendance_rules.json 中分别设置 weekly_hours_limit）
+        weekly_frame = tk.Frame(main_frame, bg='#F2F2F7')
+        weekly_frame.pack(pady=(0, 15), padx=20, fill='x')
+
+        weekly_label = tk.Label(
+            weekly_frame,
+            text="⏱ 每周工时上限（小时，留空按规则配置，默认 44）",
+            font=('SimSun', 11),
+            bg='#F2F2F7',
+            fg='#1C1C1E'
+        )
+        weekly_label.pack(side='left')
+
+        self.weekly_limit_var = tk.StringVar()
+        weekly_entry = tk.Entry(
+            weekly_frame,
+            textvariable=self.weekly_limit_var,
+            font=('SimSun', 11),
+            width=8,
+            relief='solid',
+            bd=1
+        )
+        weekly_entry.pack(side='left', padx=(8, 0))
+        
         # 功能特性展示
         features_frame = tk.Frame(main_frame, bg='#F2F2F7')
         features_frame.pack(pady=15, padx=20, fill='x')
@@ -392,6 +420,23 @@ class ExcelReportApp:
             filename = os.path.basename(file_path)
             self.file_display.config(text=filename, fg='#1C1C1E')
             self.status_label.config(text=f"已选择文件: {filename}")
+            self._preflight(file_path)
+    
+    def _preflight(self, file_path):
+        """预检所选文件（只读工作表名和前几行），有问题时提示"""
+        try:
+            report = preflight_scan(file_path, ExcelReportGenerator())
+        except Exception as e:
+            messagebox.showwarning("预检失败", f"无法预检该文件，可能不是签到表:\n\n{e}")
+            return
+        
+        filename = os.path.basename(file_path)
+        self.status_label.config(
+            text=f"已选择文件: {filename}｜{len(report.day_sheets)} 个日期工作表，"
+                 f"约 {report.estimated_records} 条记录，预计 {max(1, round(report.predicted_seconds))} 秒"
+        )
+        if report.problems:
+            messagebox.showwarning("预检发现问题", '\n'.join(report.summary_lines()))
     
     def select_output_dir(self):
         """选择输出目录"""
@@ -456,19 +501,10 @@ class ExcelReportApp:
             generator.read_input_excel(self.selected_file)
             
             if not generator.raw_data:
-                raise Exception("没有读取到有效数据")
+                raise Exception("\n".join(["没有读取到有效数据"] + generator.errors.summary_lines()))
             
             # 生成报表
-            generated_files = []
-            companies = sorted(generator.companies)
-            
-            for i, company in enumerate(companies):
-                progress_window.update_status(f"正在生成 {company} 的工时报表... ({i+1}/{len(companies)})")
-                
-                report_info = generator.generate_company_report(company)
-                if report_info:
-                    filepath = generator.save_company_report(report_info, self.output_dir)
-                    generated_files.append(filepath)
+            generated_files = self._generate_work_hours(generator, progress_window, "正在生成")
             
             # 保存生成的文件路径（用于后续生成考勤统计）
             self.generated_work_hours_files = generated_files
@@ -483,6 +519,7 @@ class ExcelReportApp:
             success_msg += f"\n📁 保存位置: {self.output_dir}"
             
             messagebox.showinfo("成功", success_msg)
+            self._report_errors(generator.errors, 'employee_hours')
             
             # 更新状态
             self.root.after(0, lambda: self.status_label.config(text=f"已生成 {len(generated_files)} 个工时报表文件"))
@@ -496,10 +533,63 @@ class ExcelReportApp:
             
             self.root.after(0, lambda: self.status_label.config(text="生成失败"))
     
+    def _generate_work_hours(self, generator, progress_window, status_prefix):
+        """
+        逐个公司生成工时报表，单个公司出错记入 generator.errors 后继续
+        
+        Returns:
+            list: 成功生成的报表路径
+        """
+        generated_files = []
+        companies = sorted(generator.companies)
+        
+        # 保存在后台线程进行，与下一个公司的报表生成重叠
+        with BackgroundSaver() as saver:
+            for i, company in enumerate(companies):
+                progress_window.update_status(f"{status_prefix} {company} 的工时报表... ({i+1}/{len(companies)})")
+                
+                with generator.errors.capture(STAGE_COMPANY, company):
+                    report_info = generator.generate_company_report(company)
+                    if report_info:
+                        filepath = generator.save_company_report(report_info, self.output_dir, saver=saver)
+                        generated_files.append(filepath)
+        
+        generator.errors.add_save_errors(saver)
+        failed = {label for label, _ in saver.errors}
+        return [path for path in generated_files if path not in failed]
+    
+    def _report_errors(self, errors, report_kind=None):
+        """部分工作表/公司出错时提示（报表其余部分已生成）；report_kind 不为空时写出错误报告"""
+        if not errors:
+            return
+        lines = errors.summary_lines()
+        if report_kind is not None:
+            lines.append(f"\n错误报告: {errors.save(error_report_path(self.output_dir, report_kind))}")
+        messagebox.showwarning("部分内容未生成", "\n".join(lines))
+    
     def _show_progress(self):
         """显示进度状态"""
         self.status_label.config(text="正在生成报表...")
     
+    def _weekly_limit(self):
+        """
+        界面上填写的每周工时上限
+        
+        Returns:
+            tuple: (是否有效, 上限)；留空时上限为 None（按规则配置）
+        """
+        text = self.weekly_limit_var.get().strip()
+        if not text:
+            return True, None
+        try:
+            limit = float(text)
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            messagebox.showerror("错误", f"每周工时上限应为正数: {text}")
+            return False, None
+        return True, limit
+    
     def generate_attendance_stats(self):
         """生成考勤统计报表"""
         if not self.selected_file:
@@ -510,6 +600,10 @@ class ExcelReportApp:
             messagebox.showerror("错误", "选择的文件不存在")
             return
         
+        valid, self.weekly_limit = self._weekly_limit()
+        if not valid:
+            return
+        
         # 在新线程中执行生成任务
         thread = threading.Thread(target=self._generate_attendance_stats_thread)
         thread.daemon = True
@@ -524,8 +618,8 @@ class ExcelReportApp:
             progress_window = ProgressWindow(self.root)
             progress_window.update_status("正在生成考勤统计报表...")
             
-            # 调用考勤统计生成函数
-            generate_attendance_stats(self.selected_file, self.output_dir)
+            # 调用考勤统计生成函数（出错的工作表/公司已写入错误报告）
+            errors = generate_attendance_stats(self.selected_file, self.output_dir, weekly_limit=self.weekly_limit)
             
             # 关闭进度窗口
             progress_window.close()
@@ -533,6 +627,7 @@ class ExcelReportApp:
             # 显示成功消息
             success_msg = f"✅ 考勤统计报表生成完成!\n\n📁 保存位置: {self.output_dir}"
             messagebox.showinfo("成功", success_msg)
+            self._report_errors(errors, 'attendance_stats')
             
             # 更新状态
             self.root.after(0, lambda: self.status_label.config(text="考勤统计报表已生成"))
@@ -556,6 +651,10 @@ class ExcelReportApp:
             messagebox.showerror("错误", "选择的文件不存在")
             return
         
+        valid, self.weekly_limit = self._weekly_limit()
+        if not valid:
+            return
+        
         # 在新线程中执行生成任务
         thread = threading.Thread(target=self._generate_all_reports_thread)
         thread.daemon = True
@@ -576,24 +675,17 @@ class ExcelReportApp:
             generator.read_input_excel(self.selected_file)
             
             if not generator.raw_data:
-                raise Exception("没有读取到有效数据")
+                raise Exception("\n".join(["没有读取到有效数据"] + generator.errors.summary_lines()))
             
             # 生成工时报表
-            work_hours_files = []
             companies = sorted(generator.companies)
-            
-            for i, company in enumerate(companies):
-                progress_window.update_status(f"[1/2] 正在生成 {company} 的工时报表... ({i+1}/{len(companies)})")
-                
-                report_info = generator.generate_company_report(company)
-                if report_info:
-                    filepath = generator.save_company_report(report_info, self.output_dir)
-                    work_hours_files.append(filepath)
+            work_hours_files = self._generate_work_hours(generator, progress_window, "[1/2] 正在生成")
             
             # ===== 第二步：生成考勤统计 =====
             progress_window.update_status("[2/2] 正在生成考勤统计报表...")
             
-            generate_attendance_stats(self.selected_file, self.output_dir)
+            stats_errors = generate_attendance_stats(self.selected_file, self.output_dir,
+                                                     weekly_limit=self.weekly_limit)
             
             # 关闭进度窗口
             progress_window.close()
@@ -605,6 +697,8 @@ class ExcelReportApp:
             success_msg += f"\n📁 保存位置: {self.output_dir}"
             
             messagebox.showinfo("成功", success_msg)
+            self._report_errors(generator.errors, 'employee_hours')
+            self._report_errors(stats_errors, 'attendance_stats')
             
             # 更新状态
             total_files = len(work_hours_files) + len(companies)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多现场合并 - 同一个月各现场分别提交的签到表合并为一套按公司的工时报表和考勤统计报表
+
+各签到表按给出的顺序依次流过同一条考勤流水线（逐个工作表读取、整理、计算），
+整理时按摘要去掉重复提交的相同签到；员工顺序为合并后的首次出现顺序，与签到表顺序一致。
+
+    python merge_sites.py 一号现场/6月劳务签到表.xls 二号现场/6月劳务签到表.xls -o output
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from attendance_pipeline import AttendancePipeline
+from attendance_rules import DEFAULT_RULES_FILENAME, load_rule_book
+from consolidated_report import CONSOLIDATED_REPORT_NAME, consolidate, write_consolidated_report
+from error_report import STAGE_COMPANY, STAGE_FILE, STAGE_SAVE, ErrorReport, error_report_path
+from excel_report_generator_fixed import ExcelReportGenerator
+from report_saver import BackgroundSaver
+from run_attendance_stats import generate_excel_report, plan_stats_layout
+
+
+def merge_workbooks(input_files: List[str], output_dir: str, rules_file: Optional[str] = None,
+                    use_lookup_table: bool = False, engine: str = 'openpyxl', flat: bool = False,
+                    save_workers: int = 2) -> ErrorReport:
+    """
+    合并同一个月的多份签到表并生成各公司的报表
+
+    Args:
+        input_files: 签到表路径（顺序决定重复签到保留哪一份和员工顺序）
+        output_dir: 输出目录
+        rules_file: 考勤规则配置文件（默认查找第一份签到表同目录下的 attendance_rules.json）
+        use_lookup_table / engine / flat / save_workers: 同 generate_attendance_stats
+
+    Returns:
+        ErrorReport: 处理中出错的签到表/工作表/公司（其余部分照常生成），有错误时同时写出 JSON 错误报告
+    """
+    if rules_file is None:
+        rules_file = os.path.join(os.path.dirname(os.path.abspath(input_files[0])), DEFAULT_RULES_FILENAME)
+
+    print(f"🔀 合并 {len(input_files)} 份签到表")
+    generator = ExcelReportGenerator()
+    pipeline = AttendancePipeline(generator, load_rule_book(rules_file), use_lookup_table=use_lookup_table,
+                                  deduplicate=True)
+    company_statistics = pipeline.run_many(input_files)
+    errors = generator.errors
+    errors.source = ', '.join(input_files)
+
+    for input_file, count in pipeline.duplicates.items():
+        print(f"  {os.path.basename(input_file)}: 去掉重复签到 {count} 条")
+    print(f"合并后共 {len(generator.raw_data)} 条记录")
+
+    # 报表月份与单个签到表相同，由最早的签到确定；个别超出该月的记录与单个签到表一样在生成报表时处理
+    months = {path: (first_date.year, first_date.month) for path, first_date in pipeline.first_dates.items()}
+    if len(set(months.values())) > 1:
+        errors.add(STAGE_FILE, errors.source, ValueError("签到表不是同一个月: " + ', '.join(
+            f"{os.path.basename(path)} {year}-{month:02d}" for path, (year, month) in months.items())))
+    elif generator.raw_data:
+        _generate_merged_reports(generator, company_statistics, output_dir, engine, flat, save_workers)
+    else:
+        print("❌ 没有读取到有效数据")
+
+    if errors:
+        print("\n❌ " + "\n".join(errors.summary_lines()))
+        print(f"错误报告: {errors.save(error_report_path(output_dir, 'merge_sites'))}")
+    return errors
+
+
+def _generate_merged_reports(generator, company_statistics, output_dir, engine, flat, save_workers):
+    """按公司生成工时报表和考勤统计报表，另加全部公司汇总"""
+    errors = generator.errors
+    saver = BackgroundSaver(max_workers=save_workers) if save_workers > 0 else None
+    try:
+        for company in sorted(generator.companies):
+            print(f"\n正在生成 {company} 的报表...")
+            with errors.capture(STAGE_COMPANY, company):
+                report_info = generator.generate_company_report(company)
+                if report_info:
+                    generator.save_company_report(report_info, output_dir, engine=engine, flat=flat, saver=saver)
+
+                statistics = company_statistics.get(company)
+                if statistics:
+                    output_file = os.path.join(output_dir, f"attendance_stats-{statistics[0]['month']:02d}-{company}.xlsx")
+                    generate_excel_report(statistics, output_file, layout=plan_stats_layout(statistics),
+                                          engine=engine, flat=flat, saver=saver)
+
+        merged = {company: statistics for company, statistics in company_statistics.items() if statistics}
+        if merged:
+            with errors.capture(STAGE_SAVE, CONSOLIDATED_REPORT_NAME):
+                summary = consolidate(merged)
+                write_consolidated_report(
+                    summary, os.path.join(output_dir, CONSOLIDATED_REPORT_NAME.format(f"{summary.month:02d}")))
+    finally:
+        if saver is not None:
+            saver.close()
+    if saver is not None:
+        errors.add_save_errors(saver)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='合并同一个月多个现场的签到表，去掉重复签到后生成一套报表')
+    parser.add_argument('input_files', nargs='+', help='签到表路径（按顺序合并）')
+    parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    parser.add_argument('--rules', default=None, help='考勤规则配置文件')
+    parser.add_argument('--engine', choices=['openpyxl', 'stream'], default='openpyxl', help='写出方式')
+    parser.add_argument('--flat', action='store_true', help='平铺模式')
+    args = parser.parse_args()
+
+    missing = [path for path in args.input_files if not os.path.exists(path)]
+    if missing:
+        print(f"错误: 输入文件不存在: {', '.join(missing)}")
+        sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+
+    if merge_workbooks(args.input_files, args.output, rules_file=args.rules, engine=args.engine, flat=args.flat):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
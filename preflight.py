@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预检 - 只读取工作表名和每个工作表的前几行，快速估算工作量
+
+在完整解析之前发现选错文件、表头不对等问题，并给出记录数和耗时的估计。
+"""
+
+import os
+import time
+from typing import Dict, List, Optional
+
+import xlrd
+from openpyxl import load_workbook
+
+from sheet_schema import HEADER_SCAN_ROWS, SchemaResolver, map_columns, normalize_header
+
+# 每个工作表读取的样本行数（含表头之前的行）
+PREFLIGHT_ROWS = 40
+
+# 每条记录的估计耗时（秒）：读取解析、生成工时报表和考勤统计
+SECONDS_PER_RECORD_READ = 1.6e-4
+SECONDS_PER_RECORD_REPORT = 1.0e-4
+
+
+class SheetPreview:
+    """单个工作表的预检结果"""
+
+    def __init__(self, name: str, work_date=None, header_row: Optional[int] = None,
+                 columns: Optional[Dict[str, Optional[str]]] = None, total_rows: Optional[int] = None,
+                 companies: Optional[List[str]] = None):
+        self.name = name
+        self.work_date = work_date
+        self.header_row = header_row
+        self.columns = columns or {}
+        self.total_rows = total_rows
+        self.companies = companies or []
+
+    @property
+    def is_day_sheet(self) -> bool:
+        return self.work_date is not None
+
+    @property
+    def estimated_records(self) -> int:
+        """表头之后的行数（包含少量 "白班安排" 之类的非记录行）"""
+        if self.total_rows is None or self.header_row is None:
+            return 0
+        return max(0, self.total_rows - self.header_row - 1)
+
+
+class PreflightReport:
+    """整份签到表的预检结果"""
+
+    def __init__(self, file_path: str, sheets: List[SheetPreview], elapsed: float):
+        self.file_path = file_path
+        self.sheets = sheets
+        self.elapsed = elapsed
+
+    @property
+    def day_sheets(self) -> List[SheetPreview]:
+        return [sheet for sheet in self.sheets if sheet.is_day_sheet]
+
+    @property
+    def skipped_sheets(self) -> List[str]:
+        return [sheet.name for sheet in self.sheets if not sheet.is_day_sheet]
+
+    @property
+    def estimated_records(self) -> int:
+        return sum(sheet.estimated_records for sheet in self.day_sheets)
+
+    @property
+    def companies(self) -> List[str]:
+        seen = {}
+        for sheet in self.day_sheets:
+            for company in sheet.companies:
+                seen.setdefault(company, None)
+        return sorted(seen)
+
+    @property
+    def predicted_seconds(self) -> float:
+        return self.estimated_records * (SECONDS_PER_RECORD_READ + SECONDS_PER_RECORD_REPORT)
+
+    @property
+    def problems(self) -> List[str]:
+        """会导致读不出数据的问题"""
+        problems = []
+        if not self.day_sheets:
+            problems.append("没有可识别日期的工作表（工作表名应为 \"月.日\"，如 6.1）")
+        for sheet in self.day_sheets:
+            missing = [field for field in ('name', 'company', 'start_time', 'end_time')
+                       if sheet.columns.get(field) is None]
+            if sheet.header_row is None:
+                problems.append(f"工作表 {sheet.name}: 前 {HEADER_SCAN_ROWS} 行内找不到表头（姓名、劳务公司）")
+            elif missing:
+                problems.append(f"工作表 {sheet.name}: 缺少列 {', '.join(missing)}")
+        return problems
+
+    def summary_lines(self) -> List[str]:
+        """预检结果说明（逐行）"""
+        day_sheets = self.day_sheets
+        lines = [f"预检: {os.path.basename(self.file_path)}（用时 {self.elapsed:.2f} 秒）"]
+        if day_sheets:
+            lines.append(f"  日期工作表: {len(day_sheets)} 个（{day_sheets[0].name} ~ {day_sheets[-1].name}）")
+            columns = {}
+            for sheet in day_sheets:
+                for field, label in sheet.columns.items():
+                    if label is not None:
+                        columns.setdefault(field, label)
+            lines.append(f"  识别的列: {', '.join(str(label) for label in columns.values())}")
+        if self.skipped_sheets:
+            lines.append(f"  跳过的工作表: {', '.join(self.skipped_sheets)}")
+        lines.append(f"  估计记录数: 约 {self.estimated_records} 条")
+        lines.append(f"  样本中的公司: {', '.join(self.companies) or '无'}")
+        lines.append(f"  预计耗时: 约 {max(1, round(self.predicted_seconds))} 秒")
+        for problem in self.problems:
+            lines.append(f"  ⚠ {problem}")
+        return lines
+
+
+def _read_xlsx_samples(file_path: str, rows: int):
+    """xlsx：只读模式打开，行数取自工作表的 dimension 信息，不遍历数据"""
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            sample = [list(values) for values in ws.iter_rows(max_row=rows, values_only=True)]
+            yield ws.title, sample, ws.max_row
+    finally:
+        wb.close()
+
+
+def _read_xls_samples(file_path: str, rows: int):
+    """xls：按需加载工作表，读取后立即释放"""
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        for name in book.sheet_names():
+            sheet = book.sheet_by_name(name)
+            sample = [sheet.row_values(index) for index in range(min(rows, sheet.nrows))]
+            yield name, sample, sheet.nrows
+            book.unload_sheet(name)
+    finally:
+        book.release_resources()
+
+
+def preflight_scan(file_path: str, generator, sample_rows: int = PREFLIGHT_ROWS) -> PreflightReport:
+    """
+    预检签到表
+
+    Args:
+        file_path: 签到表路径（.xlsx / .xls）
+        generator: ExcelReportGenerator，用其 parse_sheet_date 识别日期工作表
+        sample_rows: 每个工作表读取的行数
+
+    Returns:
+        PreflightReport: 预检结果
+    """
+    started = time.perf_counter()
+    reader = _read_xls_samples if file_path.lower().endswith('.xls') else _read_xlsx_samples
+
+    sheets = []
+    for name, sample, total_rows in reader(file_path, sample_rows):
+        work_date = generator.parse_sheet_date(name)
+        if work_date is None:
+            sheets.append(SheetPreview(name))
+            continue
+
+        rows = [tuple(normalize_header(value) for value in values) for values in sample[:HEADER_SCAN_ROWS]]
+        header_row = SchemaResolver.detect_header_row(rows)
+        columns, companies = {}, []
+        if header_row is not None:
+            header = sample[header_row]
+            columns = map_columns(normalize_header(value) for value in header)
+            company_label = columns.get('company')
+            if company_label is not None:
+                position = [normalize_header(value) for value in header].index(company_label)
+                seen = {}
+                for values in sample[header_row + 1:]:
+                    if position < len(values) and values[position] is not None:
+                        # 与 normalize_sheet 一致只去掉首尾空白（"公司 C" 保持原样）
+                        company = str(values[position]).strip()
+                        if company and company != 'nan' and normalize_header(company) != '劳务公司':
+                            seen.setdefault(company, None)
+                companies = list(seen)
+        sheets.append(SheetPreview(name, work_date, header_row, columns, total_rows, companies))
+
+    return PreflightReport(file_path, sheets, time.perf_counter() - started)
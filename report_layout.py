@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报表列布局规划 - 工时报表与考勤统计共用的日期列布局
+"""
+
+import calendar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 日期列最多覆盖到的日（考勤统计按 1~31 日排布，跨月混入的记录也计入）
+MAX_DAY = 31
+
+
+class ColumnPlan:
+    """
+    日期列的具体排布
+
+    days 中每项为 (日期, 起始列号, 占用列数)，列号从1开始
+    """
+
+    def __init__(self, first_col: int, days: List[Tuple[int, int, int]]):
+        self.first_col = first_col
+        self.days = days
+        self.offsets = {day: start_col for day, start_col, _ in days}
+        self.spans = {day: span for day, _, span in days}
+        # 日期列之后的第一列（汇总列起始位置）
+        self.next_col = days[-1][1] + days[-1][2] if days else first_col
+        # 需要合并表头的列范围 (起始列, 结束列)
+        self.merged_ranges = [(start_col, start_col + span - 1) for _, start_col, span in days if span > 1]
+
+    @property
+    def last_col(self) -> int:
+        """最后一个日期列的列号"""
+        return self.next_col - 1
+
+    @property
+    def slot_count(self) -> int:
+        """日期列总数（多次签到展开后）"""
+        return self.next_col - self.first_col
+
+
+class MonthLayout:
+    """
+    公司月度列布局
+
+    记录每天单个员工的最大签到次数，由此推导各报表的列排布。
+    同一份布局可在缓存、并行写出时直接复用。
+    """
+
+    def __init__(self, year: int, month: int, daily_max: Dict[int, int], last_day: Optional[int] = None):
+        """
+        Args:
+            last_day: 日期列覆盖到的最后一天；默认为该月天数，考勤统计用 MAX_DAY
+        """
+        self.year = year
+        self.month = month
+        self.days_in_month = calendar.monthrange(year, month)[1]
+        # 每天最大签到次数（无数据的日期为0）
+        self.daily_max = {day: daily_max.get(day, 0) for day in range(1, (last_day or self.days_in_month) + 1)}
+        self._plans = {}
+
+    @classmethod
+    def from_pairs(cls, year: int, month: int, pairs: Iterable[Tuple[object, int]],
+                   last_day: Optional[int] = None) -> 'MonthLayout':
+        """
+        一次遍历 (员工标识, 日期) 序列计算布局
+
+        Args:
+            year: 年份
+            month: 月份
+            pairs: 每条签到记录对应的 (员工标识, 日) 元组
+            last_day: 日期列覆盖到的最后一天（见 __init__）
+
+        Returns:
+            MonthLayout: 月度布局
+        """
+        counts = {}
+        daily_max = {}
+        for key in pairs:
+            count = counts.get(key, 0) + 1
+            counts[key] = count
+            day = key[1]
+            if count > daily_max.get(day, 0):
+                daily_max[day] = count
+        return cls(year, month, daily_max, last_day)
+
+    @property
+    def max_daily_records(self) -> Dict[int, int]:
+        """每天的签到列数（至少1列），对应工时报表的列排布"""
+        return {day: max(count, 1) for day, count in self.daily_max.items()}
+
+    @property
+    def signature(self) -> tuple:
+        """布局签名：年月相同且各天列数相同的布局可共用表头"""
+        return (self.year, self.month, tuple(self.daily_max.values()))
+
+    def columns(self, first_col: int, min_span: int = 1) -> ColumnPlan:
+        """
+        计算日期列排布
+
+        Args:
+            first_col: 第一个日期列的列号
+            min_span: 每天最少占用列数；为0时跳过没有数据的日期
+
+        Returns:
+            ColumnPlan: 列排布（按参数缓存）
+        """
+        key = (first_col, min_span)
+        if key not in self._plans:
+            days = []
+            col = first_col
+            for day, count in self.daily_max.items():
+                span = max(count, min_span)
+                if span == 0:
+                    continue
+                days.append((day, col, span))
+                col += span
+            self._plans[key] = ColumnPlan(first_col, days)
+        return self._plans[key]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台保存 - 报表生成后交给有界线程池保存，压缩和写盘与下一个公司的报表生成重叠进行
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple
+
+
+class BackgroundSaver:
+    """
+    有界的后台保存线程池
+
+    zlib 压缩和文件写入会释放 GIL，保存可与主线程生成下一份报表并行。
+    同时在保存或排队的报表不超过 max_workers + max_pending 份，
+    超过时 submit 阻塞等待，避免已生成未保存的工作簿占用过多内存。
+
+    用法：
+        with BackgroundSaver() as saver:
+            for ...:
+                saver.submit(lambda: wb.save(path), path)
+        if saver.errors:
+            ...
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 2):
+        """
+        Args:
+            max_workers: 保存线程数
+            max_pending: 等待保存的报表上限（不含正在保存的）
+        """
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='report-save')
+        self._slots = threading.BoundedSemaphore(max(1, max_workers) + max(0, max_pending))
+        self._lock = threading.Lock()
+        self.errors: List[Tuple[str, Exception]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, save: Callable[[], object], label: str):
+        """
+        提交保存任务（排队已满时阻塞）
+
+        Args:
+            save: 无参数的保存函数
+            label: 出错时报告用的名称（通常为文件路径）
+        """
+        self._slots.acquire()
+        try:
+            self._pool.submit(self._run, save, label)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _run(self, save, label):
+        try:
+            save()
+        except Exception as e:
+            with self._lock:
+                self.errors.append((label, e))
+            print(f"✗ 保存失败: {label}: {e}")
+        finally:
+            self._slots.release()
+
+    def close(self) -> List[Tuple[str, Exception]]:
+        """等待全部保存完成"""
+        self._pool.shutdown(wait=True)
+        return self.errors
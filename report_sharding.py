@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报表分片 - 人数很多的公司按人数或目标文件大小拆分为多个工作表或多个文件
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from report_templates import CENTER_ALIGN, THIN_BORDER, HOURS_HEADER_FONT, HOURS_DATA_FONT
+from xlsx_stream_writer import StreamingWorkbook, style_id
+
+# 压缩后每个单元格的估算字节数（用于按目标文件大小分片）
+ESTIMATED_BYTES_PER_CELL = 4
+
+INDEX_SHEET_TITLE = '索引'
+INDEX_HEADERS = ['分片', '位置', '序号范围', '员工数', '首位员工', '末位员工']
+INDEX_WIDTHS = {1: 8, 2: 40, 3: 14, 4: 10, 5: 14, 6: 14}
+
+
+class ShardOptions:
+    """分片设置"""
+
+    MODES = ('files', 'sheets')
+
+    def __init__(self, max_employees: Optional[int] = None, target_bytes: Optional[int] = None,
+                 mode: str = 'files', workers: int = 4):
+        """
+        Args:
+            max_employees: 每个分片的最大员工数
+            target_bytes: 每个分片的目标文件大小（字节），按单元格数估算
+            mode: 'files' 拆分为多个编号文件；'sheets' 在同一工作簿内拆分为多个工作表
+            workers: 并行写出分片的线程数
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的分片方式: {mode}")
+        self.max_employees = max_employees
+        self.target_bytes = target_bytes
+        self.mode = mode
+        self.workers = max(1, workers)
+
+    def employees_per_shard(self, cells_per_employee: int) -> Optional[int]:
+        """每个分片的员工数；未设置任何限制时返回 None"""
+        limits = []
+        if self.max_employees:
+            limits.append(self.max_employees)
+        if self.target_bytes:
+            limits.append(max(1, self.target_bytes // (cells_per_employee * ESTIMATED_BYTES_PER_CELL)))
+        return min(limits) if limits else None
+
+
+def plan_shards(count: int, per_shard: Optional[int]) -> List[Tuple[int, int]]:
+    """按每片人数划分 [起始, 结束) 区间；不需要拆分时只有一片"""
+    if not per_shard or count <= per_shard:
+        return [(0, count)]
+    return [(start, min(start + per_shard, count)) for start in range(0, count, per_shard)]
+
+
+class Shard:
+    """单个分片：员工区间 [start, end) 及交给写出函数的数据"""
+
+    def __init__(self, number: int, start: int, end: int, names: List[str], payload):
+        self.number = number
+        self.start = start
+        self.end = end
+        self.first_name = names[0] if names else ''
+        self.last_name = names[-1] if names else ''
+        self.payload = payload
+
+
+def _index_rows(shards: List[Shard], locations: List[str]) -> List[list]:
+    return [
+        [shard.number, location, f"{shard.start + 1}-{shard.end}", shard.end - shard.start,
+         shard.first_name, shard.last_name]
+        for shard, location in zip(shards, locations)
+    ]
+
+
+def _fill_index_openpyxl(ws, rows: List[list]):
+    for row_idx, values in enumerate([INDEX_HEADERS] + rows, 1):
+        font = HOURS_HEADER_FONT if row_idx == 1 else HOURS_DATA_FONT
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.font = font
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+    for col, width in INDEX_WIDTHS.items():
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+
+def _write_index_stream(wb: StreamingWorkbook, rows: List[list]):
+    header = style_id(HOURS_HEADER_FONT, None, THIN_BORDER, CENTER_ALIGN)
+    data = style_id(HOURS_DATA_FONT, None, THIN_BORDER, CENTER_ALIGN)
+    sheet = wb.add_sheet(INDEX_SHEET_TITLE, column_widths=INDEX_WIDTHS)
+    for row_idx, values in enumerate([INDEX_HEADERS] + rows, 1):
+        style = header if row_idx == 1 else data
+        sheet.write_row(row_idx, [(col, value, style) for col, value in enumerate(values, 1)])
+    sheet.close()
+
+
+def sharded_report_path(filepath: str, options: ShardOptions) -> str:
+    """分片输出的入口文件：files 模式为索引文件，sheets 模式为原文件"""
+    if options.mode == 'files':
+        base, ext = os.path.splitext(filepath)
+        return f"{base}-{INDEX_SHEET_TITLE}{ext}"
+    return filepath
+
+
+def write_sharded_report(filepath: str, sheet_title: str, shards: List[Shard], options: ShardOptions,
+                         engine: str, fill_openpyxl: Callable, fill_stream: Callable) -> List[str]:
+    """
+    写出分片报表及索引
+
+    - files 模式：每片一个编号文件（并行写出），另生成 "-索引" 文件列出各分片
+    - sheets 模式：同一工作簿内第一个工作表为索引，其后每片一个工作表；
+      stream 方式下各工作表并行生成，openpyxl 工作簿不支持多线程写入，按顺序生成
+
+    Args:
+        filepath: 未分片时的输出路径
+        sheet_title: 原工作表名
+        shards: 分片列表
+        options: 分片设置
+        engine: 'openpyxl' 或 'stream'
+        fill_openpyxl: fill_openpyxl(ws, payload) 向 openpyxl 工作表写入一片数据
+        fill_stream: fill_stream(wb, title, payload) 向流式工作簿写入一片数据
+
+    Returns:
+        list: 生成的文件路径（索引在前）
+    """
+    base, ext = os.path.splitext(filepath)
+
+    if options.mode == 'files':
+        paths = [f"{base}-{shard.number:02d}{ext}" for shard in shards]
+
+        def write_file(path, payload):
+            if engine == 'stream':
+                with StreamingWorkbook(path) as wb:
+                    fill_stream(wb, sheet_title, payload)
+            else:
+                wb = Workbook()
+                ws = wb.active
+                ws.title = sheet_title
+                fill_openpyxl(ws, payload)
+                wb.save(path)
+
+        with ThreadPoolExecutor(max_workers=options.workers) as pool:
+            futures = [pool.submit(write_file, path, shard.payload) for path, shard in zip(paths, shards)]
+            for future in futures:
+                future.result()
+
+        index_path = sharded_report_path(filepath, options)
+        rows = _index_rows(shards, [os.path.basename(path) for path in paths])
+        wb = Workbook()
+        ws = wb.active
+        ws.title = INDEX_SHEET_TITLE
+        _fill_index_openpyxl(ws, rows)
+        wb.save(index_path)
+        return [index_path] + paths
+
+    titles = [f"{sheet_title}-{shard.number:02d}" for shard in shards]
+    rows = _index_rows(shards, titles)
+
+    if engine == 'stream':
+        with StreamingWorkbook(filepath) as wb:
+            _write_index_stream(wb, rows)
+            for title in titles:
+                wb.reserve_sheet(title)
+            with ThreadPoolExecutor(max_workers=options.workers) as pool:
+                futures = [pool.submit(fill_stream, wb, title, shard.payload)
+                           for title, shard in zip(titles, shards)]
+                for future in futures:
+                    future.result()
+    else:
+        wb = Workbook()
+        ws = wb.active
+        ws.title = INDEX_SHEET_TITLE
+        _fill_index_openpyxl(ws, rows)
+        for title, shard in zip(titles, shards):
+            fill_openpyxl(wb.create_sheet(title), shard.payload)
+        wb.save(filepath)
+
+    return [filepath]
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+报表表头模板 - 按月度布局预先生成表头块，各公司报表直接套用
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+from openpyxl.utils import get_column_letter
+
+# 通用样式
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+CENTER_ALIGN = Alignment(horizontal='center', vertical='center')
+CENTER_WRAP_ALIGN = Alignment(horizontal='center', vertical='center', wrap_text=True)
+LEFT_ALIGN = Alignment(horizontal='left', vertical='center')
+
+# 工时报表样式
+HOURS_TITLE_FONT = Font(name='SimSun', bold=True, size=12)
+HOURS_HEADER_FONT = Font(name='SimSun', size=12)
+HOURS_DATA_FONT = Font(name='SimSun', size=10)
+HOURS_ZEBRA_FILL = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
+
+# 考勤统计样式
+STATS_TITLE_FONT = Font(name='SimSun', size=14, bold=True)
+STATS_HEADER_FONT = Font(name='SimSun', size=12, bold=True)
+STATS_DATA_FONT = Font(name='SimSun', size=10)
+STATS_HEADER_FILL = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
+STATS_NIGHT_FILL = PatternFill(start_color='FFF9C4', end_color='FFF9C4', fill_type='solid')
+STATS_ZEBRA_FILL_1 = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
+STATS_ZEBRA_FILL_2 = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
+
+# 考勤统计汇总列
+STATS_SUMMARY_TITLES = ['出勤次数', '总工时', '夜班补贴次数', '夜班补贴']
+STATS_SUMMARY_WIDTHS = [10, 10, 12, 10]
+
+WEEKDAY_NAMES = ['一', '二', '三', '四', '五', '六', '日']
+
+
+class CellStyle:
+    """单元格样式组合（None 表示不设置）"""
+
+    __slots__ = ('font', 'alignment', 'fill', 'border')
+
+    def __init__(self, font=None, alignment=None, fill=None, border=None):
+        self.font = font
+        self.alignment = alignment
+        self.fill = fill
+        self.border = border
+
+    def apply(self, cell):
+        if self.font is not None:
+            cell.font = self.font
+        if self.alignment is not None:
+            cell.alignment = self.alignment
+        if self.fill is not None:
+            cell.fill = self.fill
+        if self.border is not None:
+            cell.border = self.border
+
+
+class HeaderBlock:
+    """
+    预先生成的表头块
+
+    - merged_ranges: 合并区域 (起始行, 起始列, 结束行, 结束列)
+    - cells: 单元格 (行, 列, 值, 样式)，值为 None 时只设置样式
+    - frame: 表头区域统一加边框的 (行数, 列数)，为 None 时不加
+    - column_widths: 列宽 {列号: 宽度}
+    """
+
+    def __init__(self, header_rows: int, total_cols: int,
+                 merged_ranges: List[Tuple[int, int, int, int]],
+                 cells: List[Tuple[int, int, object, CellStyle]],
+                 frame: Optional[Tuple[int, int]] = None,
+                 column_widths: Optional[Dict[int, float]] = None):
+        self.header_rows = header_rows
+        self.total_cols = total_cols
+        self.merged_ranges = merged_ranges
+        self.cells = cells
+        self.frame = frame
+        self.column_widths = column_widths or {}
+        self._grid = None
+
+    def apply(self, ws):
+        """将表头块写入工作表（先合并，再写值和样式，最后加边框）"""
+        for start_row, start_col, end_row, end_col in self.merged_ranges:
+            ws.merge_cells(start_row=start_row, start_column=start_col,
+                           end_row=end_row, end_column=end_col)
+
+        for row, col, value, style in self.cells:
+            cell = ws.cell(row=row, column=col)
+            if value is not None:
+                cell.value = value
+            style.apply(cell)
+
+        if self.frame is not None:
+            rows, cols = self.frame
+            for row in range(1, rows + 1):
+                for col in range(1, cols + 1):
+                    ws.cell(row=row, column=col).border = THIN_BORDER
+
+        for col, width in self.column_widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+    def cell_grid(self) -> List[Tuple[int, List[Tuple[int, object, CellStyle]]]]:
+        """
+        按行展开的表头单元格（与 apply 写入后的最终效果一致），供流式写出使用
+
+        Returns:
+            list: [(行号, [(列号, 值, 样式), ...]), ...]，行、列均升序
+        """
+        if self._grid is None:
+            grid = {}
+            for row, col, value, style in self.cells:
+                old_value, old_style = grid.get((row, col), (None, CellStyle()))
+                merged = CellStyle(
+                    font=style.font or old_style.font,
+                    alignment=style.alignment or old_style.alignment,
+                    fill=style.fill or old_style.fill,
+                    border=style.border or old_style.border,
+                )
+                grid[(row, col)] = (value if value is not None else old_value, merged)
+
+            if self.frame is not None:
+                rows, cols = self.frame
+                for row in range(1, rows + 1):
+                    for col in range(1, cols + 1):
+                        value, style = grid.get((row, col), (None, CellStyle()))
+                        grid[(row, col)] = (value, CellStyle(style.font, style.alignment, style.fill, THIN_BORDER))
+
+            rows = {}
+            for (row, col), (value, style) in sorted(grid.items()):
+                rows.setdefault(row, []).append((col, value, style))
+            self._grid = sorted(rows.items())
+        return self._grid
+
+
+_weekday_cache = {}
+_header_cache = {}
+
+
+def month_weekdays(year: int, month: int, days_in_month: int) -> List[str]:
+    """每月各天的星期名称（每月只计算一次）"""
+    key = (year, month)
+    if key not in _weekday_cache:
+        _weekday_cache[key] = [
+            WEEKDAY_NAMES[datetime(year, month, day).weekday()] for day in range(1, days_in_month + 1)
+        ]
+    return _weekday_cache[key]
+
+
+def hours_header_block(layout, flat: bool = False) -> HeaderBlock:
+    """
+    工时报表表头（标题、序号/姓名/劳务公司/上工时间、星期行、日期行）
+
+    Args:
+        layout: MonthLayout 月度布局
+        flat: 平铺模式，不合并单元格；多次签到的日期用 "日-序号" 子列标题区分
+
+    Returns:
+        HeaderBlock: 按布局签名缓存的表头块
+    """
+    key = ('hours', flat, layout.signature)
+    if key in _header_cache:
+        return _header_cache[key]
+
+    columns = layout.columns(first_col=5, min_span=1)
+    total_cols = columns.last_col
+    weekdays = month_weekdays(layout.year, layout.month, layout.days_in_month)
+
+    header = CellStyle(font=HOURS_HEADER_FONT, alignment=CENTER_ALIGN)
+    header_wrap = CellStyle(font=HOURS_HEADER_FONT, alignment=CENTER_WRAP_ALIGN)
+
+    cells = [
+        (1, 1, f"{layout.year}年{layout.month:02d}月", CellStyle(font=HOURS_TITLE_FONT)),
+        (2, 1, '序号', header),
+        (2, 2, '姓名/日期', header),
+        (2, 3, '劳务\n公司', header_wrap),
+        (2, 4, '上工\n时间', header_wrap),
+        (3, 4, '下工\n时间', header_wrap),
+    ]
+
+    if flat:
+        merged_ranges = []
+        cells.extend([
+            (3, 1, '序号', header),
+            (3, 2, '姓名/日期', header),
+            (3, 3, '劳务\n公司', header_wrap),
+        ])
+        for day, start_col, span in columns.days:
+            for i in range(span):
+                cells.append((2, start_col + i, weekdays[day - 1], header))
+                cells.append((3, start_col + i, day if span == 1 else f"{day}-{i + 1}", header))
+    else:
+        merged_ranges = [(1, 1, 1, total_cols), (2, 1, 3, 1), (2, 2, 3, 2), (2, 3, 3, 3)]
+        for day, start_col, span in columns.days:
+            if span > 1:
+                merged_ranges.append((2, start_col, 2, start_col + span - 1))
+                merged_ranges.append((3, start_col, 3, start_col + span - 1))
+            cells.append((2, start_col, weekdays[day - 1], header))
+            cells.append((3, start_col, day, header))
+
+    block = HeaderBlock(3, total_cols, merged_ranges, cells, frame=(3, total_cols))
+    _header_cache[key] = block
+    return block
+
+
+def stats_header_block(layout, flat: bool = False) -> HeaderBlock:
+    """
+    考勤统计表头（标题、序号/姓名/劳务公司、日期列、汇总列及列宽）
+
+    Args:
+        layout: MonthLayout 月度布局
+        flat: 平铺模式，不合并单元格；多次签到的日期用 "日-序号" 子列标题区分
+
+    Returns:
+        HeaderBlock: 按布局签名缓存的表头块
+    """
+    key = ('stats', flat, layout.signature)
+    if key in _header_cache:
+        return _header_cache[key]
+
+    columns = layout.columns(first_col=4, min_span=0)
+    total_col = columns.next_col
+
+    header = CellStyle(font=STATS_HEADER_FONT, alignment=CENTER_ALIGN, fill=STATS_HEADER_FILL, border=THIN_BORDER)
+    header_span = CellStyle(fill=STATS_HEADER_FILL, border=THIN_BORDER)
+
+    merged_ranges = [] if flat else [(1, 1, 1, 3)]
+    cells = [
+        (1, 1, f"{layout.year}年{layout.month:02d}月", CellStyle(font=STATS_TITLE_FONT, alignment=LEFT_ALIGN)),
+        (3, 1, '序号', header),
+        (3, 2, '姓名/日期', header),
+        (3, 3, '劳务公司', header),
+    ]
+
+    if flat:
+        for day, start_col, span in columns.days:
+            for i in range(span):
+                cells.append((3, start_col + i, f"{day}日" if span == 1 else f"{day}日-{i + 1}", header))
+    else:
+        for start_col, end_col in columns.merged_ranges:
+            merged_ranges.append((3, start_col, 3, end_col))
+        for day, start_col, span in columns.days:
+            cells.append((3, start_col, f"{day}日", header))
+            for i in range(1, span):
+                cells.append((3, start_col + i, None, header_span))
+
+    for i, title in enumerate(STATS_SUMMARY_TITLES):
+        cells.append((3, total_col + i, title, header))
+
+    column_widths = {1: 6, 2: 12, 3: 12}
+    for col in range(columns.first_col, total_col):
+        column_widths[col] = 6
+    for i, width in enumerate(STATS_SUMMARY_WIDTHS):
+        column_widths[total_col + i] = width
+
+    block = HeaderBlock(3, total_col + len(STATS_SUMMARY_TITLES) - 1, merged_ranges, cells,
+                        column_widths=column_widths)
+    _header_cache[key] = block
+    return block
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多月汇总报表 - 从归档的按月汇总生成季度、年初至今的考勤汇总
+
+归档每导入一个月只汇总该月的数据（attendance_archive.rollups），
+出季度或年度汇总时只读取各员工的月度汇总行，不重新计算历史明细。
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from attendance_archive import AttendanceArchive
+from report_templates import (
+    CENTER_ALIGN, THIN_BORDER, STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT,
+    STATS_ZEBRA_FILL_1, STATS_ZEBRA_FILL_2, STATS_SUMMARY_TITLES, STATS_SUMMARY_WIDTHS
+)
+
+
+class RollupPeriod:
+    """汇总区间：某年的若干个连续月份"""
+
+    def __init__(self, year: int, first_month: int, last_month: int, label: str, tag: str):
+        self.year = year
+        self.first_month = first_month
+        self.last_month = last_month
+        self.label = label      # 标题用，如 "2025年第2季度"
+        self.tag = tag          # 文件名用，如 "2025-Q2"
+
+    @classmethod
+    def quarter(cls, year: int, quarter: int) -> 'RollupPeriod':
+        if not 1 <= quarter <= 4:
+            raise ValueError(f"季度应为 1-4: {quarter}")
+        first = (quarter - 1) * 3 + 1
+        return cls(year, first, first + 2, f"{year}年第{quarter}季度", f"{year}-Q{quarter}")
+
+    @classmethod
+    def year_to_date(cls, year: int, through_month: int) -> 'RollupPeriod':
+        if not 1 <= through_month <= 12:
+            raise ValueError(f"月份应为 1-12: {through_month}")
+        return cls(year, 1, through_month, f"{year}年1-{through_month}月累计", f"{year}-YTD{through_month:02d}")
+
+    @property
+    def months(self) -> List[str]:
+        return [f"{self.year}-{month:02d}" for month in range(self.first_month, self.last_month + 1)]
+
+
+def build_rollup_rows(monthly_rows: List[Dict], months: List[str]) -> Dict[str, List[Tuple]]:
+    """
+    月度汇总行 → 按公司的报表行
+
+    Args:
+        monthly_rows: AttendanceArchive.monthly_rollups 的结果
+        months: 区间内的月份（'YYYY-MM'）
+
+    Returns:
+        dict: {公司: [(姓名, 各月工时列表, (出勤次数, 总工时, 夜班补贴次数, 夜班补贴)), ...]}
+              各月工时无数据时为 None
+    """
+    position = {month: index for index, month in enumerate(months)}
+    employees = {}
+    for row in monthly_rows:
+        key = (row['company'], row['employee'])
+        entry = employees.get(key)
+        if entry is None:
+            entry = employees[key] = [[None] * len(months), 0, 0.0, 0, 0.0]
+        entry[0][position[row['month']]] = round(row['total_hours'], 1)
+        entry[1] += row['attendance_days']
+        entry[2] += row['total_hours']
+        entry[3] += row['night_allowance_count']
+        entry[4] += row['night_allowance']
+
+    by_company = {}
+    for (company, employee), (hours, days, total_hours, night_count, night_allowance) in employees.items():
+        by_company.setdefault(company, []).append(
+            (employee, hours, (days, round(total_hours, 1), night_count, round(night_allowance, 1)))
+        )
+    return by_company
+
+
+def write_rollup_report(company: str, rows: List[Tuple], period: RollupPeriod, output_file: str) -> str:
+    """
+    写出一个公司的多月汇总报表
+
+    表头：序号、姓名、劳务公司、各月工时、出勤次数、总工时、夜班补贴次数、夜班补贴
+    """
+    months = period.months
+    titles = ['序号', '姓名', '劳务公司'] + [f"{int(month[5:])}月工时" for month in months] + STATS_SUMMARY_TITLES
+    widths = [6, 12, 14] + [10] * len(months) + STATS_SUMMARY_WIDTHS
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '汇总'
+
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(titles))
+    title = ws.cell(row=1, column=1, value=f"{period.label}考勤汇总 - {company}")
+    title.font = STATS_TITLE_FONT
+    title.alignment = CENTER_ALIGN
+
+    for col, (text, width) in enumerate(zip(titles, widths), 1):
+        cell = ws.cell(row=2, column=col, value=text)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    for index, (employee, hours, summary) in enumerate(rows, 1):
+        fill = STATS_ZEBRA_FILL_1 if index % 2 else STATS_ZEBRA_FILL_2
+        values = [index, employee, company] + hours + list(summary)
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=index + 2, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.fill = fill
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+
+    ws.freeze_panes = 'D3'
+    wb.save(output_file)
+    return output_file
+
+
+def generate_rollup_reports(archive_path: str, period: RollupPeriod, output_dir: str,
+                            companies: Optional[List[str]] = None) -> List[str]:
+    """
+    从归档生成区间汇总报表（每个公司一个文件）
+
+    Returns:
+        list: 生成的报表路径
+    """
+    with AttendanceArchive(archive_path) as archive:
+        monthly_rows = archive.monthly_rollups(period.months[0], period.months[-1], companies)
+
+    generated_files = []
+    for company, rows in build_rollup_rows(monthly_rows, period.months).items():
+        output_file = os.path.join(output_dir, f"attendance_rollup-{period.tag}-{company}.xlsx")
+        generated_files.append(write_rollup_report(company, rows, period, output_file))
+        print(f"已生成汇总: {output_file}")
+    return generated_files
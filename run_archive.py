@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+考勤归档工具 - 导入签到表、从归档重新生成报表、查询员工历史工时
+
+    python run_archive.py import 5月劳务签到表.xls 6月劳务签到表.xls
+    python run_archive.py render 2025-06 -o output --company 公司A
+    python run_archive.py hours 张三 --year 2025
+    python run_archive.py rollup 2025 --quarter 2 -o output
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, datetime
+
+from attendance_archive import DEFAULT_ARCHIVE_FILENAME, AttendanceArchive
+from attendance_pipeline import AttendancePipeline
+from attendance_rules import DEFAULT_RULES_FILENAME, load_rule_book
+from excel_report_generator_fixed import ExcelReportGenerator, parse_cli_date
+from rollup_report import RollupPeriod, generate_rollup_reports
+from run_attendance_stats import archive_month, generate_excel_report, plan_stats_layout
+
+
+def import_workbooks(archive_path, input_files, rules_file=None, use_lookup_table=False):
+    """
+    解析并计算签到表，写入归档（不生成报表）
+
+    Returns:
+        int: 失败的文件数
+    """
+    failures = 0
+    for input_file in input_files:
+        print(f"\n📄 {os.path.basename(input_file)}")
+        path = rules_file or os.path.join(os.path.dirname(os.path.abspath(input_file)), DEFAULT_RULES_FILENAME)
+        generator = ExcelReportGenerator()
+        pipeline = AttendancePipeline(generator, load_rule_book(path), use_lookup_table=use_lookup_table)
+        company_statistics = pipeline.run(input_file)
+        if not generator.raw_data:
+            print("❌ 没有读取到有效数据")
+            failures += 1
+            continue
+        archive_month(archive_path, input_file, generator, company_statistics)
+        if generator.errors:
+            print('\n'.join(generator.errors.summary_lines()))
+            failures += 1
+    return failures
+
+
+def render_month(archive_path, year, month, output_dir, companies=None, engine='openpyxl', flat=False):
+    """
+    从归档生成某月的工时报表和考勤统计报表（不读取原始签到表）
+
+    Returns:
+        list: 生成的报表路径
+    """
+    generated_files = []
+    with AttendanceArchive(archive_path) as archive:
+        for company in companies or archive.companies(year, month):
+            records = archive.load_records(company, year, month)
+            if not records:
+                print(f"跳过 {company}: 归档中没有 {year}-{month:02d} 的记录")
+                continue
+            print(f"\n正在生成 {company} 的报表...")
+
+            generator = ExcelReportGenerator()
+            generator.raw_data = records
+            generator.companies = {company}
+            report_info = generator.generate_company_report(company)
+            generated_files.append(generator.save_company_report(report_info, output_dir, engine=engine, flat=flat))
+
+            statistics = archive.load_statistics(company, year, month)
+            output_file = os.path.join(output_dir, f"attendance_stats-{month:02d}-{company}.xlsx")
+            generate_excel_report(statistics, output_file, layout=plan_stats_layout(statistics),
+                                  engine=engine, flat=flat)
+            generated_files.append(output_file)
+    return generated_files
+
+
+def print_employee_hours(archive_path, employee, start_date=None, end_date=None):
+    """按月列出员工的班次数、有效工时和夜班补贴"""
+    with AttendanceArchive(archive_path) as archive:
+        rows = archive.employee_totals(employee, start_date, end_date)
+    if not rows:
+        print(f"归档中没有 {employee} 的记录")
+        return
+
+    print(f"{'月份':<8} {'公司':<12} {'班次':>6} {'有效工时':>10} {'夜班补贴':>10}")
+    for row in rows:
+        print(f"{row['month']:<8} {row['company']:<12} {row['shifts']:>6} "
+              f"{row['effective_hours']:>10.1f} {row['night_allowance']:>10.1f}")
+    print(f"{'合计':<8} {'':<12} {sum(row['shifts'] for row in rows):>6} "
+          f"{sum(row['effective_hours'] for row in rows):>10.1f} "
+          f"{sum(row['night_allowance'] for row in rows):>10.1f}")
+
+
+def parse_month(value):
+    """命令行月份参数 (YYYY-MM)"""
+    try:
+        parsed = datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"月份格式应为 YYYY-MM: {value}")
+    return parsed.year, parsed.month
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='考勤归档工具')
+    parser.add_argument('--archive', default=DEFAULT_ARCHIVE_FILENAME,
+                        help=f'归档文件路径 (默认: {DEFAULT_ARCHIVE_FILENAME})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help='解析签到表并写入归档（同一文件重复导入不重复写入）')
+    import_parser.add_argument('input_files', nargs='+', help='签到表路径')
+    import_parser.add_argument('--rules', default=None, help='考勤规则配置文件')
+
+    render_parser = commands.add_parser('render', help='从归档生成某月的报表')
+    render_parser.add_argument('month', type=parse_month, help='月份 (YYYY-MM)')
+    render_parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    render_parser.add_argument('--company', action='append', default=None, help='只生成指定公司（可重复给出）')
+    render_parser.add_argument('--engine', choices=['openpyxl', 'stream'], default='openpyxl', help='写出方式')
+    render_parser.add_argument('--flat', action='store_true', help='平铺模式')
+
+    hours_parser = commands.add_parser('hours', help='查询员工历史工时（按月汇总）')
+    hours_parser.add_argument('employee', help='员工姓名')
+    hours_parser.add_argument('--year', type=int, default=None, help='只统计该年')
+    hours_parser.add_argument('--start-date', type=parse_cli_date, default=None, help='起始日期 (YYYY-MM-DD)')
+    hours_parser.add_argument('--end-date', type=parse_cli_date, default=None, help='结束日期 (YYYY-MM-DD)')
+
+    rollup_parser = commands.add_parser('rollup', help='从按月汇总生成季度或年初至今的汇总报表')
+    rollup_parser.add_argument('year', type=int, help='年份')
+    period_group = rollup_parser.add_mutually_exclusive_group()
+    period_group.add_argument('--quarter', type=int, default=None, help='季度 (1-4)')
+    period_group.add_argument('--through', type=int, default=None,
+                              help='年初至该月的累计 (默认: 归档中该年最后一个有数据的月份)')
+    rollup_parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    rollup_parser.add_argument('--company', action='append', default=None, help='只生成指定公司（可重复给出）')
+
+    args = parser.parse_args()
+
+    if args.command != 'import' and not os.path.exists(args.archive):
+        print(f"错误: 归档不存在: {args.archive}")
+        sys.exit(1)
+
+    if args.command == 'import':
+        missing = [path for path in args.input_files if not os.path.exists(path)]
+        if missing:
+            print(f"错误: 输入文件不存在: {', '.join(missing)}")
+            sys.exit(1)
+        if import_workbooks(args.archive, args.input_files, rules_file=args.rules):
+            sys.exit(1)
+    elif args.command == 'render':
+        os.makedirs(args.output, exist_ok=True)
+        year, month = args.month
+        generated_files = render_month(args.archive, year, month, args.output, companies=args.company,
+                                       engine=args.engine, flat=args.flat)
+        print(f"\n✅ 共生成 {len(generated_files)} 个文件")
+    elif args.command == 'rollup':
+        if args.quarter is not None:
+            period = RollupPeriod.quarter(args.year, args.quarter)
+        else:
+            through = args.through
+            if through is None:
+                with AttendanceArchive(args.archive) as archive:
+                    months = [month for year, month in archive.months() if year == args.year]
+                if not months:
+                    print(f"归档中没有 {args.year} 年的数据")
+                    sys.exit(1)
+                through = months[-1]
+            period = RollupPeriod.year_to_date(args.year, through)
+        os.makedirs(args.output, exist_ok=True)
+        generated_files = generate_rollup_reports(args.archive, period, args.output, companies=args.company)
+        print(f"\n✅ 共生成 {len(generated_files)} 个文件")
+    else:
+        start_date, end_date = args.start_date, args.end_date
+        if args.year is not None:
+            start_date, end_date = date(args.year, 1, 1), date(args.year, 12, 31)
+        print_employee_hours(args.archive, args.employee, start_date, end_date)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,117 +4,266 @@
 考勤统计报表生成脚本 - 直接从原始签到表生成
 """
 
+import argparse
 import os
 import sys
+from datetime import datetime, timedelta
 from excel_report_generator_fixed import ExcelReportGenerator
-from attendance_calculator import AttendanceCalculator
+from attendance_pipeline import AttendancePipeline
+from attendance_rules import DEFAULT_RULES_FILENAME, load_rule_book
+from attendance_archive import AttendanceArchive, month_bounds
+from employee_index import EMPLOYEE_INDEX_DIRNAME, write_employee_index
+from weekly_hours import compute_weekly_hours, write_weekly_report
+from consolidated_report import CONSOLIDATED_REPORT_NAME, consolidate, write_consolidated_report
+from error_report import STAGE_COMPANY, STAGE_SAVE, error_report_path
+from report_layout import MAX_DAY, MonthLayout
+from report_saver import BackgroundSaver
+from report_sharding import Shard, plan_shards, sharded_report_path, write_sharded_report
+from xlsx_stream_writer import write_stats_report, write_stats_sheet
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
+from report_templates import (
+    stats_header_block, CENTER_ALIGN, THIN_BORDER, STATS_DATA_FONT,
+    STATS_NIGHT_FILL, STATS_ZEBRA_FILL_1, STATS_ZEBRA_FILL_2
+)
 
-def generate_attendance_stats(input_file, output_dir=None):
+def generate_attendance_stats(input_file, output_dir=None, rules_file=None, use_lookup_table=False,
+                              engine='openpyxl', flat=False, sharding=None, save_workers=2, record_filter=None,
+                              archive=None, employee_index=True, weekly_report=True, weekly_limit=None,
+                              consolidated=True):
     """
     从原始签到表直接生成考勤统计
     
     Args:
         input_file: 原始签到表文件路径
         output_dir: 输出目录
+        rules_file: 考勤规则配置文件（默认查找签到表同目录下的 attendance_rules.json）
+        use_lookup_table: 使用按分钟预计算的结果表计算工时（适合大批量历史数据）
+        engine: 报表写出方式，'openpyxl' 或 'stream'
+        flat: 平铺模式，表头不合并单元格
+        sharding: 分片设置（ShardOptions），人数超过单片上限的公司拆分输出
+        save_workers: 后台保存线程数，保存与下一个公司的计算重叠进行；0 表示逐个同步保存
+        record_filter: 只统计符合条件的记录（RecordFilter：公司、日期范围）
+        archive: SQLite 归档路径；给出时把整理后的记录和计算结果写入归档（同一文件重复导入不重复写入）
+        employee_index: 在输出目录的 .employee_index 下写出按员工的查询索引（筛选模式下不写）
+        weekly_report: 另外生成按 ISO 周汇总的周工时报表（weekly_hours-MM-公司.xlsx）；
+                       同时给出 archive 时用归档中的上月数据补全跨月的第一周
+        weekly_limit: 每周工时上限（小时），指定时用于全部公司；
+                      为 None 时按各公司规则的 weekly_hours_limit（劳动合同不同的公司可分别配置，默认 44）
+        consolidated: 另外生成全部公司汇总（attendance_summary-MM.xlsx：各公司合计和每日现场合计）
+    
+    Returns:
+        ErrorReport: 处理中出错的工作表/公司/文件（其余部分照常生成），有错误时同时写出 JSON 错误报告
     """
     if output_dir is None:
         output_dir = os.getcwd()
     
+    if rules_file is None:
+        rules_file = os.path.join(os.path.dirname(os.path.abspath(input_file)), DEFAULT_RULES_FILENAME)
+    
     print("🚀 考勤统计报表生成器")
     print("=" * 80)
     print(f"📄 处理文件: {os.path.basename(input_file)}")
     
     # 第一步：读取原始数据（使用工时报表生成器的逻辑）
     generator = ExcelReportGenerator()
-    calculator = AttendanceCalculator()
+    rule_book = load_rule_book(rules_file)
     
+    # 读取、整理、计算、按公司汇总以流水线并发进行
     print("\n📖 正在读取Excel文件...")
-    generator.read_input_excel(input_file)
+    pipeline = AttendancePipeline(generator, rule_book, use_lookup_table=use_lookup_table,
+                                  record_filter=record_filter)
+    company_statistics = pipeline.run(input_file)
+    errors = generator.errors
     
     if not generator.raw_data:
         print("❌ 没有读取到有效数据")
-        return
+        if errors:
+            print(f"错误报告: {errors.save(error_report_path(output_dir, 'attendance_stats'))}")
+        return errors
     
     print(f"共读取 {len(generator.raw_data)} 条记录")
     print(f"发现公司: {', '.join(sorted(generator.companies))}")
     
+    if archive is not None:
+        archive_month(archive, input_file, generator, company_statistics, record_filter)
+    if employee_index and (record_filter is None or record_filter.is_empty):
+        records, statistics = paired_results(generator, company_statistics)
+        with errors.capture(STAGE_SAVE, EMPLOYEE_INDEX_DIRNAME):
+            write_employee_index(os.path.join(output_dir, EMPLOYEE_INDEX_DIRNAME), input_file, records, statistics)
+    
     # 第二步：为每个公司生成考勤统计报表
     print(f"\n📊 开始生成考勤统计报表...")
     
-    for company in sorted(generator.companies):
-        print(f"  正在生成 {company} 的考勤统计...")
-        
-        # 筛选该公司的数据
-        company_data = [rec for rec in generator.raw_data if rec.get('company') == company]
-        
-        print(f"    {company} 的记录数: {len(company_data)}")
-        
-        if not company_data:
-            print(f"    跳过 {company}（没有数据）")
-            continue
-        
-        # 从数据中提取年月（参考 employee_hours 逻辑）
-        dates = [rec['date'] for rec in company_data]
-        min_date = min(dates)
-        year = min_date.year
-        month = min_date.month
-        
-        # 计算考勤统计
-        statistics = []
-        for rec in company_data:
-            # 将字段映射为 calculator 期望的格式
-            mapped_rec = {
-                '姓名': rec.get('name'),
-                '劳务公司': rec.get('company'),
-                '上工时间': rec.get('start_time'),
-                '下工时间': rec.get('end_time')
-            }
-            
-            stat = calculator.process_attendance_record(mapped_rec)
-            
-            # 添加年月日信息
-            from datetime import datetime
-            date_obj = rec.get('date')
-            if isinstance(date_obj, datetime):
-                stat.update({
-                    'year': date_obj.year,
-                    'month': date_obj.month,
-                    'day': date_obj.day
-                })
-            else:
-                # 如果不是datetime对象，尝试从字符串解析
-                stat.update({
-                    'year': rec.get('year'),
-                    'month': rec.get('month'),
-                    'day': rec.get('day')
-                })
-            
-            statistics.append(stat)
-        
-        print(f"    计算了 {len(statistics)} 条统计数据")
-        
-        # 生成报表
-        output_file = os.path.join(output_dir, f"attendance_stats-{month:02d}-{company}.xlsx")
-        
-        try:
-            generate_excel_report(statistics, output_file)
-            print(f"  ✓ {os.path.basename(output_file)}")
-        except Exception as e:
-            print(f"  ✗ 生成失败: {e}")
-            import traceback
-            traceback.print_exc()
+    weekly = None
+    if weekly_report:
+        limits = {
+            company: weekly_limit if weekly_limit is not None else rule_book.for_company(company).weekly_hours_limit
+            for company in generator.companies
+        }
+        weekly = (limits, load_prior_month(archive, generator, company_statistics) if archive else {})
+    
+    saver = BackgroundSaver(max_workers=save_workers) if save_workers > 0 else None
+    try:
+        _generate_company_stats(generator, company_statistics, output_dir, engine, flat, sharding, saver, weekly)
+        if consolidated:
+            with errors.capture(STAGE_SAVE, CONSOLIDATED_REPORT_NAME):
+                _generate_consolidated_report(company_statistics, output_dir, saver)
+    finally:
+        if saver is not None:
+            saver.close()
+    
+    if saver is not None:
+        errors.add_save_errors(saver)
     
     print(f"\n✅ 考勤统计生成完成!")
+    if errors:
+        print("\n❌ " + "\n".join(errors.summary_lines()))
+        print(f"错误报告: {errors.save(error_report_path(output_dir, 'attendance_stats'))}")
+    return errors
 
-def generate_excel_report(statistics, output_file):
-    """生成Excel考勤统计报表"""
+def paired_results(generator, company_statistics):
+    """按公司排列的记录和与之一一对应的考勤计算结果"""
+    records, statistics = [], []
+    for company in sorted(generator.companies):
+        records.extend(generator.get_company_records(company))
+        statistics.extend(company_statistics.get(company, []))
+    return records, statistics
+
+def archive_month(archive_path, input_file, generator, company_statistics, record_filter=None):
+    """
+    把一份签到表的记录和考勤计算结果写入归档
     
-    if not statistics:
+    只归档完整读取的文件：筛选模式或有工作表出错时跳过，避免以不完整的数据占用该文件的导入记录
+    
+    Returns:
+        bool: 是否写入了新数据
+    """
+    if record_filter is not None and not record_filter.is_empty:
+        print("⚠ 筛选模式下不写入归档")
+        return False
+    if generator.errors:
+        print("⚠ 有工作表或公司处理失败，本次不写入归档")
+        return False
+    
+    records, statistics = paired_results(generator, company_statistics)
+    with generator.errors.capture(STAGE_SAVE, archive_path):
+        with AttendanceArchive(archive_path) as store:
+            import_id, inserted = store.import_month(input_file, records, statistics)
+        if inserted:
+            print(f"🗄 已归档 {len(records)} 条记录 (导入编号 {import_id}): {archive_path}")
+        else:
+            print(f"🗄 该文件已归档过 (导入编号 {import_id})，跳过")
+        return inserted
+    return False
+
+def load_prior_month(archive_path, generator, company_statistics):
+    """
+    从归档取各公司上月最后几天的考勤计算结果（本月第一周跨月时用于补全该周工时）
+    
+    Returns:
+        dict: {公司: 考勤计算结果列表}；归档中没有上月数据时为空
+    """
+    prior = {}
+    with generator.errors.capture(STAGE_SAVE, archive_path):
+        with AttendanceArchive(archive_path) as store:
+            for company in sorted(generator.companies):
+                statistics = company_statistics.get(company)
+                if not statistics:
+                    continue
+                month_start, _ = month_bounds(statistics[0]['year'], statistics[0]['month'])
+                first = datetime.strptime(month_start, '%Y-%m-%d')
+                first_monday = first - timedelta(days=first.weekday())
+                if first_monday < first:
+                    prior[company] = store.load_statistics_between(
+                        company, first_monday.strftime('%Y-%m-%d'), month_start)
+    return prior
+
+def _generate_company_stats(generator, company_statistics, output_dir, engine, flat, sharding, saver, weekly=None):
+    """逐个公司生成考勤统计报表（报表交给 saver 后台保存）；单个公司出错记入 generator.errors"""
+    for company in sorted(generator.companies):
+        print(f"  正在生成 {company} 的考勤统计...")
+        with generator.errors.capture(STAGE_COMPANY, company):
+            _generate_one_company_stats(generator, company, company_statistics, output_dir,
+                                        engine, flat, sharding, saver, weekly)
+
+def _generate_consolidated_report(company_statistics, output_dir, saver):
+    """生成全部公司汇总（出错的公司没有计算结果，不计入）"""
+    company_statistics = {company: statistics for company, statistics in company_statistics.items() if statistics}
+    if not company_statistics:
+        return
+    summary = consolidate(company_statistics)
+    output_file = os.path.join(output_dir, CONSOLIDATED_REPORT_NAME.format(f"{summary.month:02d}"))
+    print(f"  全部公司汇总: {len(summary.companies)} 个公司，{summary.totals[1]} 人 → {output_file}")
+    if saver is not None:
+        saver.submit(lambda: write_consolidated_report(summary, output_file), output_file)
+    else:
+        write_consolidated_report(summary, output_file)
+
+def _generate_one_company_stats(generator, company, company_statistics, output_dir, engine, flat, sharding, saver,
+                                weekly=None):
+    """生成一个公司的考勤统计报表（weekly 为 ({公司: 每周上限}, {公司: 上月结果}) 时另外生成周工时报表）"""
+    # 筛选该公司的数据
+    company_data = generator.get_company_records(company)
+    
+    print(f"    {company} 的记录数: {len(company_data)}")
+    
+    if not company_data:
+        print(f"    跳过 {company}（没有数据）")
         return
     
+    # 从数据中提取年月（参考 employee_hours 逻辑）
+    dates = [rec['date'] for rec in company_data]
+    min_date = min(dates)
+    month = min_date.month
+    
+    # 考勤统计已由流水线按公司规则计算
+    statistics = company_statistics[company]
+    
+    print(f"    计算了 {len(statistics)} 条统计数据")
+    
+    # 生成报表
+    output_file = os.path.join(output_dir, f"attendance_stats-{month:02d}-{company}.xlsx")
+    
+    layout = plan_stats_layout(statistics)
+    generate_excel_report(statistics, output_file, layout=layout, engine=engine,
+                          flat=flat, sharding=sharding, saver=saver)
+    
+    if weekly is not None:
+        limits, prior = weekly
+        weekly_hours = compute_weekly_hours(statistics, limits[company], prior.get(company))
+        weekly_file = os.path.join(output_dir, f"weekly_hours-{month:02d}-{company}.xlsx")
+        if saver is not None:
+            saver.submit(lambda: write_weekly_report(weekly_hours, weekly_file), weekly_file)
+        else:
+            write_weekly_report(weekly_hours, weekly_file)
+
+def plan_stats_layout(statistics):
+    """
+    一次遍历统计数据，计算考勤统计报表的月度列布局
+    
+    日期列按 1~31 日排布（只保留有数据的日期），日期超出本月天数的记录也有对应列，
+    不会从单元格和汇总列中漏掉
+    """
+    return MonthLayout.from_pairs(
+        statistics[0]['year'],
+        statistics[0]['month'],
+        (((stat['name'], stat['company']), stat['day']) for stat in statistics),
+        last_day=MAX_DAY
+    )
+
+def build_stats_rows(statistics, columns):
+    """
+    按员工汇总考勤统计，生成报表行数据（与具体写出方式无关）
+    
+    Args:
+        statistics: 考勤统计数据列表
+        columns: 日期列排布（ColumnPlan）
+    
+    Returns:
+        list: 每名员工一项 (姓名, 公司, 日期列数据, 汇总数据)
+              日期列数据与日期列一一对应，值为 (有效工时, 是否夜班) 或 None（空白）
+              汇总数据为 (出勤次数, 总工时, 夜班补贴次数, 夜班补贴)
+    """
     # 按员工和日期分组
     employee_stats = {}
     employee_order = []
@@ -131,128 +280,9 @@ def generate_excel_report(statistics, output_file):
         
         employee_stats[key][day].append(stat)
     
-    # 计算每天最多的签到次数
-    max_checkins_per_day = {}
-    for day in range(1, 32):
-        max_checkins_per_day[day] = 0
-        for daily_stats in employee_stats.values():
-            if day in daily_stats:
-                max_checkins_per_day[day] = max(max_checkins_per_day[day], len(daily_stats[day]))
-    
-    # 创建工作簿
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "考勤统计"
-    
-    year = statistics[0]['year']
-    month = statistics[0]['month']
-    
-    # 样式
-    header_font = Font(name='SimSun', size=12, bold=True)
-    data_font = Font(name='SimSun', size=10)
-    title_font = Font(name='SimSun', size=14, bold=True)
-    center_align = Alignment(horizontal='center', vertical='center')
-    left_align = Alignment(horizontal='left', vertical='center')
-    border = Border(left=Side(style='thin'), right=Side(style='thin'), 
-                   top=Side(style='thin'), bottom=Side(style='thin'))
-    header_fill = PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid')
-    night_fill = PatternFill(start_color='FFF9C4', end_color='FFF9C4', fill_type='solid')
-    zebra_fill_1 = PatternFill(start_color='F5F5F5', end_color='F5F5F5', fill_type='solid')
-    zebra_fill_2 = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
-    
-    # 第1行：标题
-    ws.merge_cells('A1:C1')
-    cell = ws.cell(row=1, column=1, value=f"{year}年{month:02d}月")
-    cell.font = title_font
-    cell.alignment = left_align
-    
-    # 第3行：表头
-    ws.cell(row=3, column=1, value='序号').font = header_font
-    ws.cell(row=3, column=1).alignment = center_align
-    ws.cell(row=3, column=1).border = border
-    ws.cell(row=3, column=1).fill = header_fill
-    
-    ws.cell(row=3, column=2, value='姓名/日期').font = header_font
-    ws.cell(row=3, column=2).alignment = center_align
-    ws.cell(row=3, column=2).border = border
-    ws.cell(row=3, column=2).fill = header_fill
-    
-    ws.cell(row=3, column=3, value='劳务公司').font = header_font
-    ws.cell(row=3, column=3).alignment = center_align
-    ws.cell(row=3, column=3).border = border
-    ws.cell(row=3, column=3).fill = header_fill
-    
-    # 日期列（合并表头）
-    col_idx = 4
-    for day in range(1, 32):
-        if max_checkins_per_day[day] > 0:
-            start_col = col_idx
-            checkins = max_checkins_per_day[day]
-            
-            # 如果该天有多次签到，合并表头
-            if checkins > 1:
-                end_col = start_col + checkins - 1
-                ws.merge_cells(start_row=3, start_column=start_col, 
-                             end_row=3, end_column=end_col)
-            
-            # 设置表头内容和样式
-            cell = ws.cell(row=3, column=start_col, value=f"{day}日")
-            cell.font = header_font
-            cell.alignment = center_align
-            cell.border = border
-            cell.fill = header_fill
-            
-            # 为合并的单元格也设置边框
-            for i in range(checkins):
-                cell = ws.cell(row=3, column=start_col + i)
-                cell.border = border
-                cell.fill = header_fill
-            
-            col_idx += checkins
-    
-    # 汇总列（增加出勤次数）
-    total_col = col_idx
-    for i, title in enumerate(['出勤次数', '总工时', '夜班补贴次数', '夜班补贴']):
-        cell = ws.cell(row=3, column=total_col + i, value=title)
-        cell.font = header_font
-        cell.alignment = center_align
-        cell.border = border
-        cell.fill = header_fill
-    
-    # 设置列宽
-    ws.column_dimensions['A'].width = 6   # 序号
-    ws.column_dimensions['B'].width = 12  # 姓名
-    ws.column_dimensions['C'].width = 12  # 劳务公司
-    for col in range(4, total_col):
-        ws.column_dimensions[get_column_letter(col)].width = 6  # 日期列
-    ws.column_dimensions[get_column_letter(total_col)].width = 10      # 出勤次数
-    ws.column_dimensions[get_column_letter(total_col + 1)].width = 10  # 总工时
-    ws.column_dimensions[get_column_letter(total_col + 2)].width = 12  # 夜班补贴次数
-    ws.column_dimensions[get_column_letter(total_col + 3)].width = 10  # 夜班补贴
-    
-    # 写入数据
-    row_idx = 4
-    seq_num = 1
-    
+    rows = []
     for (name, company) in employee_order:
         daily_stats = employee_stats[(name, company)]
-        zebra_fill = zebra_fill_1 if seq_num % 2 == 0 else zebra_fill_2
-        
-        # 序号、姓名、公司
-        ws.cell(row=row_idx, column=1, value=seq_num).font = data_font
-        ws.cell(row=row_idx, column=1).alignment = center_align
-        ws.cell(row=row_idx, column=1).border = border
-        ws.cell(row=row_idx, column=1).fill = zebra_fill
-        
-        ws.cell(row=row_idx, column=2, value=name).font = data_font
-        ws.cell(row=row_idx, column=2).alignment = center_align
-        ws.cell(row=row_idx, column=2).border = border
-        ws.cell(row=row_idx, column=2).fill = zebra_fill
-        
-        ws.cell(row=row_idx, column=3, value=company).font = data_font
-        ws.cell(row=row_idx, column=3).alignment = center_align
-        ws.cell(row=row_idx, column=3).border = border
-        ws.cell(row=row_idx, column=3).fill = zebra_fill
         
         # 统计数据
         total_hours = 0.0
@@ -260,81 +290,189 @@ def generate_excel_report(statistics, output_file):
         total_night_allowance = 0.0
         attendance_days = 0  # 出勤次数（一天算一次，不管几次签到）
         
-        # 填充每天数据
-        col_idx = 4
-        for day in range(1, 32):
-            if max_checkins_per_day[day] > 0:
-                if day in daily_stats:
-                    # 统计出勤天数（一天有签到就算一天）
-                    attendance_days += 1
-                    
-                    for stat in daily_stats[day]:
-                        value = stat['effective_hours']
-                        total_hours += value
-                        
-                        if stat['night_allowance'] > 0:
-                            night_allowance_count += 1
-                            total_night_allowance += stat['night_allowance']
-                        
-                        cell = ws.cell(row=row_idx, column=col_idx, value=round(value, 1))
-                        cell.font = data_font
-                        cell.alignment = center_align
-                        cell.border = border
-                        cell.fill = night_fill if stat['is_night_shift'] else zebra_fill
-                        col_idx += 1
-                    
-                    # 填充空列
-                    for _ in range(len(daily_stats[day]), max_checkins_per_day[day]):
-                        cell = ws.cell(row=row_idx, column=col_idx, value='')
-                        cell.border = border
-                        cell.fill = zebra_fill
-                        col_idx += 1
-                else:
-                    for _ in range(max_checkins_per_day[day]):
-                        cell = ws.cell(row=row_idx, column=col_idx, value='')
-                        cell.border = border
-                        cell.fill = zebra_fill
-                        col_idx += 1
+        slots = []
+        for day, _, checkins in columns.days:
+            day_stats = daily_stats.get(day, [])
+            if day_stats:
+                # 统计出勤天数（一天有签到就算一天）
+                attendance_days += 1
+            
+            for stat in day_stats:
+                value = stat['effective_hours']
+                total_hours += value
+                
+                if stat['night_allowance'] > 0:
+                    night_allowance_count += 1
+                    total_night_allowance += stat['night_allowance']
+                
+                slots.append((round(value, 1), stat['is_night_shift']))
+            
+            # 填充空列
+            slots.extend([None] * (checkins - len(day_stats)))
         
-        # 汇总列（新增出勤次数）
-        # 出勤次数
-        ws.cell(row=row_idx, column=total_col, value=attendance_days).font = data_font
-        ws.cell(row=row_idx, column=total_col).alignment = center_align
-        ws.cell(row=row_idx, column=total_col).border = border
-        ws.cell(row=row_idx, column=total_col).fill = zebra_fill
+        summary = (attendance_days, round(total_hours, 1), night_allowance_count, round(total_night_allowance, 1))
+        rows.append((name, company, slots, summary))
+    
+    return rows
+
+def generate_excel_report(statistics, output_file, layout=None, engine='openpyxl', flat=False, sharding=None,
+                          saver=None):
+    """
+    生成Excel考勤统计报表
+    
+    Args:
+        statistics: 考勤统计数据列表
+        output_file: 输出文件路径
+        layout: 月度列布局（为空时根据统计数据计算）
+        engine: 写出方式，'openpyxl' 或 'stream'（直接流式生成 xlsx，适合大报表）
+        flat: 平铺模式，表头不合并单元格，多次签到的日期用子列标题区分
+        sharding: 分片设置（ShardOptions），为空时不分片
+        saver: 后台保存线程池（BackgroundSaver）；为空时在当前线程保存
+    
+    Returns:
+        str: 报表文件路径（分片输出为多个文件时返回索引文件路径）
+    """
+    
+    if not statistics:
+        return
+    
+    if layout is None:
+        layout = plan_stats_layout(statistics)
+    # 只为有数据的日期生成列
+    columns = layout.columns(first_col=4, min_span=0)
+    rows = build_stats_rows(statistics, columns)
+    result_path = output_file
+    
+    ranges = []
+    if sharding is not None:
+        per_shard = sharding.employees_per_shard(stats_header_block(layout, flat=flat).total_cols)
+        ranges = plan_shards(len(rows), per_shard)
+    
+    if len(ranges) > 1:
+        shards = [
+            Shard(number, start, end, [row[0] for row in rows[start:end]], (rows[start:end], start + 1))
+            for number, (start, end) in enumerate(ranges, 1)
+        ]
+        result_path = sharded_report_path(output_file, sharding)
+        
+        def save():
+            return write_sharded_report(
+                output_file, '考勤统计', shards, sharding, engine,
+                fill_openpyxl=lambda ws, payload: fill_stats_sheet(ws, payload[0], layout, flat, payload[1]),
+                fill_stream=lambda wb, title, payload: write_stats_sheet(wb, title, payload[0], layout, flat,
+                                                                         payload[1]),
+            )
+    elif engine == 'stream':
+        def save():
+            write_stats_report(rows, layout, output_file, flat=flat)
+            return [output_file]
+    else:
+        # 创建工作簿
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "考勤统计"
+        fill_stats_sheet(ws, rows, layout, flat=flat)
+        
+        def save():
+            wb.save(output_file)
+            return [output_file]
+    
+    def save_and_report():
+        for path in save():
+            print(f"  ✓ {os.path.basename(path)}")
+    
+    if saver is not None:
+        saver.submit(save_and_report, output_file)
+    else:
+        save_and_report()
+    
+    return result_path
+
+def fill_stats_sheet(ws, rows, layout, flat=False, first_seq=1):
+    """
+    向 openpyxl 工作表写入考勤统计（表头及员工行）
+    
+    Args:
+        ws: 工作表
+        rows: build_stats_rows 生成的员工行数据
+        layout: 月度列布局
+        flat: 平铺模式，表头不合并单元格
+        first_seq: 起始序号（分片时为该片第一名员工的序号）
+    """
+    columns = layout.columns(first_col=4, min_span=0)
+    
+    # 标题、表头、汇总列及列宽按月度布局缓存，直接套用
+    stats_header_block(layout, flat=flat).apply(ws)
+    total_col = columns.next_col
+    
+    # 写入数据
+    row_idx = 4
+    
+    for seq_num, (name, company, slots, summary) in enumerate(rows, first_seq):
+        zebra_fill = STATS_ZEBRA_FILL_1 if seq_num % 2 == 0 else STATS_ZEBRA_FILL_2
         
-        # 总工时
-        ws.cell(row=row_idx, column=total_col + 1, value=round(total_hours, 1)).font = data_font
-        ws.cell(row=row_idx, column=total_col + 1).alignment = center_align
-        ws.cell(row=row_idx, column=total_col + 1).border = border
-        ws.cell(row=row_idx, column=total_col + 1).fill = zebra_fill
+        # 序号、姓名、公司
+        for col, value in ((1, seq_num), (2, name), (3, company)):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+            cell.fill = zebra_fill
         
-        # 夜班补贴次数
-        ws.cell(row=row_idx, column=total_col + 2, value=night_allowance_count).font = data_font
-        ws.cell(row=row_idx, column=total_col + 2).alignment = center_align
-        ws.cell(row=row_idx, column=total_col + 2).border = border
-        ws.cell(row=row_idx, column=total_col + 2).fill = zebra_fill
+        # 填充每天数据（夜班高亮）
+        for col_idx, slot in enumerate(slots, columns.first_col):
+            if slot is None:
+                cell = ws.cell(row=row_idx, column=col_idx, value='')
+                cell.border = THIN_BORDER
+                cell.fill = zebra_fill
+            else:
+                value, is_night = slot
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
+                cell.font = STATS_DATA_FONT
+                cell.alignment = CENTER_ALIGN
+                cell.border = THIN_BORDER
+                cell.fill = STATS_NIGHT_FILL if is_night else zebra_fill
         
-        # 夜班补贴金额
-        ws.cell(row=row_idx, column=total_col + 3, value=round(total_night_allowance, 1)).font = data_font
-        ws.cell(row=row_idx, column=total_col + 3).alignment = center_align
-        ws.cell(row=row_idx, column=total_col + 3).border = border
-        ws.cell(row=row_idx, column=total_col + 3).fill = zebra_fill
+        # 汇总列：出勤次数、总工时、夜班补贴次数、夜班补贴金额
+        for i, value in enumerate(summary):
+            cell = ws.cell(row=row_idx, column=total_col + i, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+            cell.fill = zebra_fill
         
         row_idx += 1
-        seq_num += 1
-    
-    wb.save(output_file)
 
-if __name__ == "__main__":
-    # 查找输入文件
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='考勤统计报表生成工具')
+    parser.add_argument('input_file', nargs='?', default=None,
+                        help='输入的签到表路径 (默认: 当前目录中的劳务签到表)')
+    parser.add_argument('-o', '--output', default=None, help='输出目录 (默认: 当前目录)')
+    parser.add_argument('--rules', default=None, help='考勤规则配置文件')
+    parser.add_argument('--weekly-limit', type=float, default=None,
+                        help='每周工时上限（小时），用于全部公司 (默认: 按规则配置的 weekly_hours_limit，未配置为 44)')
+    parser.add_argument('--no-weekly', action='store_true', help='不生成周工时报表')
+    args = parser.parse_args()
+
     current_dir = os.getcwd()
-    input_files = [f for f in os.listdir(current_dir) if '劳务签到表' in f and f.endswith('.xls')]
-    
-    if not input_files:
-        print("❌ 当前目录没有找到劳务签到表文件")
+    input_file = args.input_file
+    if input_file is None:
+        # 查找输入文件
+        input_files = [f for f in os.listdir(current_dir) if '劳务签到表' in f and f.endswith('.xls')]
+        if not input_files:
+            print("❌ 当前目录没有找到劳务签到表文件")
+            sys.exit(1)
+        input_file = os.path.join(current_dir, input_files[0])
+    elif not os.path.exists(input_file):
+        print(f"错误: 输入文件不存在: {input_file}")
         sys.exit(1)
-    
-    input_file = os.path.join(current_dir, input_files[0])
-    generate_attendance_stats(input_file, current_dir)
 
+    output_dir = args.output or current_dir
+    os.makedirs(output_dir, exist_ok=True)
+    if generate_attendance_stats(input_file, output_dir, rules_file=args.rules,
+                                 weekly_report=not args.no_weekly, weekly_limit=args.weekly_limit):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
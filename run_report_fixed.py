@@ -6,6 +6,7 @@
 
 import os
 import sys
+from error_report import STAGE_COMPANY, error_report_path
 from excel_report_generator_fixed import ExcelReportGenerator
 
 def find_input_file():
@@ -61,9 +62,12 @@ def main():
         # 读取输入文件
         print("\n📖 正在读取Excel文件...")
         generator.read_input_excel(input_file)
+        errors = generator.errors
         
         if not generator.raw_data:
             print("❌ 没有读取到有效数据")
+            if errors:
+                print(f"错误报告: {errors.save(error_report_path(os.getcwd(), 'employee_hours'))}")
             sys.exit(1)
         
         # 为每个公司生成报表
@@ -72,10 +76,11 @@ def main():
         
         for company in sorted(generator.companies):
             print(f"  正在生成 {company} 的报表...")
-            report_info = generator.generate_company_report(company)
-            if report_info:
-                filepath = generator.save_company_report(report_info, os.getcwd())
-                generated_files.append(filepath)
+            with errors.capture(STAGE_COMPANY, company):
+                report_info = generator.generate_company_report(company)
+                if report_info:
+                    filepath = generator.save_company_report(report_info, os.getcwd())
+                    generated_files.append(filepath)
         
         print(f"\n✅ 报表生成完成!")
         print(f"📁 共生成 {len(generated_files)} 个文件:")
@@ -90,6 +95,12 @@ def main():
         print("  ✓ 表头12号字体，数据10号字体")
         print("  ✓ 除A1外所有表头居中对齐")
         
+        # 出错的工作表/公司不影响其余报表，最后统一列出并以非零状态退出
+        if errors:
+            print("\n❌ " + "\n".join(errors.summary_lines()))
+            print(f"错误报告: {errors.save(error_report_path(os.getcwd(), 'employee_hours'))}")
+            sys.exit(1)
+        
     except Exception as e:
         print(f"❌ 处理失败: {e}")
         import traceback
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享内存月度数据 - 解析后的签到记录以整数编码的列存放在一块共享内存中
+
+子进程只需拿到固定大小的句柄即可零拷贝挂载，按公司区间切片取用，
+不必把每个公司的记录字典逐条序列化传给子进程。
+"""
+
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# 记录列：名称 → 数据类型
+RECORD_FIELDS = (
+    ('company', np.int32),       # 公司序号（公司表按名称排序，记录按公司分段存放）
+    ('employee', np.int32),      # 员工序号（按首次出现顺序）
+    ('date', np.int32),          # 日期（date.toordinal()）
+    ('start', np.int32),         # 上工时间文本序号（0 为空）
+    ('end', np.int32),           # 下工时间文本序号（0 为空）
+)
+
+# 字符串表：每个表存为 UTF-8 字节串 + 偏移数组
+STRING_TABLES = ('companies', 'employees', 'labels')
+
+
+def _encode_table(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+class SharedMonth:
+    """
+    共享内存中的月度签到数据
+
+    用法（主进程）：
+        with SharedMonth.from_records(generator.raw_data) as month:
+            pool = ProcessPoolExecutor(initializer=attach, initargs=(month.handle,))
+    子进程：
+        month = SharedMonth.attach(handle)
+        records = month.company_records(company_index)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, str, int]], owner: bool):
+        self._shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, dtype, length) in layout.items()
+        }
+        self._tables = {}
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'SharedMonth':
+        """
+        由标准记录（read_input_excel 的输出）创建共享内存数据
+
+        Args:
+            records: 记录字典列表
+
+        Returns:
+            SharedMonth: 拥有者实例，使用完毕须 close（with 语句自动处理）
+        """
+        companies = sorted({record['company'] for record in records})
+        company_codes = {company: code for code, company in enumerate(companies)}
+        employee_codes = {}
+        label_codes = {None: 0}
+        labels = ['']
+
+        columns = {name: np.empty(len(records), dtype=dtype) for name, dtype in RECORD_FIELDS}
+        for i, record in enumerate(records):
+            columns['company'][i] = company_codes[record['company']]
+            columns['employee'][i] = employee_codes.setdefault(record['name'], len(employee_codes))
+            columns['date'][i] = record['date'].toordinal()
+            for field in ('start', 'end'):
+                value = record[f'{field}_time']
+                code = label_codes.get(value)
+                if code is None:
+                    code = label_codes[value] = len(labels)
+                    labels.append(value)
+                columns[field][i] = code
+
+        # 按公司分段（稳定排序，公司内保持原始顺序）
+        order = np.argsort(columns['company'], kind='stable')
+        for name in columns:
+            columns[name] = columns[name][order]
+        columns['company_offsets'] = np.searchsorted(
+            columns['company'], np.arange(len(companies) + 1)
+        ).astype(np.int64)
+
+        for table, texts in (('companies', companies), ('employees', list(employee_codes)), ('labels', labels)):
+            columns[f'{table}_blob'], columns[f'{table}_offsets'] = _encode_table(texts)
+
+        # 所有列放在同一块共享内存中，按 8 字节对齐
+        layout = {}
+        size = 0
+        for name, array in columns.items():
+            layout[name] = (size, array.dtype.str, len(array))
+            size += (array.nbytes + 7) // 8 * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 8))
+        month = cls(shm, layout, owner=True)
+        for name, array in columns.items():
+            month.arrays[name][:] = array
+        return month
+
+    @classmethod
+    def attach(cls, handle: Tuple[str, Dict]) -> 'SharedMonth':
+        """子进程按句柄零拷贝挂载（共享内存由创建方负责释放）"""
+        name, layout = handle
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def handle(self) -> Tuple[str, Dict]:
+        """传给子进程的句柄（大小与数据量无关）"""
+        return self._shm.name, self.layout
+
+    def text(self, table: str, index: int) -> str:
+        """读取字符串表中的一项"""
+        offsets = self.arrays[f'{table}_offsets']
+        return bytes(self.arrays[f'{table}_blob'][offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def table(self, table: str) -> List[str]:
+        """完整的字符串表（解码后缓存）"""
+        if table not in self._tables:
+            count = len(self.arrays[f'{table}_offsets']) - 1
+            self._tables[table] = [self.text(table, index) for index in range(count)]
+        return self._tables[table]
+
+    @property
+    def companies(self) -> List[str]:
+        return self.table('companies')
+
+    def company_range(self, company_index: int) -> Tuple[int, int]:
+        """公司记录在各列中的 [起始, 结束) 区间"""
+        offsets = self.arrays['company_offsets']
+        return int(offsets[company_index]), int(offsets[company_index + 1])
+
+    def company_columns(self, company_index: int) -> Dict[str, np.ndarray]:
+        """公司记录的各列切片（零拷贝视图）"""
+        start, end = self.company_range(company_index)
+        return {name: self.arrays[name][start:end] for name, _ in RECORD_FIELDS}
+
+    def company_records(self, company_index: int) -> List[Dict]:
+        """还原公司的记录字典（与 read_input_excel 的记录一致，不含备注列）"""
+        columns = self.company_columns(company_index)
+        company = self.companies[company_index]
+        labels = self.table('labels')
+        names = {}
+        dates = {}
+        records = []
+        for employee, ordinal, start, end in zip(columns['employee'].tolist(), columns['date'].tolist(),
+                                                 columns['start'].tolist(), columns['end'].tolist()):
+            name = names.get(employee)
+            if name is None:
+                name = names[employee] = self.text('employees', employee)
+            date = dates.get(ordinal)
+            if date is None:
+                date = dates[ordinal] = datetime.fromordinal(ordinal)
+            records.append({
+                'date': date,
+                'name': name,
+                'company': company,
+                'start_time': labels[start] if start else None,
+                'end_time': labels[end] if end else None,
+            })
+        return records
+
+    def close(self):
+        """释放视图并关闭共享内存；创建方同时删除共享内存"""
+        if self._shm is None:
+            return
+        self.arrays = {}
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
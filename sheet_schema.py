@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作表结构识别 - 定位表头行并把别名列映射到标准字段
+
+每个工作表只识别一次；相同表头（签名）的结构跨工作表、跨文件缓存复用，
+之后的工作表直接命中，不再逐行探测列名。
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# 预读的行数（表头须出现在这些行内）
+HEADER_SCAN_ROWS = 10
+
+# 未识别出表头时沿用的表头行（第2行）
+DEFAULT_HEADER_ROW = 1
+
+# 标准字段 → 可接受的列名（按优先级）
+FIELD_ALIASES = {
+    'name': ('姓名',),
+    'company': ('劳务公司',),
+    'start_time': ('上工', '上工时间', '开始时间'),
+    'end_time': ('下工', '下工时间', '结束时间'),
+    'description': ('白班工时11H（如有延长下班的，备注原因）',),
+}
+
+# 备注列标题不完全一致时按前缀识别
+DESCRIPTION_PREFIX = '白班工时'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_header(value) -> str:
+    """表头单元格规范化：去除所有空白，空单元格为空字符串"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ''
+    return _WHITESPACE.sub('', str(value))
+
+
+def map_columns(columns: Iterable) -> Dict[str, Optional[object]]:
+    """
+    将 DataFrame 的列名映射到标准字段
+
+    Args:
+        columns: DataFrame.columns
+
+    Returns:
+        dict: {标准字段: 列名}，找不到的字段为 None
+    """
+    columns = list(columns)
+    normalized = [normalize_header(label) for label in columns]
+    mapping = {}
+    for field, aliases in FIELD_ALIASES.items():
+        mapping[field] = next(
+            (columns[i] for alias in aliases for i, text in enumerate(normalized) if text == alias),
+            None
+        )
+    if mapping['description'] is None:
+        mapping['description'] = next(
+            (columns[i] for i, text in enumerate(normalized) if text.startswith(DESCRIPTION_PREFIX)),
+            None
+        )
+    return mapping
+
+
+def header_labels(values: Iterable) -> List[object]:
+    """
+    表头单元格 → 列名（与 pandas 指定 header 读取时一致）
+
+    空单元格为 "Unnamed: 列序号"，重复的列名依次加 ".1"、".2" 后缀
+    """
+    labels = []
+    seen = {}
+    for index, value in enumerate(values):
+        label = f"Unnamed: {index}" if normalize_header(value) == '' else value
+        count = seen.get(label, 0)
+        seen[label] = count + 1
+        if count:
+            while f"{label}.{count}" in seen:
+                count += 1
+            seen[label] = count + 1
+            label = f"{label}.{count}"
+            seen[label] = 1
+        labels.append(label)
+    return labels
+
+
+def promote_header(raw: pd.DataFrame, header_row: int, sheet_name: str = '') -> pd.DataFrame:
+    """
+    把不指定表头读取的工作表中的第 header_row 行作为列名，返回其后的数据行
+
+    数据行按列重新推断类型，与 pandas 指定 header 读取的结果一致。
+    """
+    if raw.empty:
+        return raw
+    if header_row >= len(raw):
+        raise ValueError(f"表头行 {header_row + 1} 超出工作表行数 {len(raw)} (sheet: {sheet_name})")
+    df = raw.iloc[header_row + 1:].reset_index(drop=True)
+    df.columns = header_labels(raw.iloc[header_row].tolist())
+    return df.infer_objects()
+
+
+class SheetSchema:
+    """工作表结构：表头行号（从0开始）及标准字段对应的列名"""
+
+    def __init__(self, header_row: Optional[int], columns: Dict[str, Optional[object]]):
+        self.header_row = header_row
+        self.columns = columns
+
+    @classmethod
+    def from_columns(cls, columns: Iterable, header_row: Optional[int] = None) -> 'SheetSchema':
+        return cls(header_row, map_columns(columns))
+
+    @property
+    def missing_fields(self) -> List[str]:
+        """未找到对应列的标准字段"""
+        return [field for field, label in self.columns.items() if label is None]
+
+    @property
+    def is_usable(self) -> bool:
+        """是否找到了姓名列和公司列（否则整张表读不出记录）"""
+        return self.columns['name'] is not None and self.columns['company'] is not None
+
+
+class SchemaResolver:
+    """
+    工作表结构识别器（按表头签名缓存）
+
+    签名为 (表头行号, 规范化后的表头单元格)。每个工作表只解析一次（不指定表头），
+    先用已知签名比对前几行，命中则直接使用已知的表头行；否则扫描前几行定位表头。
+    签名去除了空白，命中的工作表列名可能与首次识别时不同（如 "上工 时间"），
+    所以列映射总是按本工作表自己的列名建立。
+    """
+
+    def __init__(self):
+        self._known: Dict[Tuple[int, tuple], SheetSchema] = {}  # 签名 → 首次识别出的结构
+
+    @staticmethod
+    def _row_signature(values) -> tuple:
+        cells = [normalize_header(value) for value in values]
+        while cells and not cells[-1]:
+            cells.pop()
+        return tuple(cells)
+
+    @staticmethod
+    def detect_header_row(rows: List[tuple]) -> Optional[int]:
+        """在预读行中查找同时含有姓名列和公司列的表头行"""
+        names, companies = FIELD_ALIASES['name'], FIELD_ALIASES['company']
+        for index, row in enumerate(rows):
+            if any(cell in names for cell in row) and any(cell in companies for cell in row):
+                return index
+        return None
+
+    def read_sheet(self, excel_file: pd.ExcelFile, sheet_name: str) -> Tuple[pd.DataFrame, SheetSchema]:
+        """
+        识别结构并读取工作表
+
+        Args:
+            excel_file: 已打开的工作簿
+            sheet_name: 工作表名
+
+        Returns:
+            tuple: (以识别出的表头行为列名的数据, 工作表结构)
+        """
+        raw = excel_file.parse(sheet_name, header=None)
+        rows = [self._row_signature(values) for values in raw.head(HEADER_SCAN_ROWS).itertuples(index=False)]
+
+        header_row = next((row for row, signature in self._known
+                           if row < len(rows) and rows[row] == signature), None)
+        known = header_row is not None
+        if not known:
+            header_row = self.detect_header_row(rows)
+            if header_row is None:
+                header_row = DEFAULT_HEADER_ROW
+
+        df = promote_header(raw, header_row, sheet_name)
+        schema = SheetSchema.from_columns(df.columns, header_row)
+        if not known and header_row < len(rows) and schema.is_usable:
+            self._known[(header_row, rows[header_row])] = schema
+        return df, schema
+
+
+# 默认识别器（进程内共享，跨文件复用缓存）
+DEFAULT_SCHEMA_RESOLVER = SchemaResolver()
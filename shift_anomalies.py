@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+签到异常检查 - 找出重叠、重复的班次，缺少下工时间和时长异常的签到
+
+同一员工的班次按绝对上工时间排序（夜班跨零点时下工计入次日），一次扫描即可发现重叠，
+整体 O(n log n)。结果按公司写出异常工作簿或 CSV。
+
+    python shift_anomalies.py 6月劳务签到表.xls -o output
+"""
+
+import argparse
+import csv
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from attendance_rules import parse_minute, shift_interval
+from excel_report_generator_fixed import ExcelReportGenerator
+from report_templates import (
+    CENTER_ALIGN, LEFT_ALIGN, THIN_BORDER, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT
+)
+
+# 异常类型
+OVERLAP = 'overlap'
+DUPLICATE = 'duplicate'
+MISSING_END = 'missing_end'
+MISSING_START = 'missing_start'
+LONG_SHIFT = 'long_shift'
+
+ANOMALY_NAMES = {
+    OVERLAP: '班次重叠',
+    DUPLICATE: '重复签到',
+    MISSING_END: '缺少下工',
+    MISSING_START: '缺少上工',
+    LONG_SHIFT: '时长过长',
+}
+
+# 超过该时长（小时）的班次视为异常
+MAX_SHIFT_HOURS = 16.0
+
+ANOMALY_HEADERS = ['类型', '姓名', '劳务公司', '日期', '上工', '下工', '时长', '说明', '备注']
+ANOMALY_WIDTHS = [10, 12, 14, 12, 8, 8, 8, 36, 20]
+
+
+class ShiftAnomaly:
+    """一条异常（record 为标准记录，hours 为班次时长，无法计算时为 None）"""
+
+    __slots__ = ('kind', 'record', 'hours', 'detail')
+
+    def __init__(self, kind: str, record: Dict, hours: Optional[float] = None, detail: str = ''):
+        self.kind = kind
+        self.record = record
+        self.hours = hours
+        self.detail = detail
+
+    def row(self) -> list:
+        record = self.record
+        return [
+            ANOMALY_NAMES[self.kind], record['name'], record['company'], record['date'].strftime('%Y-%m-%d'),
+            record['start_time'] or '', record['end_time'] or '',
+            round(self.hours, 2) if self.hours is not None else '', self.detail, record['description'],
+        ]
+
+
+def _describe(record: Dict) -> str:
+    return f"{record['date'].strftime('%m-%d')} {record['start_time']}-{record['end_time']}"
+
+
+def find_employee_anomalies(records: List[Dict], max_shift_hours: float = MAX_SHIFT_HOURS) -> List[ShiftAnomaly]:
+    """
+    检查同一员工的全部签到
+
+    按 (上工, 下工) 排序后扫描：完全相同的班次排序后相邻，与前一个班次相同即为重复签到
+    （不再重复报告为重叠）；另记下此前下工最晚的班次，下一个班次在它下工之前上工即为重叠。
+
+    Returns:
+        list: 异常列表，按签到日期排列
+    """
+    anomalies = []
+    shifts = []
+    for record in records:
+        has_start = parse_minute(record['start_time']) is not None
+        has_end = parse_minute(record['end_time']) is not None
+        if has_start and not has_end:
+            anomalies.append(ShiftAnomaly(MISSING_END, record, detail='有上工时间但没有下工时间'))
+            continue
+        if has_end and not has_start:
+            anomalies.append(ShiftAnomaly(MISSING_START, record, detail='有下工时间但没有上工时间'))
+            continue
+        interval = shift_interval(record['date'], record['start_time'], record['end_time'])
+        if interval is None:
+            continue
+        start, end = interval
+        hours = (end - start) / 60
+        if hours > max_shift_hours:
+            anomalies.append(ShiftAnomaly(LONG_SHIFT, record, hours, f"超过 {max_shift_hours:g} 小时"))
+        shifts.append((start, end, record))
+
+    shifts.sort(key=lambda shift: (shift[0], shift[1]))
+    previous = None  # 排序后的前一个班次
+    latest = None    # 此前下工最晚的班次
+    for start, end, record in shifts:
+        if previous is not None and start == previous[0] and end == previous[1]:
+            anomalies.append(ShiftAnomaly(DUPLICATE, record, (end - start) / 60,
+                                          f"与 {_describe(previous[2])} 完全相同"))
+            continue
+        previous = (start, end, record)
+        if latest is not None:
+            latest_start, latest_end, latest_record = latest
+            if start < latest_end:
+                overlap = (min(end, latest_end) - start) / 60
+                anomalies.append(ShiftAnomaly(OVERLAP, record, (end - start) / 60,
+                                              f"与 {_describe(latest_record)} 重叠 {overlap:g} 小时"))
+        if latest is None or end > latest[1]:
+            latest = (start, end, record)
+
+    anomalies.sort(key=lambda anomaly: anomaly.record['date'])
+    return anomalies
+
+
+def find_anomalies(records: Iterable[Dict], max_shift_hours: float = MAX_SHIFT_HOURS) -> Dict[str, List[ShiftAnomaly]]:
+    """
+    按公司检查签到异常
+
+    Args:
+        records: 标准记录（可直接使用 ExcelReportGenerator.iter_records 的输出）
+        max_shift_hours: 班次时长上限（小时）
+
+    Returns:
+        dict: {公司: 异常列表}，按员工首次出现顺序、员工内按日期排列；没有异常的公司不出现
+    """
+    employees = {}
+    for record in records:
+        employees.setdefault((record['company'], record['name']), []).append(record)
+
+    by_company = {}
+    for (company, _), employee_records in employees.items():
+        anomalies = find_employee_anomalies(employee_records, max_shift_hours)
+        if anomalies:
+            by_company.setdefault(company, []).extend(anomalies)
+    return dict(sorted(by_company.items()))
+
+
+def write_anomaly_workbook(company: str, anomalies: List[ShiftAnomaly], output_file: str) -> str:
+    """写出一个公司的异常工作簿"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '签到异常'
+
+    for col, (text, width) in enumerate(zip(ANOMALY_HEADERS, ANOMALY_WIDTHS), 1):
+        cell = ws.cell(row=1, column=col, value=text)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    for row_idx, anomaly in enumerate(anomalies, 2):
+        for col, value in enumerate(anomaly.row(), 1):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = LEFT_ALIGN if col >= 8 else CENTER_ALIGN
+            cell.border = THIN_BORDER
+
+    ws.freeze_panes = 'A2'
+    ws.auto_filter.ref = f"A1:{get_column_letter(len(ANOMALY_HEADERS))}{len(anomalies) + 1}"
+    wb.save(output_file)
+    return output_file
+
+
+def write_anomaly_csv(anomalies: List[ShiftAnomaly], output_file: str) -> str:
+    """写出 CSV（列与异常工作簿相同）"""
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(ANOMALY_HEADERS)
+        writer.writerows(anomaly.row() for anomaly in anomalies)
+    return output_file
+
+
+def generate_anomaly_reports(input_file: str, output_dir: str, output_format: str = 'xlsx',
+                             max_shift_hours: float = MAX_SHIFT_HOURS, record_filter=None) -> List[str]:
+    """
+    检查签到表并按公司写出异常（没有异常的公司不生成文件）
+
+    Args:
+        output_format: 'xlsx' 或 'csv'
+
+    Returns:
+        list: 生成的文件路径
+    """
+    generator = ExcelReportGenerator()
+    print(f"正在读取文件: {input_file}")
+    records = list(generator.iter_records(input_file, record_filter))
+    by_company = find_anomalies(records, max_shift_hours)
+
+    month = records[0]['date'].month if records else 0
+    generated_files = []
+    for company, anomalies in by_company.items():
+        output_file = os.path.join(output_dir, f"shift_anomalies-{month:02d}-{company}.{output_format}")
+        if output_format == 'csv':
+            write_anomaly_csv(anomalies, output_file)
+        else:
+            write_anomaly_workbook(company, anomalies, output_file)
+        generated_files.append(output_file)
+
+        counts = {}
+        for anomaly in anomalies:
+            counts[anomaly.kind] = counts.get(anomaly.kind, 0) + 1
+        summary = '，'.join(f"{ANOMALY_NAMES[kind]} {count}" for kind, count in counts.items())
+        print(f"{company}: {summary} → {output_file}")
+
+    if not by_company:
+        print("未发现签到异常")
+    if generator.errors:
+        print('\n'.join(generator.errors.summary_lines()))
+    return generated_files
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='签到异常检查（重叠、重复、缺少下工、时长过长）')
+    parser.add_argument('input_file', help='输入的Excel文件路径')
+    parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx', help='输出格式 (默认: xlsx)')
+    parser.add_argument('--max-hours', type=float, default=MAX_SHIFT_HOURS,
+                        help=f'班次时长上限（小时，默认: {MAX_SHIFT_HOURS:g}）')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"错误: 输入文件不存在: {args.input_file}")
+        sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+
+    generate_anomaly_reports(args.input_file, args.output, args.format, args.max_hours)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+在场人数时间线 - 按公司、按天统计每个时段（15 分钟或 1 小时）在场的人数
+
+把每个班次拆成上工 (+1)、下工 (-1) 两个事件，按时间排序后一次扫描得到各时段的在场人数，
+跨零点的夜班计入次日的时段。输出热力图工作簿和 CSV。
+
+    python site_occupancy.py 6月劳务签到表.xls -o output --bucket 15
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import date
+from typing import Dict, Iterable, List
+
+from openpyxl import Workbook
+from openpyxl.formatting.rule import ColorScaleRule
+from openpyxl.utils import get_column_letter
+
+from attendance_rules import shift_interval
+from excel_report_generator_fixed import ExcelReportGenerator
+from report_templates import (
+    CENTER_ALIGN, THIN_BORDER, STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT,
+    WEEKDAY_NAMES
+)
+
+# 支持的时段长度（分钟）
+BUCKET_MINUTES = (15, 60)
+
+# 热力图颜色：0 人为白色，人数最多为红色
+HEATMAP_LOW_COLOR = 'FFFFFF'
+HEATMAP_HIGH_COLOR = 'F8696B'
+
+
+class OccupancyTimeline:
+    """
+    一个公司的在场人数时间线
+
+    rows 按日期排列，每行为 (日期, 各时段在场人数)；某时段的人数为该时段内同时在场的最多人数
+    """
+
+    def __init__(self, company: str, bucket_minutes: int, rows: List[tuple]):
+        self.company = company
+        self.bucket_minutes = bucket_minutes
+        self.rows = rows
+
+    @property
+    def bucket_labels(self) -> List[str]:
+        return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, 1440, self.bucket_minutes)]
+
+    @property
+    def peak(self) -> int:
+        return max((max(counts) for _, counts in self.rows), default=0)
+
+
+def sweep_occupancy(intervals: List[tuple], bucket_minutes: int) -> List[tuple]:
+    """
+    扫描线统计各时段的在场人数
+
+    事件排序 O(n log n)，之后按时间顺序只扫描一遍事件和时段，不逐人遍历时段。
+    同一时刻先处理下工再处理上工，交接班不会重复计人。
+
+    Args:
+        intervals: [(上工分钟, 下工分钟), ...]，绝对分钟数，见 shift_interval
+        bucket_minutes: 时段长度（分钟，能整除 1440）
+
+    Returns:
+        list: [(日期, 各时段在场人数), ...]，从最早上工日到最晚下工日
+    """
+    events = []
+    for start, end in intervals:
+        if end > start:
+            events.append((start, 1))
+            events.append((end, -1))
+    if not events:
+        return []
+    events.sort()
+
+    first_day = events[0][0] // 1440
+    last_day = (events[-1][0] - 1) // 1440
+    buckets_per_day = 1440 // bucket_minutes
+
+    rows = []
+    count, position = 0, 0
+    for day in range(first_day, last_day + 1):
+        counts = []
+        for bucket in range(buckets_per_day):
+            bucket_start = day * 1440 + bucket * bucket_minutes
+            bucket_end = bucket_start + bucket_minutes
+            # 时段开始前（含开始时刻）的事件决定初始人数
+            while position < len(events) and events[position][0] <= bucket_start:
+                count += events[position][1]
+                position += 1
+            peak = count
+            while position < len(events) and events[position][0] < bucket_end:
+                count += events[position][1]
+                peak = max(peak, count)
+                position += 1
+            counts.append(peak)
+        rows.append((date.fromordinal(day), counts))
+    return rows
+
+
+def occupancy_timelines(records: Iterable[Dict], bucket_minutes: int = 60) -> Dict[str, OccupancyTimeline]:
+    """
+    按公司计算在场人数时间线（缺少上工或下工时间的记录不计入）
+
+    Args:
+        records: 标准记录（可直接使用 ExcelReportGenerator.iter_records 的输出）
+        bucket_minutes: 时段长度，15 或 60
+
+    Returns:
+        dict: {公司: OccupancyTimeline}
+    """
+    if bucket_minutes not in BUCKET_MINUTES:
+        raise ValueError(f"时段长度应为 {BUCKET_MINUTES} 之一: {bucket_minutes}")
+
+    intervals = {}
+    for record in records:
+        interval = shift_interval(record['date'], record['start_time'], record['end_time'])
+        if interval is not None:
+            intervals.setdefault(record['company'], []).append(interval)
+
+    return {
+        company: OccupancyTimeline(company, bucket_minutes, sweep_occupancy(company_intervals, bucket_minutes))
+        for company, company_intervals in sorted(intervals.items())
+    }
+
+
+def write_occupancy_workbook(timeline: OccupancyTimeline, output_file: str) -> str:
+    """写出热力图工作簿：每天一行、每个时段一列，按人数着色，最后一列为当天峰值"""
+    labels = timeline.bucket_labels
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '在场人数'
+
+    last_col = len(labels) + 3
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=last_col)
+    title = ws.cell(row=1, column=1, value=f"{timeline.company} 在场人数（每 {timeline.bucket_minutes} 分钟）")
+    title.font = STATS_TITLE_FONT
+    title.alignment = CENTER_ALIGN
+
+    for col, text in enumerate(['日期', '星期'] + labels + ['峰值'], 1):
+        cell = ws.cell(row=2, column=col, value=text)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+
+    for row_idx, (day, counts) in enumerate(timeline.rows, 3):
+        values = [day.strftime('%m-%d'), WEEKDAY_NAMES[day.weekday()]] + counts + [max(counts)]
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row_idx, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+
+    if timeline.rows:
+        last_row = len(timeline.rows) + 2
+        heat_range = f"C3:{get_column_letter(len(labels) + 2)}{last_row}"
+        ws.conditional_formatting.add(heat_range, ColorScaleRule(
+            start_type='num', start_value=0, start_color=HEATMAP_LOW_COLOR,
+            end_type='max', end_color=HEATMAP_HIGH_COLOR,
+        ))
+
+    ws.column_dimensions['A'].width = 8
+    ws.column_dimensions['B'].width = 6
+    for col in range(3, last_col + 1):
+        ws.column_dimensions[get_column_letter(col)].width = 6
+    ws.freeze_panes = 'C3'
+    wb.save(output_file)
+    return output_file
+
+
+def write_occupancy_csv(timeline: OccupancyTimeline, output_file: str) -> str:
+    """写出 CSV（每个时段一行：公司、日期、时段开始、在场人数）"""
+    labels = timeline.bucket_labels
+    with open(output_file, 'w', newline='', encoding='utf-8-sig') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['劳务公司', '日期', '时段开始', '在场人数'])
+        for day, counts in timeline.rows:
+            for label, count in zip(labels, counts):
+                writer.writerow([timeline.company, day.isoformat(), label, count])
+    return output_file
+
+
+def generate_occupancy_reports(input_file: str, output_dir: str, bucket_minutes: int = 60,
+                               record_filter=None) -> List[str]:
+    """
+    从签到表生成各公司的在场人数热力图和 CSV
+
+    Returns:
+        list: 生成的文件路径
+    """
+    generator = ExcelReportGenerator()
+    print(f"正在读取文件: {input_file}")
+    timelines = occupancy_timelines(generator.iter_records(input_file, record_filter), bucket_minutes)
+
+    generated_files = []
+    for company, timeline in timelines.items():
+        if not timeline.rows:
+            continue
+        month = timeline.rows[0][0].month
+        base = os.path.join(output_dir, f"site_occupancy-{month:02d}-{company}")
+        generated_files.append(write_occupancy_workbook(timeline, base + '.xlsx'))
+        generated_files.append(write_occupancy_csv(timeline, base + '.csv'))
+        print(f"已生成在场人数: {base}.xlsx（峰值 {timeline.peak} 人）")
+
+    if generator.errors:
+        print('\n'.join(generator.errors.summary_lines()))
+    return generated_files
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='在场人数时间线（热力图 + CSV）')
+    parser.add_argument('input_file', help='输入的Excel文件路径')
+    parser.add_argument('-o', '--output', default='.', help='输出目录 (默认: 当前目录)')
+    parser.add_argument('--bucket', type=int, choices=BUCKET_MINUTES, default=60,
+                        help='时段长度（分钟，默认: 60）')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"错误: 输入文件不存在: {args.input_file}")
+        sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+
+    generated_files = generate_occupancy_reports(args.input_file, args.output, args.bucket)
+    print(f"\n✅ 共生成 {len(generated_files)} 个文件")
+
+
+if __name__ == "__main__":
+    main()
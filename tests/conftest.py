@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""测试公共设置：模块位于仓库根目录；生成小型签到表供各测试使用"""
+
+import os
+import sys
+from datetime import time
+
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIGN_IN_HEADERS = ['序号', '姓名', '劳务公司', '上工', '下工', '白班工时11H（如有延长下班的，备注原因）']
+
+# 工作表名 → [(姓名, 公司, 上工, 下工, 备注), ...]；含一天多次签到、夜班、缺少下工的记录
+SIGN_IN_SHEETS = {
+    '6.1': [
+        ('张三', '公司A', time(8, 0), time(19, 30), ''),
+        ('李四', '公司A', time(8, 15), time(12, 0), ''),
+        ('李四', '公司A', time(13, 0), time(18, 0), '下午返场'),
+        ('王五', '公司B', time(20, 0), time(8, 0), ''),
+    ],
+    '6.2': [
+        ('张三', '公司A', time(8, 0), time(20, 30), '延长下班'),
+        ('王五', '公司B', time(20, 0), time(8, 30), ''),
+        ('赵六', '公司B', time(8, 0), None, ''),
+    ],
+    '6.15': [
+        ('李四', '公司A', time(7, 45), time(19, 0), ''),
+        ('赵六', '公司B', time(9, 0), time(17, 0), ''),
+        ('赵六', '公司B', time(18, 0), time(22, 0), ''),
+        ('赵六', '公司B', time(22, 30), time(23, 30), ''),
+    ],
+    '6.30': [
+        ('张三', '公司A', time(21, 0), time(9, 0), ''),
+        ('王五', '公司B', time(8, 0), time(19, 0), ''),
+    ],
+}
+
+
+@pytest.fixture
+def sign_in_workbook(tmp_path):
+    """写出签到表并返回路径"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for sheet_name, rows in SIGN_IN_SHEETS.items():
+        ws = wb.create_sheet(sheet_name)
+        month, day = sheet_name.split('.')
+        ws.append([f"{month}月{day}日劳务签到表"])
+        ws.append(SIGN_IN_HEADERS)
+        ws.append([None, '白班安排'])
+        for seq, (name, company, start, end, description) in enumerate(rows, 1):
+            ws.append([seq, name, company, start, end, description or None])
+    path = tmp_path / '6月劳务签到表.xlsx'
+    wb.save(path)
+    return str(path)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""按分钟预计算的结果表（use_lookup_table）与批量计算的结果逐条一致"""
+
+import pytest
+
+from attendance_calculator import AttendanceCalculator
+from attendance_rules import CompiledRules
+from excel_report_generator_fixed import ExcelReportGenerator
+
+# 签到表之外补充的上工/下工：缺少、无法解析、非整分钟、跨零点、上下工相同
+EDGE_TIMES = [
+    (None, '18:00'),
+    ('08:00', None),
+    ('', ''),
+    ('abc', '18:00'),
+    ('08:00', '下班'),
+    ('0.3541', '0.75'),
+    ('23:30', '00:15'),
+    ('20:00', '08:00'),
+    ('07:00', '19:30'),
+    ('07:59', '19:31'),
+    ('00:00', '23:59'),
+    ('12:00', '12:00'),
+]
+
+RULE_CONFIGS = [
+    None,
+    {'night_start': 19, 'lunch_break': 11.5, 'night_allowance_min_hours': 11},
+]
+
+
+def sign_in_records(path):
+    """签到表中的记录 + 补充的边界情况，字段同 calculate_company_statistics 的输入"""
+    generator = ExcelReportGenerator()
+    generator.read_input_excel(path)
+    times = [(record['start_time'], record['end_time']) for record in generator.raw_data] + EDGE_TIMES
+    return [
+        {'姓名': f"员工{index}", '劳务公司': '公司A', '上工时间': start, '下工时间': end}
+        for index, (start, end) in enumerate(times)
+    ]
+
+
+@pytest.mark.parametrize('config', RULE_CONFIGS)
+def test_lookup_table_matches_batch(sign_in_workbook, config):
+    records = sign_in_records(sign_in_workbook)
+    batch = AttendanceCalculator(CompiledRules(config)).process_attendance_records(records)
+    table = AttendanceCalculator(CompiledRules(config), use_lookup_table=True).process_attendance_records(records)
+
+    assert len(table) == len(batch) == len(records)
+    for expected, actual in zip(batch, table):
+        assert actual == expected, (expected['start_time'], expected['end_time'])
+
+
+def test_batch_covers_invalid_and_overnight_shifts(sign_in_workbook):
+    results = {
+        (stat['start_time'], stat['end_time']): stat
+        for stat in AttendanceCalculator().process_attendance_records(sign_in_records(sign_in_workbook))
+    }
+
+    for start, end in [(None, '18:00'), ('08:00', None), ('abc', '18:00'), ('08:00', '下班')]:
+        assert results[(start, end)]['shift_type'] == '无效'
+        assert results[(start, end)]['effective_hours'] == 0.0
+
+    overnight = results[('20:00', '08:00')]
+    assert overnight['shift_type'] == '夜班'
+    assert overnight['total_hours'] == 12.0
+    assert overnight['effective_hours'] == 11.5
+    assert overnight['night_allowance'] == 10.0
+    assert results[('23:30', '00:15')]['total_hours'] == 0.75
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""签到摘要与差异比较：相同、新增、删除、修改的签到，备注等非比较字段不影响摘要"""
+
+from datetime import datetime, time
+
+import pytest
+from openpyxl import load_workbook
+
+from attendance_diff import ADDED, MODIFIED, REMOVED, diff_results, load_workbook_results
+from excel_report_generator_fixed import RECORD_KEY_FIELDS, record_digest
+
+
+def record(day, name, start, end, description='', company='公司A'):
+    return {'date': datetime(2025, 6, day), 'name': name, 'company': company,
+            'start_time': start, 'end_time': end, 'description': description}
+
+
+def statistic(rec, hours, allowance=0.0):
+    return {'name': rec['name'], 'company': rec['company'], 'effective_hours': hours, 'night_allowance': allowance}
+
+
+def diff_of(old, new):
+    """old / new: [(记录, 有效工时), ...]"""
+    return diff_results([rec for rec, _ in old], [statistic(rec, hours) for rec, hours in old],
+                        [rec for rec, _ in new], [statistic(rec, hours) for rec, hours in new])
+
+
+def test_digest_ignores_fields_outside_key():
+    base = record(1, '张三', '08:00', '18:00', description='延长下班')
+    digest = record_digest(base)
+    assert record_digest(dict(base, description='')) == digest
+    assert record_digest(dict(base, seq=7, source='二号现场')) == digest
+    assert record_digest({field: base[field] for field in RECORD_KEY_FIELDS}) == digest
+
+
+@pytest.mark.parametrize('field, value', [
+    ('date', datetime(2025, 6, 2)),
+    ('name', '李四'),
+    ('company', '公司B'),
+    ('start_time', '08:30'),
+    ('end_time', None),
+])
+def test_digest_changes_with_key_fields(field, value):
+    base = record(1, '张三', '08:00', '18:00')
+    assert record_digest(dict(base, **{field: value})) != record_digest(base)
+
+
+def test_digest_normalizes_time_text():
+    assert record_digest(record(1, '张三', '7:30', '18:00')) == record_digest(record(1, '张三', '07:30', '18:00'))
+
+
+def test_unchanged_records():
+    old = [(record(1, '张三', '08:00', '18:00'), 9.0), (record(1, '李四', '20:00', '08:00'), 11.5)]
+    new = [(dict(rec, description='已核对'), hours) for rec, hours in reversed(old)]
+    diff = diff_of(old, new)
+    assert diff.unchanged == 2
+    assert diff.changes == []
+    assert diff.employees == []
+
+
+def test_added_removed_and_modified():
+    kept = (record(1, '张三', '08:00', '18:00'), 9.0)
+    old = [kept, (record(2, '张三', '08:00', '18:00'), 9.0), (record(3, '李四', '08:00', '12:00'), 3.5)]
+    new = [kept, (record(2, '张三', '08:00', '20:00'), 11.0), (record(4, '王五', '08:00', '18:00'), 9.0)]
+    diff = diff_of(old, new)
+
+    assert diff.unchanged == 1
+    changes = {(change.kind, change.record['name']): change for change in diff.changes}
+    assert set(changes) == {(MODIFIED, '张三'), (REMOVED, '李四'), (ADDED, '王五')}
+
+    modified = changes[(MODIFIED, '张三')]
+    assert modified.old[0]['end_time'] == '18:00' and modified.new[0]['end_time'] == '20:00'
+    assert modified.row()[8:11] == [9.0, 11.0, 2.0]
+    assert changes[(REMOVED, '李四')].new is None
+    assert changes[(ADDED, '王五')].old is None
+
+    employees = {row[0]: row for row in diff.employees}
+    assert employees['张三'][2:8] == (0, 0, 1, 18.0, 20.0, 2.0)
+    assert employees['李四'][2:8] == (0, 1, 0, 3.5, 0.0, -3.5)
+    assert employees['王五'][2:8] == (1, 0, 0, 0.0, 9.0, 9.0)
+
+
+def test_duplicate_sign_ins_do_not_cancel_out():
+    shift = record(1, '张三', '08:00', '18:00')
+    diff = diff_of([(shift, 9.0), (dict(shift), 9.0)], [(dict(shift), 9.0)])
+    assert diff.unchanged == 1
+    assert [change.kind for change in diff.changes] == [REMOVED]
+
+
+def test_workbook_diff(sign_in_workbook, tmp_path):
+    wb = load_workbook(sign_in_workbook)
+    ws = wb['6.1']
+    ws['E4'] = time(20, 30)                           # 张三 19:30 → 20:30
+    ws.delete_rows(6)                                 # 删除李四下午返场
+    ws.append([5, '钱七', '公司B', time(8, 0), time(18, 0)])
+    revised = str(tmp_path / '6月劳务签到表-修订.xlsx')
+    wb.save(revised)
+
+    old_records, old_statistics, _ = load_workbook_results(sign_in_workbook)
+    new_records, new_statistics, _ = load_workbook_results(revised)
+    diff = diff_results(old_records, old_statistics, new_records, new_statistics)
+
+    assert diff.unchanged == len(old_records) - 2
+    assert sorted((change.kind, change.record['name']) for change in diff.changes) == [
+        (ADDED, '钱七'), (MODIFIED, '张三'), (REMOVED, '李四')]
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""签到异常检查：重叠、重复、缺少上工/下工、时长过长，正常的班次不报告"""
+
+from datetime import datetime
+
+from excel_report_generator_fixed import ExcelReportGenerator
+from shift_anomalies import (
+    DUPLICATE, LONG_SHIFT, MISSING_END, MISSING_START, OVERLAP, find_anomalies, find_employee_anomalies
+)
+
+
+def record(day, start, end, name='张三', company='公司A'):
+    return {'date': datetime(2025, 6, day), 'name': name, 'company': company,
+            'start_time': start, 'end_time': end, 'description': ''}
+
+
+def kinds(anomalies):
+    return [(anomaly.kind, anomaly.record['start_time'], anomaly.record['end_time']) for anomaly in anomalies]
+
+
+def test_clean_day_has_no_findings():
+    records = [record(1, '08:00', '12:00'), record(1, '13:00', '18:00'), record(1, '20:00', '23:00'),
+               record(2, '08:00', '19:00')]
+    assert find_employee_anomalies(records) == []
+
+
+def test_overlap():
+    anomalies = find_employee_anomalies([record(1, '08:00', '12:00'), record(1, '11:00', '14:00')])
+    assert kinds(anomalies) == [(OVERLAP, '11:00', '14:00')]
+    assert '重叠 1 小时' in anomalies[0].detail
+
+
+def test_overnight_shift_overlaps_next_morning():
+    anomalies = find_employee_anomalies([record(1, '20:00', '08:00'), record(2, '07:00', '12:00')])
+    assert kinds(anomalies) == [(OVERLAP, '07:00', '12:00')]
+
+
+def test_duplicate_is_not_also_reported_as_overlap():
+    anomalies = find_employee_anomalies([record(1, '08:00', '18:00'), record(1, '08:00', '18:00')])
+    assert kinds(anomalies) == [(DUPLICATE, '08:00', '18:00')]
+
+
+def test_duplicate_inside_a_longer_shift():
+    # 排序后为 07-20、08-12、08-12：重复签到与前一个班次比较，不与下工最晚的班次比较
+    anomalies = find_employee_anomalies([record(1, '08:00', '12:00'), record(1, '07:00', '20:00'),
+                                         record(1, '08:00', '12:00')])
+    assert sorted(kinds(anomalies)) == [(DUPLICATE, '08:00', '12:00'), (OVERLAP, '08:00', '12:00')]
+
+
+def test_missing_punch():
+    anomalies = find_employee_anomalies([record(1, '08:00', None), record(2, None, '18:00'), record(3, None, None)])
+    assert kinds(anomalies) == [(MISSING_END, '08:00', None), (MISSING_START, None, '18:00')]
+
+
+def test_long_shift():
+    anomalies = find_employee_anomalies([record(1, '06:00', '23:00'), record(2, '08:00', '19:00')])
+    assert kinds(anomalies) == [(LONG_SHIFT, '06:00', '23:00')]
+    assert anomalies[0].hours == 17.0
+    assert find_employee_anomalies([record(1, '06:00', '23:00')], max_shift_hours=18) == []
+
+
+def test_find_anomalies_groups_by_company(sign_in_workbook):
+    records = list(ExcelReportGenerator().iter_records(sign_in_workbook))
+    by_company = find_anomalies(records)
+
+    # 签到表中只有赵六 6.2 缺少下工；李四一天两次签到、王五夜班跨零点都正常
+    assert list(by_company) == ['公司B']
+    assert [(anomaly.kind, anomaly.record['name']) for anomaly in by_company['公司B']] == [(MISSING_END, '赵六')]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""流式写出（engine='stream'）与 openpyxl 写出的报表逐单元格、逐合并区域一致"""
+
+import os
+
+import numpy as np
+import pytest
+from openpyxl import load_workbook
+
+from attendance_pipeline import AttendancePipeline
+from attendance_rules import load_rule_book
+from excel_report_generator_fixed import ExcelReportGenerator
+from run_attendance_stats import generate_excel_report, plan_stats_layout
+from xlsx_stream_writer import StreamingWorkbook
+
+
+def dump_workbook(path):
+    """工作表结构、列宽和每个有值或有样式的单元格（值、字体、填充、边框、对齐）"""
+    wb = load_workbook(path)
+    sheets = []
+    for ws in wb.worksheets:
+        cells = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is None and not cell.has_style:
+                    continue
+                font, fill, border, alignment = cell.font, cell.fill, cell.border, cell.alignment
+                cells[cell.coordinate] = (
+                    None if cell.value == '' else cell.value,
+                    font.name, font.sz, font.b,
+                    fill.fill_type, fill.fgColor.rgb if fill.fill_type else None,
+                    border.left.style, border.right.style, border.top.style, border.bottom.style,
+                    alignment.horizontal, alignment.vertical, alignment.wrap_text,
+                )
+        widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width and dim.customWidth}
+        sheets.append({
+            'title': ws.title,
+            'freeze_panes': ws.freeze_panes,
+            'merged': sorted(str(merged) for merged in ws.merged_cells.ranges),
+            'widths': widths,
+            'cells': cells,
+        })
+    return sheets
+
+
+def assert_same_workbook(expected_path, actual_path):
+    expected, actual = dump_workbook(expected_path), dump_workbook(actual_path)
+    assert [sheet['title'] for sheet in actual] == [sheet['title'] for sheet in expected]
+    for want, got in zip(expected, actual):
+        assert got['merged'] == want['merged'], want['title']
+        assert got['freeze_panes'] == want['freeze_panes'], want['title']
+        assert got['widths'] == want['widths'], want['title']
+        assert got['cells'].keys() == want['cells'].keys(), want['title']
+        for coordinate, value in want['cells'].items():
+            assert got['cells'][coordinate] == value, f"{want['title']}!{coordinate}"
+
+
+def read_statistics(path):
+    generator = ExcelReportGenerator()
+    company_statistics = AttendancePipeline(generator, load_rule_book(None)).run(path)
+    assert not generator.errors
+    return generator, company_statistics
+
+
+@pytest.mark.parametrize('flat', [False, True])
+def test_hours_report_matches_openpyxl(sign_in_workbook, tmp_path, flat):
+    generator = ExcelReportGenerator()
+    generator.read_input_excel(sign_in_workbook)
+    for company in sorted(generator.companies):
+        report_info = generator.generate_company_report(company)
+        paths = {}
+        for engine in ('openpyxl', 'stream'):
+            output_dir = tmp_path / engine
+            output_dir.mkdir(exist_ok=True)
+            paths[engine] = generator.save_company_report(report_info, str(output_dir), engine=engine, flat=flat)
+        assert os.path.basename(paths['stream']) == os.path.basename(paths['openpyxl'])
+        assert_same_workbook(paths['openpyxl'], paths['stream'])
+
+
+@pytest.mark.parametrize('flat', [False, True])
+def test_stats_report_matches_openpyxl(sign_in_workbook, tmp_path, flat):
+    _, company_statistics = read_statistics(sign_in_workbook)
+    for company, statistics in sorted(company_statistics.items()):
+        layout = plan_stats_layout(statistics)
+        paths = {engine: str(tmp_path / f"{engine}-{company}.xlsx") for engine in ('openpyxl', 'stream')}
+        for engine, path in paths.items():
+            generate_excel_report(statistics, path, layout=layout, engine=engine, flat=flat)
+        assert_same_workbook(paths['openpyxl'], paths['stream'])
+
+
+def test_stats_report_with_numpy_values(sign_in_workbook, tmp_path):
+    """计算结果为 numpy 数值时流式写出的仍是合法的数值单元格"""
+    _, company_statistics = read_statistics(sign_in_workbook)
+    statistics = company_statistics['公司A']
+    numpy_statistics = [
+        dict(stat, effective_hours=np.float64(stat['effective_hours']),
+             night_allowance=np.float64(stat['night_allowance']))
+        for stat in statistics
+    ]
+    layout = plan_stats_layout(statistics)
+    expected, actual = str(tmp_path / 'openpyxl.xlsx'), str(tmp_path / 'stream.xlsx')
+    generate_excel_report(statistics, expected, layout=layout, engine='openpyxl')
+    generate_excel_report(numpy_statistics, actual, layout=layout, engine='stream')
+    assert_same_workbook(expected, actual)
+
+
+def test_numpy_cell_values(tmp_path):
+    path = str(tmp_path / 'numbers.xlsx')
+    with StreamingWorkbook(path) as wb:
+        sheet = wb.add_sheet('数值')
+        sheet.write_row(1, [(1, np.float64(1.5), 0), (2, np.int64(7), 0), (3, np.float32(0.25), 0),
+                            (4, 2, 0), (5, 3.75, 0), (6, True, 0)])
+        sheet.close()
+
+    values = [cell.value for cell in next(load_workbook(path).active.iter_rows())]
+    assert values == [1.5, 7, 0.25, 2, 3.75, True]
+    assert all(not isinstance(value, str) for value in values)
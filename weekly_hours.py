@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+周工时 - 按 ISO 周汇总每名员工的有效工时，标出超过每周上限的加班时长
+
+在批量计算结果上用分组汇总和 7 天滚动窗口一次算出，不逐条循环；
+本月第一周跨月时，如有上月数据（如归档中的上月结果）则一并计入，该周工时完整。
+"""
+
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.utils import get_column_letter
+
+from attendance_rules import DEFAULT_RULES
+from report_templates import (
+    CENTER_ALIGN, THIN_BORDER, STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_HEADER_FILL, STATS_DATA_FONT,
+    STATS_NIGHT_FILL, STATS_ZEBRA_FILL_1, STATS_ZEBRA_FILL_2
+)
+
+# 默认的每周工时上限（小时）；各公司按劳动合同在规则配置的 weekly_hours_limit 中指定
+DEFAULT_WEEKLY_LIMIT = DEFAULT_RULES['weekly_hours_limit']
+
+WEEKLY_SUMMARY_TITLES = ['超时合计', '超时周数', '7日最高工时']
+
+
+class WeeklyHours:
+    """
+    一个公司某月的周工时
+
+    - weeks: 与本月有交集的 ISO 周及超出本月的记录所在的周 [(周一, 是否含上月数据), ...]
+    - rows: [(姓名, 公司, [(周工时, 超时), ...], (超时合计, 超时周数, 任意连续 7 天最高工时)), ...]
+    """
+
+    def __init__(self, year: int, month: int, limit: float, weeks: List[tuple], rows: List[tuple]):
+        self.year = year
+        self.month = month
+        self.limit = limit
+        self.weeks = weeks
+        self.rows = rows
+
+    def week_label(self, index: int) -> str:
+        monday, uses_prior = self.weeks[index]
+        iso_week = monday.isocalendar()[1]
+        sunday = monday + timedelta(days=6)
+        label = f"第{iso_week}周 {monday:%m-%d}~{sunday:%m-%d}"
+        return label + '（含上月）' if uses_prior else label
+
+
+def _statistics_frame(statistics: List[Dict]) -> pd.DataFrame:
+    """考勤计算结果 → (姓名, 公司, 日期, 有效工时) 数据框"""
+    frame = pd.DataFrame({
+        'name': [stat['name'] for stat in statistics],
+        'company': [stat['company'] for stat in statistics],
+        'year': [stat['year'] for stat in statistics],
+        'month': [stat['month'] for stat in statistics],
+        'day': [stat['day'] for stat in statistics],
+        'hours': [stat['effective_hours'] for stat in statistics],
+    })
+    frame['date'] = pd.to_datetime(frame[['year', 'month', 'day']])
+    return frame[['name', 'company', 'date', 'hours']]
+
+
+def compute_weekly_hours(statistics: List[Dict], limit: float = DEFAULT_WEEKLY_LIMIT,
+                         prior_statistics: Optional[List[Dict]] = None) -> WeeklyHours:
+    """
+    计算一个公司某月的周工时和超时
+
+    报表月份与考勤统计报表（plan_stats_layout）一样取自第一条计算结果；
+    周列为与该月有交集的各周，超出该月的记录（如 6 月签到表中的 7.31）所在的周也补上列，
+    不会从周工时中漏掉。
+
+    Args:
+        statistics: 本月的考勤计算结果（流水线或归档的输出）
+        limit: 每周工时上限（小时）
+        prior_statistics: 上月的考勤计算结果（可选），用于补全跨月的第一周
+
+    Returns:
+        WeeklyHours: 员工按本月首次出现顺序排列
+    """
+    current = _statistics_frame(statistics)
+    year, month = statistics[0]['year'], statistics[0]['month']
+    month_start = pd.Timestamp(year, month, 1)
+    month_end = month_start + pd.offsets.MonthEnd(0)
+    first_monday = month_start - pd.Timedelta(days=month_start.weekday())
+
+    frame = current
+    uses_prior = False
+    if prior_statistics:
+        prior = _statistics_frame(prior_statistics)
+        prior = prior[(prior['date'] >= first_monday) & (prior['date'] < month_start)]
+        uses_prior = not prior.empty
+        frame = pd.concat([prior, current], ignore_index=True)
+
+    employees = list(dict.fromkeys(zip(current['name'], current['company'])))
+    frame = frame[frame.set_index(['name', 'company']).index.isin(employees)]
+
+    # 每周工时：按周一分组求和，员工 × 周
+    week_start = frame['date'] - pd.to_timedelta(frame['date'].dt.weekday, unit='D')
+    weekly = frame.groupby([frame['name'], frame['company'], week_start])['hours'].sum().unstack(fill_value=0.0)
+    mondays = pd.DatetimeIndex(sorted(set(pd.date_range(first_monday, month_end, freq='7D')) | set(week_start)))
+    weekly = weekly.reindex(index=pd.MultiIndex.from_tuples(employees), columns=mondays, fill_value=0.0)
+    overtime = (weekly - limit).clip(lower=0.0)
+
+    # 任意连续 7 天最高工时：按天汇总后 7 天滚动求和，只取以本月日期结尾的窗口
+    daily = (frame.groupby(['name', 'company', 'date'])['hours'].sum().reset_index()
+             .sort_values(['name', 'company', 'date']))
+    daily['rolling'] = (daily.set_index('date').groupby(['name', 'company'])['hours']
+                        .rolling('7D').sum().to_numpy())
+    peak = daily[daily['date'] >= month_start].groupby(['name', 'company'])['rolling'].max()
+    peak = peak.reindex(pd.MultiIndex.from_tuples(employees), fill_value=0.0)
+
+    total_overtime = overtime.sum(axis=1)
+    overtime_weeks = (overtime > 0).sum(axis=1)
+
+    rows = []
+    for position, (name, company) in enumerate(employees):
+        weeks = [(round(float(hours), 1), round(float(extra), 1))
+                 for hours, extra in zip(weekly.iloc[position], overtime.iloc[position])]
+        summary = (round(float(total_overtime.iloc[position]), 1), int(overtime_weeks.iloc[position]),
+                   round(float(peak.iloc[position]), 1))
+        rows.append((name, company, weeks, summary))
+
+    weeks = [(monday.date(), uses_prior and index == 0 and monday < month_start)
+             for index, monday in enumerate(mondays)]
+    return WeeklyHours(year, month, limit, weeks, rows)
+
+
+def write_weekly_report(weekly: WeeklyHours, output_file: str) -> str:
+    """
+    写出周工时报表：每周两列（工时、超时），超时的单元格用夜班底色标出
+    """
+    week_count = len(weekly.weeks)
+    total_cols = 3 + 2 * week_count + len(WEEKLY_SUMMARY_TITLES)
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = '周工时'
+
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=total_cols)
+    title = ws.cell(row=1, column=1,
+                    value=f"{weekly.year}年{weekly.month:02d}月 周工时（每周上限 {weekly.limit:g} 小时）")
+    title.font = STATS_TITLE_FONT
+    title.alignment = CENTER_ALIGN
+
+    def header(row, col, value):
+        cell = ws.cell(row=row, column=col, value=value)
+        cell.font = STATS_HEADER_FONT
+        cell.fill = STATS_HEADER_FILL
+        cell.alignment = CENTER_ALIGN
+        cell.border = THIN_BORDER
+
+    for col, text in enumerate(['序号', '姓名', '劳务公司'], 1):
+        ws.merge_cells(start_row=2, start_column=col, end_row=3, end_column=col)
+        header(2, col, text)
+        header(3, col, None)
+    for index in range(week_count):
+        col = 4 + 2 * index
+        ws.merge_cells(start_row=2, start_column=col, end_row=2, end_column=col + 1)
+        header(2, col, weekly.week_label(index))
+        header(2, col + 1, None)
+        header(3, col, '工时')
+        header(3, col + 1, '超时')
+    for offset, text in enumerate(WEEKLY_SUMMARY_TITLES):
+        col = 4 + 2 * week_count + offset
+        ws.merge_cells(start_row=2, start_column=col, end_row=3, end_column=col)
+        header(2, col, text)
+        header(3, col, None)
+
+    for seq, (name, company, weeks, summary) in enumerate(weekly.rows, 1):
+        row = seq + 3
+        fill = STATS_ZEBRA_FILL_1 if seq % 2 else STATS_ZEBRA_FILL_2
+        values = [seq, name, company]
+        for hours, extra in weeks:
+            values.extend([hours, extra])
+        values.extend(summary)
+        for col, value in enumerate(values, 1):
+            cell = ws.cell(row=row, column=col, value=value)
+            cell.font = STATS_DATA_FONT
+            cell.alignment = CENTER_ALIGN
+            cell.border = THIN_BORDER
+            overtime_cell = col >= 4 and col < 4 + 2 * week_count and (col - 4) % 2 == 1
+            cell.fill = STATS_NIGHT_FILL if overtime_cell and value else fill
+
+    widths = [6, 12, 14] + [9, 7] * week_count + [10, 10, 12]
+    for col, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+    ws.freeze_panes = 'D4'
+    wb.save(output_file)
+    return output_file
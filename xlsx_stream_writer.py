@@ -0,0 +1,571 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 xlsx 写出 - 直接生成 SpreadsheetML 写入 zip，不经过 openpyxl 单元格对象
+
+适合超大报表；样式表为预先生成的固定 styles.xml，覆盖本工具报表用到的全部样式组合
+"""
+
+import io
+import numbers
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.utils import get_column_letter
+
+from report_templates import (
+    hours_header_block, stats_header_block,
+    THIN_BORDER, CENTER_ALIGN, CENTER_WRAP_ALIGN, LEFT_ALIGN,
+    HOURS_TITLE_FONT, HOURS_HEADER_FONT, HOURS_DATA_FONT, HOURS_ZEBRA_FILL,
+    STATS_TITLE_FONT, STATS_HEADER_FONT, STATS_DATA_FONT, STATS_HEADER_FILL,
+    STATS_NIGHT_FILL, STATS_ZEBRA_FILL_1, STATS_ZEBRA_FILL_2,
+)
+
+# XML 命名空间
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+# XML 不允许的控制字符
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# 样式组合：(字体, 填充, 边框, 对齐)，下标+1 即 cellXfs 中的序号（0 为默认样式）
+STYLE_COMBOS = [
+    # 工时报表
+    (HOURS_TITLE_FONT, None, THIN_BORDER, None),
+    (None, None, THIN_BORDER, None),
+    (HOURS_HEADER_FONT, None, THIN_BORDER, CENTER_ALIGN),
+    (HOURS_HEADER_FONT, None, THIN_BORDER, CENTER_WRAP_ALIGN),
+    (HOURS_DATA_FONT, None, THIN_BORDER, CENTER_ALIGN),
+    (HOURS_DATA_FONT, HOURS_ZEBRA_FILL, THIN_BORDER, CENTER_ALIGN),
+    (None, HOURS_ZEBRA_FILL, THIN_BORDER, None),
+    # 考勤统计
+    (STATS_TITLE_FONT, None, None, LEFT_ALIGN),
+    (STATS_HEADER_FONT, STATS_HEADER_FILL, THIN_BORDER, CENTER_ALIGN),
+    (None, STATS_HEADER_FILL, THIN_BORDER, None),
+    (STATS_DATA_FONT, STATS_ZEBRA_FILL_1, THIN_BORDER, CENTER_ALIGN),
+    (STATS_DATA_FONT, STATS_ZEBRA_FILL_2, THIN_BORDER, CENTER_ALIGN),
+    (STATS_DATA_FONT, STATS_NIGHT_FILL, THIN_BORDER, CENTER_ALIGN),
+    (None, STATS_ZEBRA_FILL_1, THIN_BORDER, None),
+    (None, STATS_ZEBRA_FILL_2, THIN_BORDER, None),
+]
+
+
+def _number_text(value) -> str:
+    """数值单元格的文本：整数按 int、其余按 float 的 repr（numpy 数值不会写成 "np.float64(1.5)"）"""
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _font_xml(font) -> str:
+    if font is None:
+        return '<font><sz val="11"/><name val="Calibri"/><family val="2"/><scheme val="minor"/></font>'
+    bold = '<b/>' if font.b else ''
+    return f'<font>{bold}<sz val="{font.sz:g}"/><name val={quoteattr(font.name)}/></font>'
+
+
+def _fill_xml(fill) -> str:
+    if fill is None:
+        return '<fill><patternFill patternType="none"/></fill>'
+    return (f'<fill><patternFill patternType="{fill.fill_type}">'
+            f'<fgColor rgb="{fill.fgColor.rgb}"/><bgColor rgb="{fill.bgColor.rgb}"/>'
+            f'</patternFill></fill>')
+
+
+def _border_xml(border) -> str:
+    if border is None:
+        return '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    sides = ''.join(
+        f'<{name} style="{getattr(border, name).style}"/>' if getattr(border, name).style else f'<{name}/>'
+        for name in ('left', 'right', 'top', 'bottom')
+    )
+    return f'<border>{sides}<diagonal/></border>'
+
+
+def _alignment_xml(alignment) -> str:
+    if alignment is None:
+        return ''
+    attrs = []
+    if alignment.horizontal:
+        attrs.append(f'horizontal="{alignment.horizontal}"')
+    if alignment.vertical:
+        attrs.append(f'vertical="{alignment.vertical}"')
+    if alignment.wrap_text:
+        attrs.append('wrapText="1"')
+    return f'<alignment {" ".join(attrs)}/>'
+
+
+def _build_styles() -> Tuple[str, Dict[tuple, int]]:
+    """根据 STYLE_COMBOS 生成 styles.xml 和样式查找表"""
+    fonts, fills, borders = [None], [None, 'gray125'], [None]
+    xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+    xf_index = {(None, None, None, None): 0}
+
+    for font, fill, border, alignment in STYLE_COMBOS:
+        if font not in fonts:
+            fonts.append(font)
+        if fill not in fills:
+            fills.append(fill)
+        if border not in borders:
+            borders.append(border)
+        key = (font, fill, border, alignment)
+        if key in xf_index:
+            continue
+        align_xml = _alignment_xml(alignment)
+        applied = ''.join(
+            f' apply{name}="1"' for name, value in (('Font', font), ('Fill', fill), ('Border', border))
+            if value is not None
+        )
+        xf_index[key] = len(xfs)
+        xfs.append(
+            f'<xf numFmtId="0" fontId="{fonts.index(font)}" fillId="{fills.index(fill)}" '
+            f'borderId="{borders.index(border)}" xfId="0"{applied}'
+            + (f' applyAlignment="1">{align_xml}</xf>' if align_xml else '/>')
+        )
+
+    fill_xml = [
+        '<fill><patternFill patternType="gray125"/></fill>' if fill == 'gray125' else _fill_xml(fill)
+        for fill in fills
+    ]
+    styles = (
+        XML_HEADER
+        + f'<styleSheet xmlns="{MAIN_NS}">'
+        + f'<fonts count="{len(fonts)}">' + ''.join(_font_xml(font) for font in fonts) + '</fonts>'
+        + f'<fills count="{len(fills)}">' + ''.join(fill_xml) + '</fills>'
+        + f'<borders count="{len(borders)}">' + ''.join(_border_xml(border) for border in borders) + '</borders>'
+        + '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        + f'<cellXfs count="{len(xfs)}">' + ''.join(xfs) + '</cellXfs>'
+        + '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        + '</styleSheet>'
+    )
+    return styles, xf_index
+
+
+STYLES_XML, _XF_INDEX = _build_styles()
+
+
+def style_id(font=None, fill=None, border=None, alignment=None) -> int:
+    """查找样式组合在 styles.xml 中的序号"""
+    return _XF_INDEX[(font, fill, border, alignment)]
+
+
+def _cell_style_id(style) -> int:
+    return style_id(style.font, style.fill, style.border, style.alignment)
+
+
+class SheetStream:
+    """单个工作表的流式写出（行、列必须按升序写入）"""
+
+    def __init__(self, workbook: 'StreamingWorkbook', path: str,
+                 freeze_row: Optional[int] = None,
+                 column_widths: Optional[Dict[int, float]] = None,
+                 dimension: Optional[str] = None,
+                 buffered: bool = False):
+        self.workbook = workbook
+        self.path = path
+        # 预留的工作表先写入内存，由工作簿 close 时按顺序写入 zip
+        self._handle = io.BytesIO() if buffered else workbook._zip.open(path, 'w')
+        self._merges = []
+        self._buffer = []
+        self._buffered = 0
+
+        parts = [XML_HEADER, f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">']
+        if dimension:
+            parts.append(f'<dimension ref="{dimension}"/>')
+        parts.append('<sheetViews><sheetView workbookViewId="0">')
+        if freeze_row:
+            parts.append(
+                f'<pane ySplit="{freeze_row - 1}" topLeftCell="A{freeze_row}" activePane="bottomLeft" state="frozen"/>'
+                '<selection pane="bottomLeft"/>'
+            )
+        parts.append('</sheetView></sheetViews><sheetFormatPr defaultRowHeight="15"/>')
+        if column_widths:
+            parts.append('<cols>')
+            for col, width in sorted(column_widths.items()):
+                parts.append(f'<col min="{col}" max="{col}" width="{width}" customWidth="1"/>')
+            parts.append('</cols>')
+        parts.append('<sheetData>')
+        self._write(''.join(parts))
+
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered > 1 << 16:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._handle.write(''.join(self._buffer).encode('utf-8'))
+            self._buffer = []
+            self._buffered = 0
+
+    def cell_xml(self, ref: str, value, style: int) -> str:
+        """生成单个单元格的 XML（value 为 None 或 '' 时只写样式）"""
+        s = f' s="{style}"' if style else ''
+        if value is None or value == '':
+            return f'<c r="{ref}"{s}/>'
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, numbers.Real):
+            return f'<c r="{ref}"{s}><v>{_number_text(value)}</v></c>'
+        return f'<c r="{ref}"{s} t="s"><v>{self.workbook.string_index(str(value))}</v></c>'
+
+    def write_row(self, row_idx: int, cells: Iterable[Tuple[int, object, int]]):
+        """
+        写入一行
+
+        Args:
+            row_idx: 行号
+            cells: (列号, 值, 样式序号) 序列，列号升序
+        """
+        letters = self.workbook.column_letters
+        self._write(
+            f'<row r="{row_idx}">'
+            + ''.join(self.cell_xml(f'{letters[col]}{row_idx}', value, style) for col, value, style in cells)
+            + '</row>'
+        )
+
+    def write_raw_row(self, row_idx: int, cells_xml: str):
+        """写入已生成好的单元格 XML"""
+        self._write(f'<row r="{row_idx}">{cells_xml}</row>')
+
+    def merge(self, start_row: int, start_col: int, end_row: int, end_col: int):
+        letters = self.workbook.column_letters
+        self._merges.append(f'{letters[start_col]}{start_row}:{letters[end_col]}{end_row}')
+
+    def close(self):
+        self._write('</sheetData>')
+        if self._merges:
+            self._write(
+                f'<mergeCells count="{len(self._merges)}">'
+                + ''.join(f'<mergeCell ref="{ref}"/>' for ref in self._merges)
+                + '</mergeCells>'
+            )
+        self._write('<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+                    '</worksheet>')
+        self.flush()
+        if isinstance(self._handle, io.BytesIO):
+            self.workbook._buffered_sheets[self.path] = self._handle.getvalue()
+        else:
+            self._handle.close()
+        self._handle = None
+
+
+class StreamingWorkbook:
+    """
+    流式工作簿：工作表逐个写入 zip，最后写入共享字符串和工作簿结构
+
+    用法：
+        with StreamingWorkbook(path) as wb:
+            sheet = wb.add_sheet('sheet1', freeze_row=4)
+            sheet.write_row(1, [(1, '标题', 0)])
+            sheet.close()
+
+    预留（reserve_sheet）的工作表可以在多个线程中同时生成
+    """
+
+    def __init__(self, filepath: str, compresslevel: int = 6):
+        self.filepath = filepath
+        self._zip = zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self._sheet_titles = []
+        self._strings = {}
+        self._string_list = []
+        self._current = None
+        self._reserved = {}
+        self._buffered_sheets = {}
+        self._lock = threading.Lock()
+        self.column_letters = [''] + [get_column_letter(col) for col in range(1, 1025)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._zip.close()
+            if os.path.exists(self.filepath):
+                os.remove(self.filepath)
+
+    def string_index(self, text: str) -> int:
+        """共享字符串序号"""
+        index = self._strings.get(text)
+        if index is None:
+            with self._lock:
+                index = self._strings.get(text)
+                if index is None:
+                    index = self._strings[text] = len(self._string_list)
+                    self._string_list.append(text)
+        return index
+
+    def reserve_sheet(self, title: str):
+        """预留工作表位置；之后用同名 add_sheet 生成时先写入内存，可在其他线程中进行"""
+        with self._lock:
+            self._sheet_titles.append(title)
+            self._reserved[title] = len(self._sheet_titles)
+
+    def add_sheet(self, title: str, freeze_row: Optional[int] = None,
+                  column_widths: Optional[Dict[int, float]] = None,
+                  dimension: Optional[str] = None) -> SheetStream:
+        """新建工作表（未预留的工作表按顺序写入，上一个须已 close）"""
+        with self._lock:
+            number = self._reserved.pop(title, None)
+        if number is not None:
+            return SheetStream(self, f'xl/worksheets/sheet{number}.xml', freeze_row, column_widths, dimension,
+                               buffered=True)
+
+        if self._current is not None and self._current._handle is not None:
+            raise RuntimeError("上一个工作表尚未关闭")
+        self._sheet_titles.append(title)
+        path = f'xl/worksheets/sheet{len(self._sheet_titles)}.xml'
+        self._current = SheetStream(self, path, freeze_row, column_widths, dimension)
+        return self._current
+
+    def close(self):
+        """写入工作簿结构文件并关闭 zip"""
+        if self._current is not None and self._current._handle is not None:
+            self._current.close()
+        if self._reserved:
+            raise RuntimeError(f"预留的工作表未生成: {', '.join(self._reserved)}")
+        for path in sorted(self._buffered_sheets, key=lambda path: int(re.sub(r'\D', '', path))):
+            self._zip.writestr(path, self._buffered_sheets[path])
+        self._buffered_sheets = {}
+
+        sheet_count = len(self._sheet_titles)
+        content_types = (
+            XML_HEADER
+            + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            + '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            + '<Default Extension="xml" ContentType="application/xml"/>'
+            + '<Override PartName="/xl/workbook.xml" '
+              'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + ''.join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in range(1, sheet_count + 1)
+            )
+            + '<Override PartName="/xl/styles.xml" '
+              'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + '<Override PartName="/xl/sharedStrings.xml" '
+              'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            + '</Types>'
+        )
+        root_rels = (
+            XML_HEADER
+            + f'<Relationships xmlns="{PKG_REL_NS}">'
+            + f'<Relationship Id="rId1" Type="{REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            + '</Relationships>'
+        )
+        workbook = (
+            XML_HEADER
+            + f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheets>'
+            + ''.join(
+                f'<sheet name={quoteattr(title)} sheetId="{i}" r:id="rId{i}"/>'
+                for i, title in enumerate(self._sheet_titles, 1)
+            )
+            + '</sheets></workbook>'
+        )
+        workbook_rels = (
+            XML_HEADER
+            + f'<Relationships xmlns="{PKG_REL_NS}">'
+            + ''.join(
+                f'<Relationship Id="rId{i}" Type="{REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                for i in range(1, sheet_count + 1)
+            )
+            + f'<Relationship Id="rId{sheet_count + 1}" Type="{REL_NS}/styles" Target="styles.xml"/>'
+            + f'<Relationship Id="rId{sheet_count + 2}" Type="{REL_NS}/sharedStrings" Target="sharedStrings.xml"/>'
+            + '</Relationships>'
+        )
+
+        with self._zip.open('xl/sharedStrings.xml', 'w') as handle:
+            handle.write((
+                XML_HEADER
+                + f'<sst xmlns="{MAIN_NS}" count="{len(self._string_list)}" uniqueCount="{len(self._string_list)}">'
+            ).encode('utf-8'))
+            chunk = []
+            for text in self._string_list:
+                text = _ILLEGAL_XML_CHARS.sub('', text)
+                space = ' xml:space="preserve"' if text != text.strip() or '\n' in text else ''
+                chunk.append(f'<si><t{space}>{escape(text)}</t></si>')
+                if len(chunk) >= 1024:
+                    handle.write(''.join(chunk).encode('utf-8'))
+                    chunk = []
+            handle.write((''.join(chunk) + '</sst>').encode('utf-8'))
+
+        self._zip.writestr('[Content_Types].xml', content_types)
+        self._zip.writestr('_rels/.rels', root_rels)
+        self._zip.writestr('xl/workbook.xml', workbook)
+        self._zip.writestr('xl/_rels/workbook.xml.rels', workbook_rels)
+        self._zip.writestr('xl/styles.xml', STYLES_XML)
+        self._zip.close()
+
+
+def write_header_block(sheet: SheetStream, block):
+    """将表头块写入流式工作表"""
+    for start_row, start_col, end_row, end_col in block.merged_ranges:
+        sheet.merge(start_row, start_col, end_row, end_col)
+    for row, cells in block.cell_grid():
+        sheet.write_row(row, [(col, value, _cell_style_id(style)) for col, value, style in cells])
+
+
+def write_hours_sheet(wb: StreamingWorkbook, title: str, report_info: Dict, flat: bool = False):
+    """
+    向流式工作簿写入一个员工工时工作表
+
+    Args:
+        wb: 流式工作簿
+        title: 工作表名
+        report_info: generate_company_report 的返回值（可含 first_seq 起始序号，用于分片）
+        flat: 平铺模式，不合并单元格
+    """
+    company = report_info['company']
+    layout = report_info['layout']
+    columns = layout.columns(first_col=5, min_span=1)
+    total_cols = columns.last_col
+    block = hours_header_block(layout, flat=flat)
+
+    plain = style_id(HOURS_DATA_FONT, None, THIN_BORDER, CENTER_ALIGN)
+    zebra = style_id(HOURS_DATA_FONT, HOURS_ZEBRA_FILL, THIN_BORDER, CENTER_ALIGN)
+    merged_style = style_id(None, None, THIN_BORDER, None)
+
+    letters = wb.column_letters
+    employees = report_info['employees']
+    first_seq = report_info.get('first_seq', 1)
+    sheet = wb.add_sheet(
+        title, freeze_row=4,
+        dimension=f'A1:{letters[total_cols]}{3 + 2 * len(employees)}'
+    )
+    write_header_block(sheet, block)
+
+    # 时间文本 → 共享字符串序号（0 号为空白）
+    label_refs = [None] + [wb.string_index(label) for label in report_info['time_labels'][1:]]
+    company_ref = wb.string_index(company)
+    time_letters = letters[columns.first_col:total_cols + 1]
+    start_ref, end_ref = wb.string_index('上工'), wb.string_index('下工')
+
+    row_idx = 4
+    for seq_num, (employee_name, pair) in enumerate(zip(employees, report_info['time_codes'].tolist()),
+                                                    first_seq):
+        s = zebra if seq_num % 2 == 0 else plain
+        name_ref = wb.string_index(employee_name)
+        if not flat:
+            for col in (1, 2, 3):
+                sheet.merge(row_idx, col, row_idx + 1, col)
+
+        for row, codes, label_ref, first in ((row_idx, pair[0], start_ref, True),
+                                             (row_idx + 1, pair[1], end_ref, False)):
+            if first or flat:
+                parts = [
+                    f'<c r="A{row}" s="{s}"><v>{seq_num}</v></c>'
+                    f'<c r="B{row}" s="{s}" t="s"><v>{name_ref}</v></c>'
+                    f'<c r="C{row}" s="{s}" t="s"><v>{company_ref}</v></c>'
+                ]
+            else:
+                parts = [
+                    f'<c r="A{row}" s="{merged_style}"/><c r="B{row}" s="{merged_style}"/>'
+                    f'<c r="C{row}" s="{merged_style}"/>'
+                ]
+            parts.append(f'<c r="D{row}" s="{s}" t="s"><v>{label_ref}</v></c>')
+            for letter, code in zip(time_letters, codes):
+                ref = label_refs[code]
+                if ref is None:
+                    parts.append(f'<c r="{letter}{row}" s="{s}"/>')
+                else:
+                    parts.append(f'<c r="{letter}{row}" s="{s}" t="s"><v>{ref}</v></c>')
+            sheet.write_raw_row(row, ''.join(parts))
+
+        row_idx += 2
+
+    sheet.close()
+
+
+def write_hours_report(report_info: Dict, filepath: str, flat: bool = False):
+    """
+    流式写出员工工时报表（外观与 save_company_report 一致）
+
+    Args:
+        report_info: generate_company_report 的返回值
+        filepath: 输出文件路径
+        flat: 平铺模式，不合并单元格
+    """
+    with StreamingWorkbook(filepath) as wb:
+        write_hours_sheet(wb, 'sheet1', report_info, flat=flat)
+
+
+def write_stats_sheet(wb: StreamingWorkbook, title: str, rows: List[tuple], layout,
+                      flat: bool = False, first_seq: int = 1):
+    """
+    向流式工作簿写入一个考勤统计工作表
+
+    Args:
+        wb: 流式工作簿
+        title: 工作表名
+        rows: build_stats_rows 生成的员工行数据
+        layout: MonthLayout 月度布局
+        flat: 平铺模式，表头不合并单元格
+        first_seq: 起始序号（用于分片）
+    """
+    columns = layout.columns(first_col=4, min_span=0)
+    block = stats_header_block(layout, flat=flat)
+    total_col = columns.next_col
+
+    data_styles = {
+        False: style_id(STATS_DATA_FONT, STATS_ZEBRA_FILL_2, THIN_BORDER, CENTER_ALIGN),
+        True: style_id(STATS_DATA_FONT, STATS_ZEBRA_FILL_1, THIN_BORDER, CENTER_ALIGN),
+    }
+    empty_styles = {
+        False: style_id(None, STATS_ZEBRA_FILL_2, THIN_BORDER, None),
+        True: style_id(None, STATS_ZEBRA_FILL_1, THIN_BORDER, None),
+    }
+    night_style = style_id(STATS_DATA_FONT, STATS_NIGHT_FILL, THIN_BORDER, CENTER_ALIGN)
+
+    letters = wb.column_letters
+    sheet = wb.add_sheet(
+        title, column_widths=block.column_widths,
+        dimension=f'A1:{letters[block.total_cols]}{3 + len(rows)}'
+    )
+    write_header_block(sheet, block)
+
+    slot_letters = letters[columns.first_col:total_col]
+    summary_letters = letters[total_col:total_col + 4]
+
+    for row, (seq_num, (name, company, slots, summary)) in enumerate(enumerate(rows, first_seq), 4):
+        even = seq_num % 2 == 0
+        s = data_styles[even]
+        empty = f' s="{empty_styles[even]}"/>'
+        parts = [
+            f'<c r="A{row}" s="{s}"><v>{seq_num}</v></c>'
+            f'<c r="B{row}" s="{s}" t="s"><v>{wb.string_index(name)}</v></c>'
+            f'<c r="C{row}" s="{s}" t="s"><v>{wb.string_index(company)}</v></c>'
+        ]
+        for letter, slot in zip(slot_letters, slots):
+            if slot is None:
+                parts.append(f'<c r="{letter}{row}"{empty}')
+            else:
+                value, is_night = slot
+                parts.append(f'<c r="{letter}{row}" s="{night_style if is_night else s}"><v>{_number_text(value)}</v></c>')
+        for letter, value in zip(summary_letters, summary):
+            parts.append(f'<c r="{letter}{row}" s="{s}"><v>{_number_text(value)}</v></c>')
+        sheet.write_raw_row(row, ''.join(parts))
+
+    sheet.close()
+
+
+def write_stats_report(rows: List[tuple], layout, filepath: str, flat: bool = False):
+    """
+    流式写出考勤统计报表（外观与 generate_excel_report 一致）
+
+    Args:
+        rows: build_stats_rows 生成的员工行数据
+        layout: MonthLayout 月度布局
+        filepath: 输出文件路径
+        flat: 平铺模式，表头不合并单元格
+    """
+    with StreamingWorkbook(filepath) as wb:
+        write_stats_sheet(wb, '考勤统计', rows, layout, flat=flat)